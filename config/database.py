@@ -3,14 +3,25 @@ Configuración de base de datos
 """
 
 import pymysql
+import asyncio
+import contextvars
+import functools
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
-from typing import Generator
+from typing import Any, Callable, Dict, Generator, List, Optional, TypeVar
 import os
 from dotenv import load_dotenv
 
+from utils.tiempos import medir
+
 # Cargar variables de entorno
 load_dotenv()
 
+T = TypeVar("T")
+
 
 class DatabaseConfig:
     """Configuración de conexión a base de datos"""
@@ -24,34 +35,423 @@ class DatabaseConfig:
     # Para tbl_segundometro_semana
     DATABASE_SEGUNDOMETRO = os.getenv("DB_SEGUNDOMETRO", "segundometro")
 
+    # Pool de conexiones (un pool por base de datos)
+    POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+    POOL_MIN_IDLE = int(os.getenv("DB_POOL_MIN_IDLE", "2"))
+    POOL_MAX_LIFETIME = float(os.getenv("DB_POOL_MAX_LIFETIME", "1800"))
+    POOL_ACQUIRE_TIMEOUT = float(os.getenv("DB_POOL_ACQUIRE_TIMEOUT", "10"))
+    POOL_PING_AFTER_IDLE = float(os.getenv("DB_POOL_PING_AFTER_IDLE", "30"))
+    CONNECT_TIMEOUT = int(os.getenv("DB_CONNECT_TIMEOUT", "10"))
+
+    # Hilos dedicados a consultas; por defecto uno por conexión del pool
+    EXECUTOR_WORKERS = int(os.getenv("DB_EXECUTOR_WORKERS", str(POOL_MAX_SIZE)))
+
+
+class PoolAgotadoError(pymysql.err.OperationalError):
+    """No se obtuvo una conexión del pool dentro del tiempo de espera"""
+
+
+class _ConexionPool:
+    """Conexión física administrada por el pool"""
+
+    __slots__ = ("conn", "creada", "ultimo_uso")
+
+    def __init__(self, conn: pymysql.connections.Connection):
+        self.conn = conn
+        self.creada = time.monotonic()
+        self.ultimo_uso = self.creada
+
+
+class ConnectionPool:
+    """
+    Pool acotado de conexiones pymysql para una base de datos.
+
+    - Máximo `max_size` conexiones abiertas (en uso + ociosas).
+    - Mantiene al menos `min_idle` conexiones calientes.
+    - Hace ping al entregar una conexión que lleva ociosa más de `ping_after_idle` segundos.
+    - Recicla conexiones con más de `max_lifetime` segundos de vida.
+    """
+
+    def __init__(
+        self,
+        database: str,
+        max_size: int = DatabaseConfig.POOL_MAX_SIZE,
+        min_idle: int = DatabaseConfig.POOL_MIN_IDLE,
+        max_lifetime: float = DatabaseConfig.POOL_MAX_LIFETIME,
+        acquire_timeout: float = DatabaseConfig.POOL_ACQUIRE_TIMEOUT,
+        ping_after_idle: float = DatabaseConfig.POOL_PING_AFTER_IDLE
+    ):
+        self.database = database
+        self.max_size = max(1, max_size)
+        self.min_idle = max(0, min(min_idle, self.max_size))
+        self.max_lifetime = max_lifetime
+        self.acquire_timeout = acquire_timeout
+        self.ping_after_idle = ping_after_idle
+
+        self._idle: deque = deque()
+        self._abiertas = 0
+        self._en_uso = 0
+        self._cerrado = False
+        self._cond = threading.Condition()
+
+        # Contadores para monitoreo
+        self._creadas = 0
+        self._recicladas = 0
+        self._descartadas = 0
+        self._entregas = 0
+        self._esperas = 0
+        self._timeouts = 0
+
+    def _conectar(self) -> _ConexionPool:
+        conn = pymysql.connect(
+            host=DatabaseConfig.HOST,
+            port=DatabaseConfig.PORT,
+            user=DatabaseConfig.USER,
+            password=DatabaseConfig.PASSWORD,
+            database=self.database,
+            charset='utf8mb4',
+            cursorclass=pymysql.cursors.DictCursor,
+            connect_timeout=DatabaseConfig.CONNECT_TIMEOUT,
+            # Sin autocommit una conexión reutilizada conservaría el snapshot
+            # de la transacción anterior y devolvería lecturas obsoletas
+            autocommit=True
+        )
+        with self._cond:
+            self._creadas += 1
+        return _ConexionPool(conn)
+
+    def _expirada(self, item: _ConexionPool, ahora: float) -> bool:
+        return self.max_lifetime > 0 and ahora - item.creada >= self.max_lifetime
+
+    def _cerrar_fisica(self, item: _ConexionPool) -> None:
+        try:
+            item.conn.close()
+        except Exception:
+            pass
+
+    def acquire(self) -> _ConexionPool:
+        """
+        Obtiene una conexión del pool, abriendo una nueva si hay capacidad.
+
+        Raises:
+            PoolAgotadoError: Si no hay conexión disponible dentro de `acquire_timeout`
+        """
+        limite = time.monotonic() + self.acquire_timeout
+
+        while True:
+            item = None
+            crear = False
+
+            with self._cond:
+                if self._cerrado:
+                    raise pymysql.err.InterfaceError(f"El pool de '{self.database}' está cerrado")
+
+                if self._idle:
+                    item = self._idle.pop()
+                elif self._abiertas < self.max_size:
+                    self._abiertas += 1
+                    crear = True
+                else:
+                    self._esperas += 1
+                    restante = limite - time.monotonic()
+                    if restante <= 0 or not self._cond.wait(restante):
+                        if not self._idle and self._abiertas >= self.max_size:
+                            self._timeouts += 1
+                            raise PoolAgotadoError(
+                                f"No hay conexiones disponibles en el pool de '{self.database}' "
+                                f"(máximo {self.max_size})"
+                            )
+                    continue
+
+                self._en_uso += 1
+
+            if crear:
+                try:
+                    item = self._conectar()
+                except Exception:
+                    with self._cond:
+                        self._abiertas -= 1
+                        self._en_uso -= 1
+                        self._cond.notify()
+                    raise
+                with self._cond:
+                    self._entregas += 1
+                return item
+
+            ahora = time.monotonic()
+            sana = not self._expirada(item, ahora)
+            if sana and ahora - item.ultimo_uso >= self.ping_after_idle:
+                try:
+                    item.conn.ping(reconnect=False)
+                except Exception:
+                    sana = False
+
+            if sana:
+                with self._cond:
+                    self._entregas += 1
+                return item
+
+            # Conexión vieja o rota: se cierra y se vuelve a intentar
+            self._cerrar_fisica(item)
+            with self._cond:
+                self._abiertas -= 1
+                self._en_uso -= 1
+                self._recicladas += 1
+
+    def release(self, item: _ConexionPool, discard: bool = False) -> None:
+        """
+        Devuelve una conexión al pool.
+
+        Args:
+            item: Conexión obtenida con `acquire`
+            discard: Si es True la conexión se cierra en lugar de reutilizarse
+        """
+        ahora = time.monotonic()
+        cerrar = discard or self._cerrado or self._expirada(item, ahora)
+
+        if cerrar:
+            self._cerrar_fisica(item)
+        else:
+            item.ultimo_uso = ahora
+
+        with self._cond:
+            self._en_uso -= 1
+            if cerrar:
+                self._abiertas -= 1
+                if discard:
+                    self._descartadas += 1
+                else:
+                    self._recicladas += 1
+            else:
+                self._idle.append(item)
+            self._cond.notify()
+
+    def warm(self) -> int:
+        """
+        Abre conexiones hasta tener `min_idle` ociosas.
+
+        Returns:
+            Número de conexiones abiertas
+        """
+        abiertas = 0
+        while True:
+            with self._cond:
+                if (
+                    self._cerrado
+                    or len(self._idle) >= self.min_idle
+                    or self._abiertas >= self.max_size
+                ):
+                    return abiertas
+                self._abiertas += 1
+            try:
+                item = self._conectar()
+            except Exception:
+                with self._cond:
+                    self._abiertas -= 1
+                raise
+            with self._cond:
+                self._idle.append(item)
+                self._cond.notify()
+            abiertas += 1
+
+    def close(self) -> None:
+        """Cierra las conexiones ociosas y marca el pool como cerrado"""
+        with self._cond:
+            self._cerrado = True
+            ociosas = list(self._idle)
+            self._idle.clear()
+            self._abiertas -= len(ociosas)
+            self._cond.notify_all()
+        for item in ociosas:
+            self._cerrar_fisica(item)
+
+    def stats(self) -> dict:
+        """Estadísticas del pool para monitoreo"""
+        with self._cond:
+            return {
+                "database": self.database,
+                "max_size": self.max_size,
+                "min_idle": self.min_idle,
+                "abiertas": self._abiertas,
+                "en_uso": self._en_uso,
+                "ociosas": len(self._idle),
+                "creadas": self._creadas,
+                "recicladas": self._recicladas,
+                "descartadas": self._descartadas,
+                "entregas": self._entregas,
+                "esperas": self._esperas,
+                "timeouts": self._timeouts
+            }
+
+
+_pools: Dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(database: Optional[str] = None) -> ConnectionPool:
+    """
+    Obtiene (o crea de forma perezosa) el pool de una base de datos.
+
+    Args:
+        database: Nombre de la base de datos (opcional)
+
+    Returns:
+        Pool de conexiones de esa base de datos
+    """
+    db_name = database or DatabaseConfig.DATABASE
+    pool = _pools.get(db_name)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(db_name)
+            if pool is None:
+                pool = ConnectionPool(db_name)
+                _pools[db_name] = pool
+    return pool
+
+
+def init_pools() -> None:
+    """
+    Crea el pool de `db-mega-reporte` y abre las conexiones mínimas. Es la
+    única base que consultan los repositorios (tbl_segundometro_semana
+    también se lee de ahí), así que no se abren conexiones a `segundometro`.
+    Se llama desde el lifespan de la aplicación.
+    
+    Raises:
+        pymysql.Error: Si MySQL no acepta conexiones. El paso `mysql` del
+            arranque lo registra y /health/ready responde 503 hasta que un
+            reintento lo logra.
+    """
+    get_pool(DatabaseConfig.DATABASE).warm()
+
+
+def close_pools() -> None:
+    """Cierra todos los pools. Se llama al apagar la aplicación."""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
+
+
+def pool_stats() -> Dict[str, dict]:
+    """Estadísticas de todos los pools, por base de datos"""
+    return {db_name: pool.stats() for db_name, pool in list(_pools.items())}
+
 
 @contextmanager
 def get_db_connection(database: str = None) -> Generator[pymysql.connections.Connection, None, None]:
     """
     Context manager para conexión a base de datos
     
+    La conexión se toma del pool de la base de datos y se devuelve al salir.
+    Si ocurre un error de conexión se descarta en lugar de reutilizarse.
+    
     Args:
         database: Nombre de la base de datos (opcional)
     
     Yields:
         Conexión a la base de datos
     """
-    db_name = database or DatabaseConfig.DATABASE
-    
-    connection = pymysql.connect(
-        host=DatabaseConfig.HOST,
-        port=DatabaseConfig.PORT,
-        user=DatabaseConfig.USER,
-        password=DatabaseConfig.PASSWORD,
-        database=db_name,
-        charset='utf8mb4',
-        cursorclass=pymysql.cursors.DictCursor
-    )
+    pool = get_pool(database)
+    with medir("db-conexion"):
+        item = pool.acquire()
+    discard = False
     
     try:
-        yield connection
+        yield item.conn
+    except (pymysql.err.OperationalError, pymysql.err.InterfaceError):
+        discard = True
+        raise
     finally:
-        connection.close()
+        pool.release(item, discard=discard)
+
+
+def fetch_one(query: str, params: tuple = (), database: str = None) -> Optional[dict]:
+    """
+    Ejecuta una consulta y retorna la primera fila (bloqueante).
+    
+    Args:
+        query: Sentencia SQL parametrizada
+        params: Parámetros de la sentencia
+        database: Nombre de la base de datos (opcional)
+    
+    Returns:
+        Primera fila como diccionario o None
+    """
+    with get_db_connection(database=database) as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(query, params)
+            return cursor.fetchone()
+
+
+def fetch_all(query: str, params: tuple = (), database: str = None) -> List[dict]:
+    """
+    Ejecuta una consulta y retorna todas las filas (bloqueante).
+    
+    Args:
+        query: Sentencia SQL parametrizada
+        params: Parámetros de la sentencia
+        database: Nombre de la base de datos (opcional)
+    
+    Returns:
+        Lista de filas como diccionarios
+    """
+    with get_db_connection(database=database) as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(query, params)
+            return list(cursor.fetchall())
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_db_executor() -> ThreadPoolExecutor:
+    """
+    Executor acotado y dedicado a trabajo de base de datos.
+    
+    Las llamadas de pymysql son bloqueantes; se ejecutan aquí para no congelar
+    el event loop de uvicorn mientras MySQL responde.
+    """
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=max(1, DatabaseConfig.EXECUTOR_WORKERS),
+                    thread_name_prefix="db"
+                )
+    return _executor
+
+
+def shutdown_db_executor() -> None:
+    """Detiene el executor de base de datos. Se llama al apagar la aplicación."""
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+async def run_db(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Ejecuta una función bloqueante de base de datos en el executor dedicado.
+    La función corre con una copia del contexto de la petición, así que los
+    tiempos que registre aparecen en su header Server-Timing.
+    
+    Args:
+        func: Función síncrona que usa `get_db_connection`
+        *args, **kwargs: Argumentos de la función
+    
+    Returns:
+        El resultado de la función
+    
+    Example:
+        row = await run_db(fetch_one, "SELECT 1 AS uno")
+    """
+    loop = asyncio.get_running_loop()
+    contexto = contextvars.copy_context()
+    return await loop.run_in_executor(get_db_executor(), functools.partial(contexto.run, func, *args, **kwargs))
 
 
 def get_db():
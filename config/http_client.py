@@ -0,0 +1,186 @@
+"""
+Cliente HTTP compartido para llamadas salientes
+"""
+
+import httpx
+import logging
+import threading
+from typing import Optional
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+
+def _env_bool(nombre: str, default: str = "false") -> bool:
+    return os.getenv(nombre, default).strip().lower() in ("1", "true", "yes", "si", "sí")
+
+
+class HttpClientConfig:
+    """Configuración del cliente HTTP saliente"""
+    
+    TIMEOUT = float(os.getenv("HTTP_CLIENT_TIMEOUT", "10"))
+    CONNECT_TIMEOUT = float(os.getenv("HTTP_CLIENT_CONNECT_TIMEOUT", "5"))
+    POOL_TIMEOUT = float(os.getenv("HTTP_CLIENT_POOL_TIMEOUT", "5"))
+    MAX_CONNECTIONS = int(os.getenv("HTTP_CLIENT_MAX_CONNECTIONS", "100"))
+    MAX_KEEPALIVE = int(os.getenv("HTTP_CLIENT_MAX_KEEPALIVE", "20"))
+    KEEPALIVE_EXPIRY = float(os.getenv("HTTP_CLIENT_KEEPALIVE_EXPIRY", "30"))
+    HTTP2 = _env_bool("HTTP_CLIENT_HTTP2")
+    # Abre la conexión con la API externa al iniciar cada worker
+    WARMUP = _env_bool("HTTP_CLIENT_WARMUP", "true")
+
+
+class _MetricasCliente:
+    """Contadores de uso del pool de conexiones salientes"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.peticiones = 0
+        self.conexiones_nuevas = 0
+        self.errores = 0
+    
+    def incrementar(self, campo: str) -> None:
+        with self._lock:
+            setattr(self, campo, getattr(self, campo) + 1)
+    
+    def snapshot(self) -> dict:
+        with self._lock:
+            reutilizadas = max(0, self.peticiones - self.conexiones_nuevas)
+            return {
+                "peticiones": self.peticiones,
+                "conexiones_nuevas": self.conexiones_nuevas,
+                "conexiones_reutilizadas": reutilizadas,
+                "tasa_reutilizacion": round(reutilizadas / self.peticiones, 4) if self.peticiones else 0.0,
+                "errores": self.errores
+            }
+
+
+_metricas = _MetricasCliente()
+_client: Optional[httpx.AsyncClient] = None
+
+
+async def _trace(evento: str, info: dict) -> None:
+    """
+    Callback de la extensión `trace` de httpcore.
+    Cada handshake TCP completado es una conexión nueva; el resto de
+    peticiones reutilizaron una conexión keep-alive del pool.
+    """
+    if evento == "connection.connect_tcp.complete":
+        _metricas.incrementar("conexiones_nuevas")
+
+
+def _http2_disponible() -> bool:
+    if not HttpClientConfig.HTTP2:
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        logger.warning("HTTP_CLIENT_HTTP2 está activo pero el paquete 'h2' no está instalado; se usará HTTP/1.1")
+        return False
+    return True
+
+
+def _crear_cliente() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(
+            HttpClientConfig.TIMEOUT,
+            connect=HttpClientConfig.CONNECT_TIMEOUT,
+            pool=HttpClientConfig.POOL_TIMEOUT
+        ),
+        limits=httpx.Limits(
+            max_connections=HttpClientConfig.MAX_CONNECTIONS,
+            max_keepalive_connections=HttpClientConfig.MAX_KEEPALIVE,
+            keepalive_expiry=HttpClientConfig.KEEPALIVE_EXPIRY
+        ),
+        http2=_http2_disponible()
+    )
+
+
+async def init_http_client() -> httpx.AsyncClient:
+    """Crea el cliente compartido. Se llama desde el lifespan de la aplicación."""
+    global _client
+    if _client is None:
+        _client = _crear_cliente()
+    return _client
+
+
+async def close_http_client() -> None:
+    """Cierra el cliente compartido y sus conexiones keep-alive."""
+    global _client
+    client, _client = _client, None
+    if client is not None:
+        await client.aclose()
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Cliente compartido de la aplicación (se crea bajo demanda si el lifespan
+    no lo inicializó, por ejemplo en scripts).
+    """
+    global _client
+    if _client is None:
+        _client = _crear_cliente()
+    return _client
+
+
+async def post_json(url: str, payload: dict, headers: Optional[dict] = None) -> httpx.Response:
+    """
+    POST con el cliente compartido, registrando métricas de reutilización.
+    
+    Args:
+        url: URL destino
+        payload: Cuerpo JSON
+        headers: Headers adicionales
+    
+    Returns:
+        Respuesta HTTP (sin validar el status)
+    """
+    _metricas.incrementar("peticiones")
+    try:
+        return await get_http_client().post(
+            url,
+            json=payload,
+            headers=headers,
+            extensions={"trace": _trace}
+        )
+    except httpx.HTTPError:
+        _metricas.incrementar("errores")
+        raise
+
+
+async def calentar_http_client(url: str) -> bool:
+    """
+    Abre por adelantado una conexión keep-alive con el origen de `url`
+    (DNS, TCP y TLS) con un HEAD a la raíz del origen, para que la primera
+    petición real no pague el handshake. El status de la respuesta no
+    importa; cualquier error solo se registra en el log.
+    
+    Returns:
+        True si la conexión quedó abierta
+    """
+    origen = httpx.URL(url).join("/")
+    _metricas.incrementar("peticiones")
+    try:
+        await get_http_client().head(
+            origen,
+            timeout=HttpClientConfig.CONNECT_TIMEOUT,
+            extensions={"trace": _trace}
+        )
+        return True
+    except httpx.HTTPError as e:
+        _metricas.incrementar("errores")
+        logger.warning("No se pudo precalentar la conexión con %s: %s", origen, e)
+        return False
+
+
+def http_client_stats() -> dict:
+    """Estadísticas del cliente HTTP compartido para monitoreo"""
+    return {
+        "iniciado": _client is not None,
+        "http2": bool(_client is not None and HttpClientConfig.HTTP2 and _http2_disponible()),
+        "max_connections": HttpClientConfig.MAX_CONNECTIONS,
+        "max_keepalive": HttpClientConfig.MAX_KEEPALIVE,
+        **_metricas.snapshot()
+    }
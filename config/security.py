@@ -4,24 +4,127 @@ Sistema de Seguridad y Autenticación
 
 from fastapi import HTTPException, Security, status
 from fastapi.security import APIKeyHeader
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
+import hashlib
+import math
 import os
 from dotenv import load_dotenv
 
+from utils.limites import CuotaDiaria, TokenBucket
+from utils.tiempos import medir
+
 load_dotenv()
 
 # Configuración de API Keys
 API_KEY_NAME = "X-API-Key"
 api_key_header = APIKeyHeader(name=API_KEY_NAME, auto_error=True)
 
-# Cargar API Keys válidas desde .env (separadas por comas)
-VALID_API_KEYS = os.getenv("API_KEYS", "").split(",")
-VALID_API_KEYS = [key.strip() for key in VALID_API_KEYS if key.strip()]
+
+class RateLimitConfig:
+    """Límites por API Key que aplican cuando API_KEYS no los indica"""
+    
+    ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").strip().lower() in ("1", "true", "yes", "si", "sí")
+    DEFAULT_RPS = float(os.getenv("RATE_LIMIT_DEFAULT_RPS", "50"))
+    DEFAULT_BURST = float(os.getenv("RATE_LIMIT_DEFAULT_BURST", "100"))
+    # 0 = sin cuota diaria
+    DEFAULT_DAILY_QUOTA = int(os.getenv("RATE_LIMIT_DEFAULT_DAILY_QUOTA", "0"))
+
+
+class _ClaveApi:
+    """Límites y contadores de uso de una API Key (identificada por su huella)"""
+    
+    __slots__ = ("huella", "limite", "cuota", "peticiones", "rechazadas_limite", "rechazadas_cuota")
+    
+    def __init__(self, huella: str, rps: float, rafaga: float, cuota_diaria: int):
+        self.huella = huella
+        self.limite = TokenBucket(rps, rafaga) if rps > 0 else None
+        self.cuota = CuotaDiaria(cuota_diaria) if cuota_diaria > 0 else None
+        self.peticiones = 0
+        self.rechazadas_limite = 0
+        self.rechazadas_cuota = 0
+
+
+def _huella(api_key: str) -> str:
+    """SHA-256 del API Key: las tablas en memoria nunca guardan la llave en claro"""
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()
+
+
+def _parsear_claves(valor: str) -> Tuple[List[str], Dict[str, _ClaveApi]]:
+    """
+    Interpreta API_KEYS: llaves separadas por comas, cada una con límites
+    opcionales `llave:rps:rafaga:cuota_diaria` (campos vacíos u omitidos
+    toman los valores por defecto de RateLimitConfig; 0 = sin límite).
+    
+    Example:
+        API_KEYS=clave_portal:20:40:100000,clave_batch:5,clave_interna:0
+    
+    Returns:
+        Tupla (llaves en claro, {huella: _ClaveApi})
+    """
+    llaves = []
+    tabla = {}
+    for item in valor.split(","):
+        partes = [parte.strip() for parte in item.split(":")]
+        llave = partes[0]
+        if not llave:
+            continue
+        campos = partes[1:] + [""] * (3 - len(partes[1:]))
+        rps = float(campos[0]) if campos[0] else RateLimitConfig.DEFAULT_RPS
+        rafaga = float(campos[1]) if campos[1] else max(RateLimitConfig.DEFAULT_BURST, rps)
+        cuota_diaria = int(campos[2]) if campos[2] else RateLimitConfig.DEFAULT_DAILY_QUOTA
+        llaves.append(llave)
+        tabla[_huella(llave)] = _ClaveApi(_huella(llave), rps, rafaga, cuota_diaria)
+    return llaves, tabla
+
+
+# Cargar API Keys válidas desde .env (separadas por comas, con límites opcionales)
+VALID_API_KEYS, _CLAVES = _parsear_claves(os.getenv("API_KEYS", ""))
+
+# API Keys con permisos de administración (subconjunto opcional, separadas por comas)
+ADMIN_API_KEYS = os.getenv("ADMIN_API_KEYS", "").split(",")
+ADMIN_API_KEYS = [key.strip() for key in ADMIN_API_KEYS if key.strip()]
+_ADMIN = {_huella(key) for key in ADMIN_API_KEYS}
+
+
+def _aplicar_limites(clave: _ClaveApi) -> None:
+    """
+    Consume un token del bucket y una petición de la cuota diaria. La cuota
+    se revisa antes del bucket para que una petición rechazada por cuota no
+    gaste un token, y solo se cuenta si el bucket la deja pasar.
+    
+    Raises:
+        HTTPException: 429 con Retry-After si se excede alguno
+    """
+    clave.peticiones += 1
+    
+    if clave.cuota is not None:
+        espera = clave.cuota.espera()
+        if espera > 0:
+            clave.rechazadas_cuota += 1
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail=f"Cuota diaria agotada ({clave.cuota.limite} peticiones). Se reinicia a medianoche.",
+                headers={"Retry-After": str(math.ceil(espera))}
+            )
+    
+    if clave.limite is not None:
+        espera = clave.limite.consumir()
+        if espera > 0:
+            clave.rechazadas_limite += 1
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail=f"Límite de peticiones excedido ({clave.limite.tasa:g} por segundo). Intente de nuevo en unos segundos.",
+                headers={"Retry-After": str(max(1, math.ceil(espera)))}
+            )
+    
+    if clave.cuota is not None:
+        clave.cuota.consumir()
 
 
 async def verify_api_key(api_key: str = Security(api_key_header)) -> str:
     """
-    Verifica que el API Key proporcionado sea válido.
+    Verifica que el API Key proporcionado sea válido y que no haya excedido
+    su límite de peticiones por segundo ni su cuota diaria.
     
     Args:
         api_key: API Key del header X-API-Key
@@ -30,23 +133,72 @@ async def verify_api_key(api_key: str = Security(api_key_header)) -> str:
         El API Key si es válido
         
     Raises:
-        HTTPException: Si el API Key es inválido o no existe
+        HTTPException: 401 si el API Key es inválido o no existe,
+            429 si excedió su límite o su cuota
     """
-    if not VALID_API_KEYS:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="No hay API Keys configuradas en el servidor"
-        )
+    with medir("auth"):
+        if not _CLAVES:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="No hay API Keys configuradas en el servidor"
+            )
+        
+        clave = _CLAVES.get(_huella(api_key))
+        if clave is None:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="API Key inválida o no autorizada"
+            )
+        
+        if RateLimitConfig.ENABLED:
+            _aplicar_limites(clave)
     
-    if api_key not in VALID_API_KEYS:
+    return api_key
+
+
+async def verify_admin_api_key(api_key: str = Security(verify_api_key)) -> str:
+    """
+    Verifica que el API Key tenga permisos de administración.
+    
+    Args:
+        api_key: API Key ya validado por verify_api_key
+        
+    Returns:
+        El API Key si es de administración
+        
+    Raises:
+        HTTPException: 403 si el API Key no está en ADMIN_API_KEYS
+    """
+    if _huella(api_key) not in _ADMIN:
         raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="API Key inválida o no autorizada"
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="El API Key no tiene permisos de administración"
         )
     
     return api_key
 
 
+def uso_api_keys() -> List[dict]:
+    """
+    Límites y uso por API Key para monitoreo. Cada llave se identifica por
+    los primeros 12 caracteres de su huella SHA-256, nunca en claro.
+    """
+    uso = []
+    for clave in _CLAVES.values():
+        uso.append({
+            "clave": clave.huella[:12],
+            "limite_rps": clave.limite.tasa if clave.limite else None,
+            "rafaga": clave.limite.capacidad if clave.limite else None,
+            "tokens_disponibles": round(clave.limite.disponibles, 2) if clave.limite else None,
+            "cuota_diaria": clave.cuota.limite if clave.cuota else None,
+            "usadas_hoy": clave.cuota.usadas if clave.cuota else None,
+            "peticiones": clave.peticiones,
+            "rechazadas_limite": clave.rechazadas_limite,
+            "rechazadas_cuota": clave.rechazadas_cuota
+        })
+    return uso
+
+
 def generate_api_key() -> str:
     """
     Genera un nuevo API Key aleatorio.
@@ -0,0 +1,115 @@
+"""
+Servidor simulado de la API externa de estado de cuenta
+
+Responde POST /estadocuenta con el mismo formato que la API real
+(estadoCuenta.datosSaldos) y permite inyectar latencia, errores HTTP y
+timeouts para medir cómo se comporta la API bajo una dependencia lenta o
+inestable. La configuración se puede cambiar en caliente con POST /_config.
+
+Uso:
+    python loadtest/mock_estadocuenta.py [--port 8089] [--latencia-ms 80] [--jitter-ms 40]
+                                         [--tasa-error 0.01] [--tasa-timeout 0]
+"""
+
+import argparse
+import asyncio
+import random
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+app = FastAPI(title="Mock estadocuenta", docs_url=None, redoc_url=None)
+
+# Configuración vigente (se puede modificar con POST /_config)
+CONFIG = {
+    "latencia_ms": 80.0,
+    "jitter_ms": 40.0,
+    "tasa_error": 0.0,
+    "tasa_timeout": 0.0,
+    # Segundos que se retiene una petición marcada como timeout
+    "timeout_s": 30.0
+}
+
+ESTADISTICAS = {
+    "peticiones": 0,
+    "errores": 0,
+    "timeouts": 0
+}
+
+
+def _datos_saldos(id_credito: int) -> dict:
+    """Saldos deterministas por crédito (la misma respuesta en cada build)"""
+    rnd = random.Random(id_credito)
+    cuotas_devengadas = rnd.randint(1, 104)
+    return {
+        "saldoTotalVencido": round(rnd.uniform(0, 20000), 2),
+        "cuotasDevengadas": cuotas_devengadas,
+        "cuotasPagadas": rnd.randint(0, cuotas_devengadas)
+    }
+
+
+@app.post("/estadocuenta")
+async def estadocuenta(request: Request):
+    ESTADISTICAS["peticiones"] += 1
+    payload = await request.json()
+
+    latencia = max(0.0, CONFIG["latencia_ms"] + random.uniform(-1, 1) * CONFIG["jitter_ms"]) / 1000
+    sorteo = random.random()
+
+    if sorteo < CONFIG["tasa_timeout"]:
+        ESTADISTICAS["timeouts"] += 1
+        await asyncio.sleep(CONFIG["timeout_s"])
+    else:
+        await asyncio.sleep(latencia)
+
+    if sorteo < CONFIG["tasa_timeout"] + CONFIG["tasa_error"]:
+        ESTADISTICAS["errores"] += 1
+        return JSONResponse(status_code=503, content={"error": "Servicio no disponible (simulado)"})
+
+    return {
+        "estadoCuenta": {
+            "idCredito": payload.get("idCredito"),
+            "fechaCorte": payload.get("fechaCorte"),
+            "datosSaldos": _datos_saldos(int(payload.get("idCredito") or 0))
+        }
+    }
+
+
+@app.get("/_config")
+async def obtener_config():
+    return {"config": CONFIG, "estadisticas": ESTADISTICAS}
+
+
+@app.post("/_config")
+async def actualizar_config(cambios: dict):
+    """Actualiza latencia/errores sin reiniciar (solo llaves conocidas)"""
+    for llave, valor in cambios.items():
+        if llave in CONFIG:
+            CONFIG[llave] = float(valor)
+    return {"config": CONFIG}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Mock de la API de estado de cuenta")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latencia-ms", type=float, default=CONFIG["latencia_ms"], help="Latencia media por respuesta")
+    parser.add_argument("--jitter-ms", type=float, default=CONFIG["jitter_ms"], help="Variación uniforme +/- sobre la latencia")
+    parser.add_argument("--tasa-error", type=float, default=CONFIG["tasa_error"], help="Fracción de respuestas 503 (0-1)")
+    parser.add_argument("--tasa-timeout", type=float, default=CONFIG["tasa_timeout"], help="Fracción de peticiones que no responden a tiempo (0-1)")
+    parser.add_argument("--timeout-s", type=float, default=CONFIG["timeout_s"], help="Segundos que se retiene una petición con timeout")
+    args = parser.parse_args()
+
+    CONFIG.update(
+        latencia_ms=args.latencia_ms,
+        jitter_ms=args.jitter_ms,
+        tasa_error=args.tasa_error,
+        tasa_timeout=args.tasa_timeout,
+        timeout_s=args.timeout_s
+    )
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
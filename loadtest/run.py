@@ -0,0 +1,337 @@
+"""
+Pruebas de carga de la API de Condonaciones
+
+Levanta el mock de estadocuenta y la API (uvicorn) contra el MySQL local de
+docker-compose.yml, ejecuta cada endpoint a niveles fijos de concurrencia
+durante un tiempo fijo y reporta throughput y latencias p50/p95/p99 por
+endpoint. El resultado se puede guardar en JSON y compararse contra otra
+corrida para evaluar un build.
+
+Uso:
+    docker compose -f loadtest/docker-compose.yml up -d
+    python loadtest/seed.py
+    python loadtest/run.py --salida base.json
+    python loadtest/run.py --salida nuevo.json --comparar base.json
+
+    # Contra un servidor ya levantado (no inicia API ni mock)
+    python loadtest/run.py --url http://localhost:8000 --api-key ...
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import signal
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DIRECTORIO = os.path.dirname(os.path.abspath(__file__))
+
+API_KEY_PRUEBAS = "loadtest-api-key"
+
+# Tamaño de lote de los endpoints por lote
+IDS_POR_LOTE = 50
+
+
+def _ids(rnd: random.Random, args, n: int) -> List[int]:
+    return [rnd.randint(args.id_inicial, args.id_final) for _ in range(n)]
+
+
+# Endpoint -> función que arma (método, ruta, cuerpo JSON) con el generador del worker
+ESCENARIOS: Dict[str, Callable[[random.Random, argparse.Namespace], Tuple[str, str, Optional[dict]]]] = {
+    "condonaciones": lambda rnd, args: ("GET", f"/api/condonaciones/{_ids(rnd, args, 1)[0]}", None),
+    "solo-condonados": lambda rnd, args: ("GET", f"/api/condonaciones/{_ids(rnd, args, 1)[0]}/solo-condonados", None),
+    "pendientes": lambda rnd, args: ("GET", f"/api/condonaciones/{_ids(rnd, args, 1)[0]}/pendientes", None),
+    "general": lambda rnd, args: ("GET", f"/api/condonaciones/{_ids(rnd, args, 1)[0]}/general", None),
+    "general-pagina": lambda rnd, args: ("GET", f"/api/condonaciones/{_ids(rnd, args, 1)[0]}/general?limit=20", None),
+    "general-resumen": lambda rnd, args: ("GET", f"/api/condonaciones/{_ids(rnd, args, 1)[0]}/general?solo_resumen=true", None),
+    "resumen-simple": lambda rnd, args: ("GET", f"/api/condonaciones/{_ids(rnd, args, 1)[0]}/resumen-simple", None),
+    "batch": lambda rnd, args: ("POST", "/api/condonaciones/batch", {"ids_credito": _ids(rnd, args, IDS_POR_LOTE), "filtro": "todos"}),
+    "resumen-batch": lambda rnd, args: ("POST", "/api/condonaciones/resumen-simple/batch", {"ids_credito": _ids(rnd, args, IDS_POR_LOTE)})
+}
+
+
+def _argumentos() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Pruebas de carga de la API de Condonaciones")
+    parser.add_argument("--url", help="URL de una API ya levantada (omite el arranque de API y mock)")
+    parser.add_argument("--api-key", default=API_KEY_PRUEBAS)
+    parser.add_argument("--endpoints", nargs="+", default=list(ESCENARIOS), choices=list(ESCENARIOS))
+    parser.add_argument("--concurrencia", nargs="+", type=int, default=[1, 8, 32, 64], help="Niveles de concurrencia")
+    parser.add_argument("--duracion", type=float, default=15, help="Segundos medidos por endpoint y nivel")
+    parser.add_argument("--calentamiento", type=float, default=3, help="Segundos previos que no se miden")
+    parser.add_argument("--id-inicial", type=int, default=1000001, help="Primer crédito sembrado (seed.py)")
+    parser.add_argument("--id-final", type=int, default=1020000, help="Último crédito sembrado (seed.py)")
+    parser.add_argument("--semilla", type=int, default=7)
+    parser.add_argument("--salida", help="Archivo JSON con los resultados")
+    parser.add_argument("--comparar", help="Resultados JSON de otra corrida para comparar")
+
+    grupo = parser.add_argument_group("API y dependencias (cuando no se usa --url)")
+    grupo.add_argument("--puerto", type=int, default=8088)
+    grupo.add_argument("--workers", type=int, default=1, help="Procesos de uvicorn")
+    grupo.add_argument("--db-host", default=os.getenv("LOADTEST_DB_HOST", "127.0.0.1"))
+    grupo.add_argument("--db-port", default=os.getenv("LOADTEST_DB_PORT", "3307"))
+    grupo.add_argument("--db-user", default=os.getenv("LOADTEST_DB_USER", "root"))
+    grupo.add_argument("--db-password", default=os.getenv("LOADTEST_DB_PASSWORD", "loadtest"))
+    grupo.add_argument("--cache-estadocuenta", default="0", help="ESTADOCUENTA_CACHE_TTL de la API (0 = siempre llama al mock)")
+    grupo.add_argument("--mock-puerto", type=int, default=8089)
+    grupo.add_argument("--mock-latencia-ms", type=float, default=80)
+    grupo.add_argument("--mock-jitter-ms", type=float, default=40)
+    grupo.add_argument("--mock-tasa-error", type=float, default=0)
+    grupo.add_argument("--mock-tasa-timeout", type=float, default=0)
+    return parser.parse_args()
+
+
+def _percentil(ordenadas: List[float], p: float) -> float:
+    """Percentil por rango más cercano sobre una lista ordenada"""
+    if not ordenadas:
+        return 0.0
+    indice = max(0, min(len(ordenadas) - 1, int(round(p / 100 * len(ordenadas) + 0.5)) - 1))
+    return ordenadas[indice]
+
+
+async def _medir(
+    cliente: httpx.AsyncClient,
+    nombre: str,
+    concurrencia: int,
+    args: argparse.Namespace
+) -> dict:
+    """
+    Ejecuta un endpoint con `concurrencia` workers en ciclo cerrado (cada
+    worker manda la siguiente petición al recibir la respuesta anterior).
+
+    Returns:
+        Resultados del nivel: peticiones, throughput, latencias (ms) y errores
+    """
+    escenario = ESCENARIOS[nombre]
+    latencias: List[float] = []
+    errores: Dict[str, int] = {}
+    inicio_medicion = time.perf_counter() + args.calentamiento
+    fin = inicio_medicion + args.duracion
+
+    async def worker(numero: int) -> None:
+        rnd = random.Random(f"{args.semilla}-{nombre}-{concurrencia}-{numero}")
+        while True:
+            metodo, ruta, cuerpo = escenario(rnd, args)
+            inicio = time.perf_counter()
+            if inicio >= fin:
+                return
+            try:
+                resp = await cliente.request(metodo, ruta, json=cuerpo)
+                await resp.aread()
+                error = None if resp.status_code < 400 or resp.status_code == 404 else str(resp.status_code)
+            except httpx.HTTPError as e:
+                error = type(e).__name__
+            terminado = time.perf_counter()
+            if inicio < inicio_medicion:
+                continue
+            latencias.append((terminado - inicio) * 1000)
+            if error is not None:
+                errores[error] = errores.get(error, 0) + 1
+
+    await asyncio.gather(*(worker(i) for i in range(concurrencia)))
+
+    latencias.sort()
+    return {
+        "endpoint": nombre,
+        "concurrencia": concurrencia,
+        "peticiones": len(latencias),
+        "rps": round(len(latencias) / args.duracion, 1),
+        "p50_ms": round(_percentil(latencias, 50), 2),
+        "p95_ms": round(_percentil(latencias, 95), 2),
+        "p99_ms": round(_percentil(latencias, 99), 2),
+        "max_ms": round(latencias[-1], 2) if latencias else 0.0,
+        "errores": errores
+    }
+
+
+def _esperar(url: str, proceso: subprocess.Popen, timeout: float = 120) -> None:
+    """Espera a que un proceso hijo responda en `url`"""
+    limite = time.monotonic() + timeout
+    while time.monotonic() < limite:
+        if proceso.poll() is not None:
+            raise RuntimeError(f"El proceso terminó antes de responder en {url} (código {proceso.returncode})")
+        try:
+            if httpx.get(url, timeout=1).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.25)
+    raise RuntimeError(f"Sin respuesta de {url} después de {timeout} s")
+
+
+def _esperar_replica(url: str, api_key: str, timeout: float = 120) -> None:
+    """Espera a que termine la carga inicial de la réplica de segundometro (si está habilitada)"""
+    limite = time.monotonic() + timeout
+    while time.monotonic() < limite:
+        replica = httpx.get(f"{url}/health/cache", headers={"X-API-Key": api_key}, timeout=5).json().get("segundometro", {})
+        if not replica.get("habilitada") or replica.get("disponible"):
+            return
+        time.sleep(0.5)
+    print("Aviso: la réplica de segundometro no terminó de cargar; se mide sin ella", file=sys.stderr)
+
+
+def _levantar(args: argparse.Namespace) -> Tuple[str, List[subprocess.Popen]]:
+    """Inicia el mock de estadocuenta y la API; retorna la URL base y los procesos"""
+    procesos = []
+    mock = subprocess.Popen([
+        sys.executable, os.path.join(DIRECTORIO, "mock_estadocuenta.py"),
+        "--port", str(args.mock_puerto),
+        "--latencia-ms", str(args.mock_latencia_ms),
+        "--jitter-ms", str(args.mock_jitter_ms),
+        "--tasa-error", str(args.mock_tasa_error),
+        "--tasa-timeout", str(args.mock_tasa_timeout)
+    ])
+    procesos.append(mock)
+    _esperar(f"http://127.0.0.1:{args.mock_puerto}/_config", mock)
+
+    entorno = dict(
+        os.environ,
+        DB_HOST=args.db_host,
+        DB_PORT=str(args.db_port),
+        DB_USER=args.db_user,
+        DB_PASSWORD=args.db_password,
+        DB_DATABASE="db-mega-reporte",
+        DB_SEGUNDOMETRO="db-mega-reporte",
+        ESTADOCUENTA_URL=f"http://127.0.0.1:{args.mock_puerto}/estadocuenta",
+        ESTADOCUENTA_TOKEN="loadtest",
+        ESTADOCUENTA_CACHE_TTL=str(args.cache_estadocuenta),
+        API_KEYS=args.api_key,
+        # /health/cache requiere API Key de administración
+        ADMIN_API_KEYS=args.api_key,
+        # Se mide la API, no el límite por API Key
+        RATE_LIMIT_ENABLED="false"
+    )
+    api = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "main:app",
+            "--host", "127.0.0.1", "--port", str(args.puerto),
+            "--workers", str(args.workers), "--log-level", "warning", "--no-access-log"
+        ],
+        cwd=RAIZ,
+        env=entorno
+    )
+    procesos.append(api)
+    url = f"http://127.0.0.1:{args.puerto}"
+    _esperar(f"{url}/health", api)
+    return url, procesos
+
+
+def _detener(procesos: List[subprocess.Popen]) -> None:
+    for proceso in reversed(procesos):
+        if proceso.poll() is None:
+            proceso.send_signal(signal.SIGINT)
+    for proceso in reversed(procesos):
+        try:
+            proceso.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            proceso.kill()
+
+
+def _commit_actual() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ, stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _imprimir(resultados: List[dict], base: Optional[Dict[Tuple[str, int], dict]] = None) -> None:
+    encabezado = f"{'endpoint':<18}{'conc':>5}{'peticiones':>11}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}  errores"
+    if base:
+        encabezado += "   Δ req/s   Δ p95"
+    print(encabezado)
+    print("-" * len(encabezado))
+    for r in resultados:
+        errores = ", ".join(f"{k}={v}" for k, v in sorted(r["errores"].items())) or "-"
+        linea = (
+            f"{r['endpoint']:<18}{r['concurrencia']:>5}{r['peticiones']:>11}{r['rps']:>9}"
+            f"{r['p50_ms']:>9}{r['p95_ms']:>9}{r['p99_ms']:>9}{r['max_ms']:>9}  {errores}"
+        )
+        anterior = (base or {}).get((r["endpoint"], r["concurrencia"]))
+        if anterior:
+            linea += f"   {_delta(r['rps'], anterior['rps']):>7}   {_delta(r['p95_ms'], anterior['p95_ms']):>5}"
+        print(linea)
+
+
+def _delta(actual: float, anterior: float) -> str:
+    if not anterior:
+        return "n/a"
+    return f"{(actual - anterior) / anterior * 100:+.0f}%"
+
+
+async def _ejecutar(url: str, args: argparse.Namespace) -> List[dict]:
+    resultados = []
+    for nombre in args.endpoints:
+        for concurrencia in args.concurrencia:
+            limites = httpx.Limits(max_connections=concurrencia, max_keepalive_connections=concurrencia)
+            async with httpx.AsyncClient(
+                base_url=url,
+                headers={"X-API-Key": args.api_key},
+                limits=limites,
+                timeout=httpx.Timeout(60)
+            ) as cliente:
+                resultado = await _medir(cliente, nombre, concurrencia, args)
+            resultados.append(resultado)
+            print(
+                f"  {nombre} x{concurrencia}: {resultado['rps']} req/s, "
+                f"p95 {resultado['p95_ms']} ms", file=sys.stderr
+            )
+    return resultados
+
+
+def main() -> int:
+    args = _argumentos()
+    procesos: List[subprocess.Popen] = []
+    try:
+        if args.url:
+            url = args.url.rstrip("/")
+        else:
+            url, procesos = _levantar(args)
+        _esperar_replica(url, args.api_key)
+        resultados = asyncio.run(_ejecutar(url, args))
+    finally:
+        _detener(procesos)
+
+    base = None
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            base = {(r["endpoint"], r["concurrencia"]): r for r in json.load(f)["resultados"]}
+
+    print()
+    _imprimir(resultados, base)
+
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            json.dump({
+                "commit": _commit_actual(),
+                "fecha": datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "parametros": {
+                    "duracion": args.duracion,
+                    "calentamiento": args.calentamiento,
+                    "concurrencia": args.concurrencia,
+                    "workers": args.workers,
+                    "cache_estadocuenta": args.cache_estadocuenta,
+                    "mock_latencia_ms": args.mock_latencia_ms,
+                    "mock_jitter_ms": args.mock_jitter_ms,
+                    "mock_tasa_error": args.mock_tasa_error,
+                    "mock_tasa_timeout": args.mock_tasa_timeout,
+                    "url": args.url
+                },
+                "resultados": resultados
+            }, f, indent=2, ensure_ascii=False)
+        print(f"\nResultados guardados en {args.salida}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,33 @@
+-- Esquema mínimo de db-mega-reporte para pruebas de carga.
+-- Solo las columnas que consulta la API, con los mismos nombres que producción.
+
+CREATE TABLE IF NOT EXISTS tbl_segundometro_semana (
+    Id_credito INT NOT NULL,
+    Nombre_cliente VARCHAR(200),
+    Id_cliente INT,
+    Domicilio_Completo VARCHAR(300),
+    Bucket_Morosidad_Real VARCHAR(10),
+    Dias_mora INT,
+    saldo_vencido_inicio DECIMAL(14, 2),
+    KEY idx_segundometro_credito (Id_credito),
+    KEY idx_segundometro_bucket (Bucket_Morosidad_Real)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE IF NOT EXISTS gastos_cobranza (
+    id BIGINT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    Id_credito INT NOT NULL,
+    periodo_inicio DATE,
+    periodo_fin DATE,
+    SEMANA VARCHAR(10),
+    parcialidad VARCHAR(10),
+    monto_valor DECIMAL(14, 2),
+    cuota DECIMAL(14, 2),
+    condonado TINYINT,
+    fecha_condonacion DATETIME,
+    condonacion_parcial_monto DECIMAL(14, 2),
+    monto_parcial_pagado DECIMAL(14, 2),
+    estatus_pago TINYINT,
+    KEY idx_gastos_credito_periodo (Id_credito, periodo_inicio),
+    KEY idx_gastos_credito_condonado_periodo (Id_credito, condonado, periodo_inicio),
+    KEY idx_gastos_periodo (periodo_inicio)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
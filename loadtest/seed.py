@@ -0,0 +1,182 @@
+"""
+Datos sintéticos para pruebas de carga
+
+Llena tbl_segundometro_semana y gastos_cobranza de la base local
+(docker-compose.yml) con créditos reproducibles: la misma semilla genera
+siempre los mismos datos, así que las mediciones de dos builds son comparables.
+
+Los créditos van de --id-inicial a --id-inicial + --creditos - 1.
+
+Uso:
+    python loadtest/seed.py [--creditos 20000] [--gastos 52] [--semilla 42]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+import pymysql
+
+SCHEMA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "schema.sql")
+
+BUCKETS = ("B0", "B1", "B2", "B3", "B4", "B5", "B6")
+CALLES = ("Av. Juárez", "Calle Hidalgo", "Calle Morelos", "Av. Reforma", "Calle 5 de Mayo", "Av. Insurgentes")
+NOMBRES = ("María", "José", "Juan", "Guadalupe", "Francisco", "Ana", "Luis", "Carmen", "Pedro", "Rosa")
+APELLIDOS = ("Hernández", "García", "Martínez", "López", "González", "Pérez", "Rodríguez", "Sánchez", "Ramírez")
+
+# Filas por INSERT de varios valores
+LOTE_INSERT = 2000
+
+INSERT_SEGUNDOMETRO = """
+    INSERT INTO tbl_segundometro_semana (
+        Id_credito, Nombre_cliente, Id_cliente, Domicilio_Completo,
+        Bucket_Morosidad_Real, Dias_mora, saldo_vencido_inicio
+    ) VALUES (%s, %s, %s, %s, %s, %s, %s)
+"""
+
+INSERT_GASTOS = """
+    INSERT INTO gastos_cobranza (
+        Id_credito, periodo_inicio, periodo_fin, SEMANA, parcialidad, monto_valor, cuota,
+        condonado, fecha_condonacion, condonacion_parcial_monto, monto_parcial_pagado, estatus_pago
+    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+"""
+
+
+def _argumentos() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Genera datos sintéticos para pruebas de carga")
+    parser.add_argument("--host", default=os.getenv("LOADTEST_DB_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("LOADTEST_DB_PORT", "3307")))
+    parser.add_argument("--user", default=os.getenv("LOADTEST_DB_USER", "root"))
+    parser.add_argument("--password", default=os.getenv("LOADTEST_DB_PASSWORD", "loadtest"))
+    parser.add_argument("--database", default=os.getenv("LOADTEST_DB_DATABASE", "db-mega-reporte"))
+    parser.add_argument("--creditos", type=int, default=20000, help="Créditos a generar")
+    parser.add_argument("--gastos", type=int, default=52, help="Máximo de gastos (semanas) por crédito")
+    parser.add_argument("--id-inicial", type=int, default=1000001, help="Primer Id_credito")
+    parser.add_argument("--semilla", type=int, default=42)
+    return parser.parse_args()
+
+
+def _conectar(args: argparse.Namespace, database=None):
+    return pymysql.connect(
+        host=args.host,
+        port=args.port,
+        user=args.user,
+        password=args.password,
+        database=database,
+        charset="utf8mb4",
+        autocommit=False
+    )
+
+
+def _crear_esquema(args: argparse.Namespace) -> None:
+    """Crea la base y las tablas si no existen (el contenedor ya las crea al iniciar)"""
+    conn = _conectar(args)
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(f"CREATE DATABASE IF NOT EXISTS `{args.database}` CHARACTER SET utf8mb4")
+            cursor.execute(f"USE `{args.database}`")
+            with open(SCHEMA, encoding="utf-8") as f:
+                for sentencia in f.read().split(";"):
+                    lineas = [l for l in sentencia.splitlines() if not l.strip().startswith("--")]
+                    if "".join(lineas).strip():
+                        cursor.execute("\n".join(lineas))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _filas_credito(rnd: random.Random, id_credito: int, max_gastos: int, hoy: date):
+    """Encabezado y gastos de un crédito"""
+    nombre = f"{rnd.choice(NOMBRES)} {rnd.choice(APELLIDOS)} {rnd.choice(APELLIDOS)}"
+    domicilio = f"{rnd.choice(CALLES)} #{rnd.randint(1, 999)}, Col. Centro"
+    encabezado = (
+        id_credito,
+        nombre,
+        id_credito * 3 + 7,
+        domicilio,
+        rnd.choice(BUCKETS),
+        rnd.randint(0, 180),
+        round(rnd.uniform(0, 25000), 2)
+    )
+
+    gastos = []
+    # Un gasto por semana; algunos créditos no tienen gastos
+    total = rnd.randint(0, max_gastos)
+    inicio = hoy - timedelta(weeks=total)
+    for semana in range(total):
+        periodo_inicio = inicio + timedelta(weeks=semana)
+        condonado = 1 if rnd.random() < 0.3 else 0
+        fecha_condonacion = None
+        if condonado:
+            dia = periodo_inicio + timedelta(days=rnd.randint(7, 30))
+            fecha_condonacion = datetime(dia.year, dia.month, dia.day) + timedelta(seconds=rnd.randint(0, 86399))
+        pagado = rnd.random() < 0.2
+        gastos.append((
+            id_credito,
+            periodo_inicio,
+            periodo_inicio + timedelta(days=6),
+            periodo_inicio.strftime("%Y-%W"),
+            f"{semana + 1}/{total}",
+            250.00,
+            round(rnd.uniform(150, 1500), 2),
+            condonado,
+            fecha_condonacion,
+            round(rnd.uniform(0, 100), 2) if rnd.random() < 0.05 else None,
+            round(rnd.uniform(0, 250), 2) if rnd.random() < 0.1 else None,
+            2 if pagado else rnd.choice((None, 0, 1))
+        ))
+    return encabezado, gastos
+
+
+def _insertar(cursor, sentencia: str, filas: list) -> None:
+    for inicio in range(0, len(filas), LOTE_INSERT):
+        cursor.executemany(sentencia, filas[inicio:inicio + LOTE_INSERT])
+
+
+def main() -> int:
+    args = _argumentos()
+    _crear_esquema(args)
+
+    rnd = random.Random(args.semilla)
+    # Fecha fija para que los datos no dependan del día en que se generan
+    hoy = date(2026, 1, 5)
+
+    inicio = time.perf_counter()
+    conn = _conectar(args, args.database)
+    total_gastos = 0
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("TRUNCATE TABLE tbl_segundometro_semana")
+            cursor.execute("TRUNCATE TABLE gastos_cobranza")
+
+            encabezados, gastos = [], []
+            for id_credito in range(args.id_inicial, args.id_inicial + args.creditos):
+                encabezado, filas = _filas_credito(rnd, id_credito, args.gastos, hoy)
+                encabezados.append(encabezado)
+                gastos.extend(filas)
+                if len(gastos) >= LOTE_INSERT * 10:
+                    _insertar(cursor, INSERT_GASTOS, gastos)
+                    total_gastos += len(gastos)
+                    gastos = []
+
+            _insertar(cursor, INSERT_GASTOS, gastos)
+            total_gastos += len(gastos)
+            _insertar(cursor, INSERT_SEGUNDOMETRO, encabezados)
+            cursor.execute("ANALYZE TABLE tbl_segundometro_semana, gastos_cobranza")
+            cursor.fetchall()
+        conn.commit()
+    finally:
+        conn.close()
+
+    print(
+        f"{args.creditos} créditos ({args.id_inicial}..{args.id_inicial + args.creditos - 1}) y "
+        f"{total_gastos} gastos en {time.perf_counter() - inicio:.1f} s"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
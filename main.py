@@ -3,21 +3,120 @@ API Principal para Condonaciones
 FastAPI application para gestión de condonaciones de crédito
 """
 
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Security
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.exceptions import RequestValidationError
-from fastapi.responses import JSONResponse
-from typing import Optional
+from fastapi.responses import JSONResponse, PlainTextResponse
+from contextlib import asynccontextmanager, suppress
+import asyncio
 import uvicorn
 
 from routers import condonaciones
-from config.database import get_db
+from config.database import init_pools, close_pools, pool_stats, run_db, shutdown_db_executor
+from config.http_client import HttpClientConfig, init_http_client, calentar_http_client, close_http_client, http_client_stats
+from config.security import verify_admin_api_key, uso_api_keys
+from services.estadocuenta import EstadoCuentaConfig, cache_stats, estadocuenta_stats
+from repositories.condonaciones import verificar_esquema
+from repositories.segundometro import SegundometroConfig, replica_segundometro
+from repositories.resumen_credito import RollupConfig, rollup_resumen
+from repositories.indices import IndicesConfig, asesor_indices, consultas_endpoints
+from repositories.statements import sql
+from utils.singleflight import coalescedor
+from utils.metricas import MetricasConfig, MetricasMiddleware, registro
+from utils.tiempos import TiemposConfig, ServerTimingMiddleware
+from utils.arranque import ArranqueConfig, arranque
+
+
+def _armar_sentencias() -> None:
+    """Llena la caché de sql() con cada variante que usan los endpoints"""
+    for nombre, variantes, _, _ in consultas_endpoints(0):
+        sql(nombre, **variantes)
+
+
+# Pasos sin los que el worker no puede atender peticiones: si fallan,
+# /health/ready sigue en 503 y se reintentan en segundo plano
+PASOS_REQUERIDOS = {
+    "mysql": init_pools,
+    "sentencias": _armar_sentencias,
+    "esquema": verificar_esquema
+}
+
+
+async def _paso_requerido(nombre: str) -> None:
+    async with arranque.paso(nombre, requerido=True):
+        await run_db(PASOS_REQUERIDOS[nombre])
+
+
+async def _calentar() -> None:
+    """
+    Calentamiento posterior a las conexiones: arma el texto SQL de las
+    sentencias de los endpoints, verifica las columnas requeridas, carga
+    la réplica de tbl_segundometro_semana, aplica la primera ronda del rollup
+    y revisa los índices. Los pasos requeridos que fallaron (incluido `mysql`
+    del lifespan) se reintentan cada WARMUP_RETRY_INTERVAL segundos; cuando
+    todos pasan /health/ready responde 200.
+    """
+    await _paso_requerido("sentencias")
+    await _paso_requerido("esquema")
+    if SegundometroConfig.ENABLED:
+        async with arranque.paso("segundometro"):
+            await run_db(replica_segundometro.cargar)
+    if RollupConfig.ENABLED:
+        async with arranque.paso("resumen_rollup"):
+            await run_db(rollup_resumen.aplicar_cambios)
+    if IndicesConfig.ENABLED:
+        async with arranque.paso("indices"):
+            await asesor_indices.revisar_al_iniciar()
+    while arranque.fallidos:
+        await asyncio.sleep(ArranqueConfig.REINTENTO)
+        arranque.reintentos += 1
+        # En el orden de PASOS_REQUERIDOS: el esquema necesita las conexiones
+        for nombre in [paso for paso in PASOS_REQUERIDOS if paso in arranque.fallidos]:
+            await _paso_requerido(nombre)
+    arranque.marcar_listo()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Ciclo de vida de la aplicación: abre los pools de conexiones y el cliente
+    HTTP compartido, calienta las cachés (réplica de tbl_segundometro_semana,
+    rollup de resumen_gastos_credito, texto SQL) y arranca sus tareas de
+    refresco; al apagar las detiene y cierra las conexiones
+    """
+    # Cada worker abre sus conexiones antes de empezar a aceptar peticiones
+    await _paso_requerido("mysql")
+    await init_http_client()
+    if HttpClientConfig.WARMUP:
+        async with arranque.paso("estadocuenta"):
+            await calentar_http_client(EstadoCuentaConfig.URL)
+    
+    tareas = [asyncio.create_task(_calentar())]
+    if ArranqueConfig.ESPERAR:
+        # Sin timeout agotado el worker no acepta peticiones hasta estar caliente
+        await asyncio.wait(tareas, timeout=ArranqueConfig.TIMEOUT)
+    if SegundometroConfig.ENABLED:
+        tareas.append(asyncio.create_task(replica_segundometro.refrescar_periodicamente()))
+    if RollupConfig.ENABLED:
+        tareas.append(asyncio.create_task(rollup_resumen.refrescar_periodicamente()))
+    try:
+        yield
+    finally:
+        for tarea in tareas:
+            tarea.cancel()
+            with suppress(asyncio.CancelledError):
+                await tarea
+        await close_http_client()
+        shutdown_db_executor()
+        close_pools()
+
 
 # Crear instancia de FastAPI
 app = FastAPI(
     title="API Condonaciones Sparta Ledger",
     description="API para gestión de condonaciones de crédito",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Configurar CORS
@@ -27,16 +126,27 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Server-Timing"],
 )
 
+# Desglose de tiempos por fase en el header Server-Timing (SERVER_TIMING_ENABLED)
+if TiemposConfig.ENABLED:
+    app.add_middleware(ServerTimingMiddleware)
+
+# Latencia por ruta y peticiones en vuelo (envuelve a CORS, así que también lo mide)
+if MetricasConfig.ENABLED:
+    app.add_middleware(MetricasMiddleware)
+
 
 # Diccionario de mensajes HTTP estándar
 HTTP_STATUS_MESSAGES = {
     200: "OK",
     400: "Bad Request",
     401: "Unauthorized",
+    403: "Forbidden",
     404: "Not Found",
     422: "Unprocessable Entity",
+    429: "Too Many Requests",
     500: "Internal Server Error"
 }
 
@@ -54,7 +164,9 @@ async def http_exception_handler(request, exc: HTTPException):
             "status_message": HTTP_STATUS_MESSAGES.get(exc.status_code, "Error"),
             "success": False,
             "mensaje": exc.detail
-        }
+        },
+        # Retry-After (429) y demás headers del error
+        headers=getattr(exc, "headers", None)
     )
 
 
@@ -141,6 +253,179 @@ async def health_check():
     }
 
 
+@app.get("/health/ready")
+async def health_ready():
+    """
+    Disponibilidad para recibir tráfico: 503 mientras el worker se calienta,
+    mientras un paso requerido del arranque (mysql, sentencias, esquema) siga
+    fallando o si un requisito de índices no se cumple (usar como
+    startup/readiness probe)
+    """
+    motivos = []
+    if arranque.fallidos:
+        motivos.append(f"Pasos requeridos fallidos (reintentando): {', '.join(sorted(arranque.fallidos))}")
+    elif not arranque.listo:
+        motivos.append("Calentamiento en curso")
+    listo, motivo = asesor_indices.listo()
+    if not listo:
+        motivos.append(motivo)
+    if motivos:
+        return JSONResponse(
+            status_code=503,
+            content={"status": "no_listo", "motivos": motivos, "arranque": arranque.stats()}
+        )
+    return {"status": "ok", "arranque": arranque.stats()}
+
+
+@app.get("/health/indices")
+async def health_indices(api_key: str = Security(verify_admin_api_key)):
+    """Último diagnóstico de índices (EXPLAIN de las consultas de los endpoints; requiere API Key de administración)"""
+    return {
+        "status": "ok",
+        "indices": asesor_indices.stats()
+    }
+
+
+@app.get("/health/pools")
+async def health_pools(api_key: str = Security(verify_admin_api_key)):
+    """Estadísticas de los pools de conexiones a base de datos (requiere API Key de administración)"""
+    return {
+        "status": "ok",
+        "pools": pool_stats()
+    }
+
+
+@app.get("/health/http-client")
+async def health_http_client(api_key: str = Security(verify_admin_api_key)):
+    """Estadísticas del cliente HTTP compartido (requiere API Key de administración)"""
+    return {
+        "status": "ok",
+        "http_client": http_client_stats()
+    }
+
+
+@app.get("/health/estadocuenta")
+async def health_estadocuenta(api_key: str = Security(verify_admin_api_key)):
+    """Circuit breaker y peticiones de cobertura de la API de estado de cuenta (requiere API Key de administración)"""
+    return {
+        "status": "ok",
+        "estadocuenta": estadocuenta_stats()
+    }
+
+
+@app.get("/health/api-keys")
+async def health_api_keys(api_key: str = Security(verify_admin_api_key)):
+    """Límites y uso por API Key (requiere API Key de administración)"""
+    return {
+        "status": "ok",
+        "api_keys": uso_api_keys()
+    }
+
+
+@app.get("/health/cache")
+async def health_cache(api_key: str = Security(verify_admin_api_key)):
+    """Estadísticas de cachés, réplica de segundometro, rollup de resumen y coalescencia (requiere API Key de administración)"""
+    return {
+        "status": "ok",
+        "estadocuenta": cache_stats(),
+        "segundometro": replica_segundometro.stats(),
+        "resumen_rollup": rollup_resumen.stats(),
+        "singleflight": coalescedor.stats()
+    }
+
+
+def _metricas_estado():
+    """
+    Colector de /metrics: expone las estadísticas de pools, cachés, cliente
+    HTTP y coalescencia que ya calculan sus módulos.
+    """
+    pools = pool_stats()
+    for campo, tipo, ayuda in (
+        ("abiertas", "gauge", "Conexiones abiertas (en uso + ociosas)"),
+        ("en_uso", "gauge", "Conexiones prestadas"),
+        ("ociosas", "gauge", "Conexiones ociosas en el pool"),
+        ("esperas", "counter", "Veces que se esperó por una conexión libre"),
+        ("timeouts", "counter", "Esperas que agotaron DB_POOL_ACQUIRE_TIMEOUT"),
+        ("creadas", "counter", "Conexiones físicas abiertas"),
+    ):
+        sufijo = "_total" if tipo == "counter" else ""
+        yield (
+            f"condonaciones_db_pool_{campo}{sufijo}", tipo, ayuda,
+            [({"database": db}, stats[campo]) for db, stats in pools.items()]
+        )
+
+    estadocuenta = cache_stats()
+    caches = {"estadocuenta": estadocuenta, "estadocuenta_respaldo": estadocuenta["respaldo"]}
+    for campo, tipo, ayuda in (
+        ("entradas", "gauge", "Entradas en caché"),
+        ("bytes", "gauge", "Memoria aproximada de la caché"),
+        ("hits", "counter", "Consultas resueltas desde la caché"),
+        ("misses", "counter", "Consultas que no estaban en caché"),
+        ("evictions", "counter", "Entradas desalojadas por LRU"),
+    ):
+        sufijo = "_total" if tipo == "counter" else ""
+        yield (
+            f"condonaciones_cache_{campo}{sufijo}", tipo, ayuda,
+            [({"cache": nombre}, stats[campo]) for nombre, stats in caches.items()]
+        )
+
+    cliente = http_client_stats()
+    yield ("condonaciones_http_client_requests_total", "counter", "Peticiones del cliente HTTP compartido", [({}, cliente["peticiones"])])
+    yield ("condonaciones_http_client_new_connections_total", "counter", "Conexiones TCP nuevas del cliente HTTP compartido", [({}, cliente["conexiones_nuevas"])])
+
+    externa = estadocuenta_stats()
+    circuito = externa["circuito"]
+    estados = {"cerrado": 0, "semi_abierto": 1, "abierto": 2}
+    yield ("condonaciones_estadocuenta_circuit_state", "gauge", "Estado del circuit breaker (0 cerrado, 1 semi-abierto, 2 abierto)", [({}, estados[circuito["estado"]])])
+    yield ("condonaciones_estadocuenta_circuit_opens_total", "counter", "Veces que se abrió el circuito", [({}, circuito["aperturas"])])
+    yield ("condonaciones_estadocuenta_circuit_rejected_total", "counter", "Llamadas rechazadas con el circuito abierto", [({}, circuito["rechazadas"])])
+    yield ("condonaciones_estadocuenta_hedges_total", "counter", "Peticiones de cobertura lanzadas", [({}, externa["cobertura"]["lanzadas"])])
+    yield ("condonaciones_estadocuenta_hedges_won_total", "counter", "Peticiones de cobertura que respondieron primero", [({}, externa["cobertura"]["ganadoras"])])
+
+    claves = uso_api_keys()
+    for campo, ayuda in (
+        ("peticiones", "Peticiones autenticadas por API Key"),
+        ("rechazadas_limite", "Peticiones rechazadas por límite de peticiones por segundo"),
+        ("rechazadas_cuota", "Peticiones rechazadas por cuota diaria agotada"),
+    ):
+        yield (
+            f"condonaciones_api_key_{campo}_total", "counter", ayuda,
+            [({"clave": uso["clave"]}, uso[campo]) for uso in claves]
+        )
+
+    replica = replica_segundometro.stats()
+    yield ("condonaciones_segundometro_replica_creditos", "gauge", "Créditos cargados en la réplica en memoria", [({}, replica["creditos"])])
+    yield ("condonaciones_segundometro_replica_disponible", "gauge", "1 si la réplica de segundometro está cargada", [({}, int(replica["disponible"]))])
+
+    rollup = rollup_resumen.stats()
+    yield ("condonaciones_resumen_rollup_disponible", "gauge", "1 si el rollup de resumen_gastos_credito está en uso", [({}, int(rollup["disponible"]))])
+    yield ("condonaciones_resumen_rollup_cambios_pendientes", "gauge", "Cambios de gastos_cobranza sin aplicar al rollup (última ronda)", [({}, rollup["cambios_pendientes"])])
+    yield ("condonaciones_resumen_rollup_cambios_aplicados_total", "counter", "Cambios aplicados al rollup por esta instancia", [({}, rollup["cambios_aplicados"])])
+    yield ("condonaciones_resumen_rollup_respaldos_total", "counter", "Lecturas que usaron el agregado en vivo por cambios sin aplicar", [({}, rollup["respaldos_en_vivo"])])
+
+    estado_arranque = arranque.stats()
+    yield ("condonaciones_arranque_listo", "gauge", "1 si el worker terminó el calentamiento de arranque", [({}, int(estado_arranque["listo"]))])
+    yield (
+        "condonaciones_arranque_paso_segundos", "gauge", "Duración de cada paso del calentamiento de arranque",
+        [({"paso": paso["paso"]}, paso["segundos"]) for paso in estado_arranque["pasos"]]
+    )
+
+    vuelos = coalescedor.stats()
+    yield ("condonaciones_singleflight_en_vuelo", "gauge", "Operaciones coalescidas en curso", [({}, vuelos["en_vuelo"])])
+    yield ("condonaciones_singleflight_coalescidas_total", "counter", "Llamadas que reutilizaron una ejecución en vuelo", [({}, vuelos["coalescidas"])])
+
+
+registro.colector(_metricas_estado)
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics(api_key: str = Security(verify_admin_api_key)):
+    """Métricas en formato de Prometheus (requiere API Key de administración)"""
+    if not MetricasConfig.ENABLED:
+        raise HTTPException(status_code=404, detail="Métricas deshabilitadas")
+    return PlainTextResponse(registro.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 if __name__ == "__main__":
     uvicorn.run(
         "main:app",
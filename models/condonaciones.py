@@ -3,7 +3,7 @@ Modelos Pydantic para Condonaciones
 """
 
 from pydantic import BaseModel, Field
-from typing import List, Optional, Union
+from typing import List, Literal, Optional, Union
 from datetime import datetime, date
 
 
@@ -226,6 +226,81 @@ class ResponseGeneral(BaseModel):
         }
 
 
+# ─── Consulta por lote ────────────────────────────────────────────────────────
+
+class BatchCondonacionRequest(BaseModel):
+    """Modelo de petición para consultar varios créditos en una sola llamada"""
+    
+    ids_credito: List[int] = Field(..., min_length=1, description="Lista de IDs de crédito a consultar")
+    filtro: Literal["condonados", "pendientes", "todos"] = Field(
+        "condonados",
+        description="Gastos a incluir: condonados (default), pendientes o todos"
+    )
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "ids_credito": [12345, 67890, 1600],
+                "filtro": "condonados"
+            }
+        }
+
+
+class ResultadoCreditoBatch(BaseModel):
+    """Resultado (o error) de un crédito dentro de una consulta por lote"""
+    
+    id_credito: int = Field(..., description="ID del crédito")
+    status_code: int = Field(200, description="Código HTTP equivalente para este crédito")
+    success: bool = Field(True, description="Indica si el crédito se resolvió correctamente")
+    mensaje: str = Field("", description="Mensaje de resultado o de error")
+    datos_generales: Optional[DatosGenerales] = Field(None, description="Datos generales del cliente")
+    condonacion_cobranza: Optional[CondonacionCobranza] = Field(None, description="Detalles de condonación")
+
+
+class BatchCondonacionResponse(BaseModel):
+    """Modelo de respuesta para la consulta por lote"""
+    
+    status_code: int = Field(200, description="Código HTTP de respuesta")
+    status_message: str = Field("OK", description="Significado del código HTTP")
+    success: bool = Field(True, description="Indica si la operación fue exitosa")
+    mensaje: str = Field("", description="Mensaje de respuesta")
+    total_solicitados: int = Field(..., description="Créditos distintos solicitados")
+    total_exitosos: int = Field(..., description="Créditos resueltos correctamente")
+    total_errores: int = Field(..., description="Créditos con error (ID inválido o no encontrado)")
+    resultados: List[ResultadoCreditoBatch] = Field(..., description="Resultado por crédito, en el orden solicitado")
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "status_code": 200,
+                "status_message": "OK",
+                "success": True,
+                "mensaje": "Se procesaron 2 créditos: 1 exitosos, 1 con error",
+                "total_solicitados": 2,
+                "total_exitosos": 1,
+                "total_errores": 1,
+                "resultados": [
+                    {
+                        "id_credito": 12345,
+                        "status_code": 200,
+                        "success": True,
+                        "mensaje": "Se encontraron 1 gastos condonados",
+                        "datos_generales": {"id_credito": 12345, "nombre_cliente": "Juan Pérez García"},
+                        "condonacion_cobranza": {"detalle": []}
+                    },
+                    {
+                        "id_credito": 99999,
+                        "status_code": 404,
+                        "success": False,
+                        "mensaje": "No se encontró información del crédito 99999. Verifica que el ID sea correcto.",
+                        "datos_generales": None,
+                        "condonacion_cobranza": None
+                    }
+                ]
+            }
+        }
+
+
 # ─── ResumenSimple ────────────────────────────────────────────────────────────
 
 class ResumenSimpleResponse(BaseModel):
@@ -248,6 +323,10 @@ class ResumenSimpleResponse(BaseModel):
     total_a_pagar: float = Field(..., description="saldoTotalVencido + cargo_pago_tardio (250)")
     bandera: int = Field(..., description="0 = sin datos (total_cargos_pagos_tardio es 0), 1 = tiene datos")
 
+    # ── Vigencia de los datos de la API externa ──
+    saldo_desactualizado: bool = Field(False, description="True si los datos de la API externa vienen de una consulta anterior")
+    antiguedad_saldo_segundos: Optional[int] = Field(None, description="Segundos desde que se obtuvieron los datos de la API externa (solo si están desactualizados)")
+
     class Config:
         json_schema_extra = {
             "example": {
@@ -259,6 +338,31 @@ class ResumenSimpleResponse(BaseModel):
                 "saldo_vencido_credito": 672.82,
                 "numero_cuotas_credito": 1,
                 "total_a_pagar": 922.82,
-                "bandera": 1
+                "bandera": 1,
+                "saldo_desactualizado": False,
+                "antiguedad_saldo_segundos": None
             }
-        }
\ No newline at end of file
+        }
+
+
+class BatchResumenSimpleRequest(BaseModel):
+    """Modelo de petición para el resumen simple de varios créditos"""
+    
+    ids_credito: List[int] = Field(..., min_length=1, description="Lista de IDs de crédito a consultar")
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "ids_credito": [1600, 12345, 67890]
+            }
+        }
+
+
+class ErrorCreditoBatch(BaseModel):
+    """Error de un crédito individual dentro de una respuesta por lote en streaming"""
+    
+    status_code: int = Field(..., description="Código HTTP equivalente para este crédito")
+    status_message: str = Field(..., description="Significado del código HTTP")
+    success: bool = Field(False, description="Siempre False")
+    id_credito: int = Field(..., description="ID del crédito")
+    mensaje: str = Field(..., description="Detalle del error")
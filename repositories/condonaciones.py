@@ -0,0 +1,520 @@
+"""
+Repositorio de Condonaciones
+Consultas a tbl_segundometro_semana y gastos_cobranza en un solo viaje a la base de datos.
+Cuando la réplica en memoria de tbl_segundometro_semana está cargada, los datos
+generales y la existencia del crédito se resuelven sin consultar MySQL, y con
+el rollup por crédito activo los totales del resumen simple se leen de
+resumen_gastos_credito.
+
+Todas las sentencias vienen del catálogo (repositories.statements).
+"""
+
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple
+import pymysql
+import os
+import threading
+from dotenv import load_dotenv
+
+from config.database import get_db_connection, get_pool
+from repositories.mappers import COLUMNAS_DATOS_GENERALES
+from repositories.resumen_credito import rollup_resumen
+from repositories.segundometro import replica_segundometro
+from repositories.statements import FILTROS_CONDONADO, ejecutar
+
+load_dotenv()
+
+DATABASE = "db-mega-reporte"
+
+# Máximo de IDs por sentencia IN (...) en consultas por lote
+BATCH_CHUNK_SIZE = int(os.getenv("BATCH_CHUNK_SIZE", "500"))
+
+# Filas leídas del cursor sin búfer por cada bloque de la exportación
+EXPORT_FETCH_SIZE = int(os.getenv("EXPORT_FETCH_SIZE", "2000"))
+# Segundos que MySQL espera a que el cliente consuma filas durante una exportación
+EXPORT_NET_WRITE_TIMEOUT = int(os.getenv("EXPORT_NET_WRITE_TIMEOUT", "600"))
+# Exportaciones simultáneas por proceso. Cada una retiene una conexión del pool
+# durante toda la descarga, así que debe quedar muy por debajo de DB_POOL_MAX_SIZE
+EXPORT_MAX_CONCURRENT = int(os.getenv("EXPORT_MAX_CONCURRENT", "2"))
+
+_cupos_exportacion = threading.BoundedSemaphore(max(1, EXPORT_MAX_CONCURRENT))
+
+# Las consultas de detalle usan cursores de tuplas; el detalle empieza después
+# del encabezado (y de los conteos en la página general) y de gasto_id_credito
+# (gasto_id en la página general)
+_INICIO_DETALLE_CREDITO = len(COLUMNAS_DATOS_GENERALES) + 1
+_INICIO_DETALLE_PAGINA = len(COLUMNAS_DATOS_GENERALES) + 3
+_INICIO_DETALLE_LOTE = 1
+
+# Columnas que las consultas necesitan además de las del esquema original.
+# gastos_cobranza.id desempata la paginación por llave de la página general,
+# así que debe ser única (llave primaria, como en loadtest/schema.sql).
+COLUMNAS_REQUERIDAS = {
+    "gastos_cobranza": ("id",)
+}
+
+_RESUMEN_VACIO = {
+    "total_parcialidades": 0,
+    "monto_total": 0,
+    "condonados": 0,
+    "pendientes": 0
+}
+
+
+def _en_bloques(ids: List[int], tamano: int) -> Iterable[List[int]]:
+    tamano = max(1, tamano)
+    for inicio in range(0, len(ids), tamano):
+        yield ids[inicio:inicio + tamano]
+
+
+def _consultar(nombre: str, params=(), tuplas: bool = False, **variantes) -> list:
+    """
+    Ejecuta una sentencia del catálogo con una conexión del pool y retorna
+    todas sus filas (bloqueante).
+    
+    Args:
+        nombre: Nombre de la sentencia en el catálogo
+        params: Parámetros de la sentencia
+        tuplas: Si es True usa un cursor de tuplas en lugar de DictCursor
+        **variantes: Variantes de la sentencia (filtro, incluir_status, ...)
+    
+    Returns:
+        Lista de filas
+    """
+    with get_db_connection(database=DATABASE) as conn:
+        with conn.cursor(pymysql.cursors.Cursor if tuplas else None) as cursor:
+            ejecutar(cursor, nombre, params, **variantes)
+            return list(cursor.fetchall())
+
+
+class EsquemaIncompletoError(Exception):
+    """Faltan columnas de COLUMNAS_REQUERIDAS (o no son únicas)"""
+
+
+def verificar_esquema() -> None:
+    """
+    Revisa en information_schema que existan las COLUMNAS_REQUERIDAS y que
+    sean llave primaria o única (bloqueante, usar con run_db). Se ejecuta al
+    iniciar la aplicación para que un esquema distinto al esperado se detecte
+    ahí y no como un error 500 en la primera página.
+    
+    Raises:
+        EsquemaIncompletoError: Con las columnas faltantes
+    """
+    tablas = sorted(COLUMNAS_REQUERIDAS)
+    rows = _consultar("columnas_existentes", tablas, marcadores=len(tablas))
+    existentes = {
+        (row["tabla"].lower(), row["columna"].lower()): row["llave"]
+        for row in rows
+    }
+    faltantes = [
+        f"{tabla}.{columna}"
+        for tabla in tablas
+        for columna in COLUMNAS_REQUERIDAS[tabla]
+        if existentes.get((tabla.lower(), columna.lower())) not in ("PRI", "UNI")
+    ]
+    if faltantes:
+        raise EsquemaIncompletoError(
+            f"Faltan columnas únicas en '{DATABASE}': {', '.join(faltantes)}. "
+            "La paginación de /general desempata por gastos_cobranza.id; "
+            "agrega la llave primaria como en loadtest/schema.sql"
+        )
+
+
+def obtener_credito_con_gastos(
+    id_credito: int,
+    filtro: str = "todos",
+    incluir_status: bool = False
+) -> Tuple[Optional[dict], List[tuple]]:
+    """
+    Obtiene los datos generales del cliente y el detalle de gastos de cobranza
+    con una sola conexión y una sola consulta (bloqueante, usar con run_db).
+    
+    Args:
+        id_credito: ID del crédito a consultar
+        filtro: 'condonados', 'pendientes' o 'todos'
+        incluir_status: Si es True agrega la columna status (CONDONADO/PENDIENTE)
+    
+    Returns:
+        Tupla (datos generales o None si el crédito no existe, filas de detalle
+        como tuplas en el orden de COLUMNAS_DETALLE + status si se pidió)
+    """
+    if replica_segundometro.disponible():
+        datos_generales = replica_segundometro.obtener(id_credito)
+        if datos_generales is None:
+            return None, []
+        # El encabezado ya se conoce: solo se leen los gastos
+        rows = _consultar(
+            "gastos_lote", (id_credito,), tuplas=True,
+            filtro=filtro, incluir_status=incluir_status
+        )
+        return datos_generales, [row[_INICIO_DETALLE_LOTE:] for row in rows]
+    
+    rows = _consultar(
+        "credito_con_gastos", (id_credito,), tuplas=True,
+        filtro=filtro, incluir_status=incluir_status
+    )
+    if not rows:
+        return None, []
+    
+    datos_generales = dict(zip(COLUMNAS_DATOS_GENERALES, rows[0]))
+    detalles = [
+        row[_INICIO_DETALLE_CREDITO:]
+        for row in rows
+        if row[_INICIO_DETALLE_CREDITO - 1] is not None
+    ]
+    return datos_generales, detalles
+
+
+def obtener_pagina_general(
+    id_credito: int,
+    limite: int,
+    despues_de: Optional[Tuple[Optional[date], int]] = None
+) -> Tuple[Optional[dict], List[tuple], dict, bool, Optional[Tuple[Optional[date], int]]]:
+    """
+    Obtiene una página del detalle de gastos (con status) ordenada por
+    periodo_inicio e id, junto con los datos generales y el resumen completo
+    del crédito, en una sola consulta (bloqueante, usar con run_db).
+    
+    La paginación es por llave sobre (periodo_inicio, id): el id desempata los
+    gastos con el mismo periodo_inicio y los periodos NULL van primero, como
+    los ordena MySQL.
+    
+    Args:
+        id_credito: ID del crédito a consultar
+        limite: Máximo de filas de detalle en la página
+        despues_de: Llave (periodo_inicio, id) de la última fila de la página anterior
+    
+    Returns:
+        Tupla (datos generales o None, filas de detalle como tuplas en el orden
+        de COLUMNAS_DETALLE + status, resumen, hay_mas, llave de la última
+        fila si hay_mas)
+    """
+    if replica_segundometro.disponible() and not replica_segundometro.existe(id_credito):
+        return None, [], {}, False, None
+    
+    params = [id_credito, id_credito, id_credito]
+    if despues_de is not None:
+        periodo, id_gasto = despues_de
+        params += [periodo, periodo, id_gasto, periodo]
+    # Se pide una fila extra para saber si existe otra página
+    params.append(limite + 1)
+    
+    rows = _consultar(
+        "pagina_general", params, tuplas=True,
+        incluir_status=True, con_cursor=despues_de is not None
+    )
+    if not rows:
+        return None, [], {}, False, None
+    
+    primera = rows[0]
+    datos_generales = dict(zip(COLUMNAS_DATOS_GENERALES, primera))
+    total_registros = int(primera[_INICIO_DETALLE_PAGINA - 3] or 0)
+    condonados = int(primera[_INICIO_DETALLE_PAGINA - 2] or 0)
+    resumen = {
+        "total_registros": total_registros,
+        "condonados": condonados,
+        "pendientes": total_registros - condonados
+    }
+    # gasto_id es NULL en la fila del LEFT JOIN sin gastos
+    pagina = [row for row in rows if row[_INICIO_DETALLE_PAGINA - 1] is not None]
+    hay_mas = len(pagina) > limite
+    pagina = pagina[:limite]
+    llave_siguiente = None
+    if hay_mas:
+        ultima = pagina[-1]
+        # periodoinicio es la primera columna del detalle
+        llave_siguiente = (ultima[_INICIO_DETALLE_PAGINA], ultima[_INICIO_DETALLE_PAGINA - 1])
+    detalles = [row[_INICIO_DETALLE_PAGINA:] for row in pagina]
+    return datos_generales, detalles, resumen, hay_mas, llave_siguiente
+
+
+def obtener_resumen_simple(id_credito: int) -> Optional[dict]:
+    """
+    Valida que el crédito existe y obtiene los totales de gastos_cobranza
+    en una sola consulta (bloqueante, usar con run_db).
+    
+    Args:
+        id_credito: ID del crédito a consultar
+    
+    Returns:
+        Fila con total_parcialidades, monto_total, condonados y pendientes,
+        o None si el crédito no existe en tbl_segundometro_semana
+    """
+    if replica_segundometro.disponible() and not replica_segundometro.existe(id_credito):
+        return None
+    
+    if rollup_resumen.disponible():
+        with get_db_connection(database=DATABASE) as conn:
+            with conn.cursor() as cursor:
+                existe, totales = rollup_resumen.obtener(cursor, id_credito)
+                if not existe:
+                    return None
+                if totales is not None:
+                    return totales
+                # Cambios sin aplicar: agregado en vivo con la misma conexión
+                ejecutar(cursor, "resumen_simple_lote", (id_credito,))
+                row = cursor.fetchone()
+                return row if row else dict(_RESUMEN_VACIO)
+    
+    if replica_segundometro.disponible():
+        # La existencia ya se validó en memoria; solo falta el agregado
+        rows = _consultar("resumen_simple_lote", (id_credito,))
+        return rows[0] if rows else dict(_RESUMEN_VACIO)
+    
+    rows = _consultar("resumen_simple", (id_credito, id_credito))
+    if not rows or rows[0]["id_credito_existe"] is None:
+        return None
+    return rows[0]
+
+
+def obtener_creditos_con_gastos(
+    ids_credito: List[int],
+    filtro: str = "todos",
+    incluir_status: bool = False,
+    chunk_size: int = None
+) -> Dict[int, Tuple[dict, List[tuple]]]:
+    """
+    Obtiene datos generales y detalle de gastos de varios créditos con
+    consultas por conjunto (IN) en bloques de `chunk_size` IDs, usando una
+    sola conexión (bloqueante, usar con run_db).
+    
+    Args:
+        ids_credito: IDs de crédito sin repetir
+        filtro: 'condonados', 'pendientes' o 'todos'
+        incluir_status: Si es True agrega la columna status (CONDONADO/PENDIENTE)
+        chunk_size: Máximo de IDs por consulta (default BATCH_CHUNK_SIZE)
+    
+    Returns:
+        Diccionario id_credito -> (datos generales, filas de detalle como tuplas
+        en el orden de COLUMNAS_DETALLE + status si se pidió).
+        Los créditos que no existen en tbl_segundometro_semana no se incluyen.
+    """
+    resultado: Dict[int, Tuple[dict, List[tuple]]] = {}
+    usar_replica = replica_segundometro.disponible()
+    
+    with get_db_connection(database=DATABASE) as conn:
+        with conn.cursor() as cursor, conn.cursor(pymysql.cursors.Cursor) as cursor_gastos:
+            for bloque in _en_bloques(ids_credito, chunk_size or BATCH_CHUNK_SIZE):
+                if usar_replica:
+                    for id_credito in bloque:
+                        datos_generales = replica_segundometro.obtener(id_credito)
+                        if datos_generales is not None:
+                            resultado[id_credito] = (datos_generales, [])
+                else:
+                    ejecutar(cursor, "datos_generales_lote", bloque, marcadores=len(bloque))
+                    for row in cursor.fetchall():
+                        # tbl_segundometro_semana puede traer varias filas por crédito; se conserva la primera
+                        resultado.setdefault(row["id_credito"], (row, []))
+                
+                encontrados = [id_credito for id_credito in bloque if id_credito in resultado]
+                if not encontrados:
+                    continue
+                
+                ejecutar(
+                    cursor_gastos, "gastos_lote", encontrados,
+                    marcadores=len(encontrados), filtro=filtro, incluir_status=incluir_status
+                )
+                for row in cursor_gastos.fetchall():
+                    resultado[row[0]][1].append(row[_INICIO_DETALLE_LOTE:])
+    
+    return resultado
+
+
+def obtener_resumenes_simples(ids_credito: List[int], chunk_size: int = None) -> Dict[int, dict]:
+    """
+    Obtiene los totales de gastos_cobranza de varios créditos con un solo
+    agregado agrupado (GROUP BY) por bloque, usando una sola conexión
+    (bloqueante, usar con run_db). Con el rollup activo los totales salen de
+    resumen_gastos_credito y solo los créditos con cambios sin aplicar usan
+    el agregado.
+    
+    Args:
+        ids_credito: IDs de crédito sin repetir
+        chunk_size: Máximo de IDs por consulta (default BATCH_CHUNK_SIZE)
+    
+    Returns:
+        Diccionario id_credito -> fila de totales. Solo incluye créditos que
+        existen en tbl_segundometro_semana; los que no tienen gastos llevan totales en cero.
+    """
+    resultado: Dict[int, dict] = {}
+    usar_replica = replica_segundometro.disponible()
+    usar_rollup = rollup_resumen.disponible()
+    
+    with get_db_connection(database=DATABASE) as conn:
+        with conn.cursor() as cursor:
+            for bloque in _en_bloques(ids_credito, chunk_size or BATCH_CHUNK_SIZE):
+                if usar_replica:
+                    existentes = [id_credito for id_credito in bloque if replica_segundometro.existe(id_credito)]
+                else:
+                    ejecutar(cursor, "creditos_existentes_lote", bloque, marcadores=len(bloque))
+                    existentes = [row["id_credito"] for row in cursor.fetchall()]
+                if not existentes:
+                    continue
+                
+                if usar_rollup:
+                    en_vivo = []
+                    for id_credito, totales in rollup_resumen.obtener_lote(cursor, existentes).items():
+                        if totales is None:
+                            en_vivo.append(id_credito)
+                        else:
+                            resultado[id_credito] = totales
+                    existentes = en_vivo
+                    if not existentes:
+                        continue
+                
+                for id_credito in existentes:
+                    resultado[id_credito] = dict(_RESUMEN_VACIO)
+                
+                ejecutar(cursor, "resumen_simple_lote", existentes, marcadores=len(existentes))
+                for row in cursor.fetchall():
+                    resultado[row["id_credito"]] = row
+    
+    return resultado
+
+
+def obtener_huella_credito(id_credito: int, filtro: str = "todos") -> Optional[Tuple[dict, dict]]:
+    """
+    Obtiene los datos generales y los agregados de gastos_cobranza que
+    identifican la versión de la respuesta de un crédito, sin leer el
+    detalle, en una sola consulta agregada (bloqueante, usar con run_db).
+    
+    Los mismos agregados son el resumen del endpoint general.
+    
+    Args:
+        id_credito: ID del crédito a consultar
+        filtro: 'condonados', 'pendientes' o 'todos'
+    
+    Returns:
+        Tupla (datos generales, agregados) o None si el crédito no existe.
+        Los agregados traen total, condonados, ultima_condonacion, ultimo_periodo,
+        suma_monto_valor y suma_cuota.
+    """
+    if replica_segundometro.disponible():
+        datos_generales = replica_segundometro.obtener(id_credito)
+        if datos_generales is None:
+            return None
+        rows = _consultar("huella_gastos", (id_credito,), filtro=filtro)
+        return datos_generales, rows[0]
+    
+    rows = _consultar("resumen_general", (id_credito,), filtro=filtro)
+    if not rows:
+        return None
+    
+    row = rows[0]
+    datos_generales = {columna: row[columna] for columna in COLUMNAS_DATOS_GENERALES}
+    huella = {
+        "total": row["total_registros"],
+        "condonados": row["condonados"],
+        "ultima_condonacion": row["ultima_condonacion"],
+        "ultimo_periodo": row["ultimo_periodo"],
+        "suma_monto_valor": row["suma_monto_valor"],
+        "suma_cuota": row["suma_cuota"]
+    }
+    return datos_generales, huella
+
+
+class ExportacionesOcupadasError(Exception):
+    """Ya hay EXPORT_MAX_CONCURRENT exportaciones en curso en este proceso"""
+
+
+class ExportacionGastos:
+    """
+    Exportación de gastos_cobranza con un cursor sin búfer (SSCursor).
+    
+    Las filas se leen del servidor por bloques de `fetch_size`, así que la
+    memoria no crece con el número de filas exportadas. Como cada exportación
+    retiene una conexión del pool, solo pueden correr EXPORT_MAX_CONCURRENT a
+    la vez. Todos los métodos son bloqueantes (usar con run_db).
+    """
+    
+    def __init__(
+        self,
+        bucket_morosidad: Optional[str] = None,
+        fecha_desde: Optional[date] = None,
+        fecha_hasta: Optional[date] = None,
+        condonado: Optional[bool] = None,
+        fetch_size: int = None
+    ):
+        condiciones = []
+        self.params: list = []
+        
+        if bucket_morosidad is not None:
+            condiciones.append(
+                "AND g.Id_credito IN ("
+                "SELECT Id_credito FROM tbl_segundometro_semana WHERE Bucket_Morosidad_Real = %s)"
+            )
+            self.params.append(bucket_morosidad)
+        if fecha_desde is not None:
+            condiciones.append("AND g.periodo_inicio >= %s")
+            self.params.append(fecha_desde)
+        if fecha_hasta is not None:
+            condiciones.append("AND g.periodo_inicio <= %s")
+            self.params.append(fecha_hasta)
+        if condonado is not None:
+            condiciones.append(FILTROS_CONDONADO["condonados" if condonado else "pendientes"])
+        
+        self.condiciones = "\n      ".join(condiciones)
+        self.fetch_size = fetch_size or EXPORT_FETCH_SIZE
+        self._pool = get_pool(DATABASE)
+        self._item = None
+        self._cursor = None
+        self._cupo = False
+        # Evita que `cerrar` descarte la conexión mientras otro hilo del
+        # executor sigue dentro de `abrir` o `siguiente_bloque`
+        self._lock = threading.Lock()
+        self.agotado = False
+    
+    def abrir(self) -> None:
+        """
+        Toma un cupo de exportación y una conexión del pool, y ejecuta la
+        consulta sin cargar el resultado. Si falla, llamar `cerrar`.
+        
+        Raises:
+            ExportacionesOcupadasError: Si no hay cupo de exportación libre
+        """
+        with self._lock:
+            if not _cupos_exportacion.acquire(blocking=False):
+                raise ExportacionesOcupadasError(
+                    f"Hay {EXPORT_MAX_CONCURRENT} exportaciones en curso; intente más tarde"
+                )
+            self._cupo = True
+            self._item = self._pool.acquire()
+            conn = self._item.conn
+            with conn.cursor() as cursor:
+                cursor.execute("SET SESSION net_write_timeout = %s", (EXPORT_NET_WRITE_TIMEOUT,))
+            self._cursor = conn.cursor(pymysql.cursors.SSCursor)
+            ejecutar(
+                self._cursor, "exportar_gastos", self.params,
+                incluir_status=True, condiciones=self.condiciones
+            )
+    
+    def siguiente_bloque(self) -> List[tuple]:
+        """
+        Lee el siguiente bloque de filas (id_credito, COLUMNAS_DETALLE..., status);
+        lista vacía al terminar
+        """
+        with self._lock:
+            if self._cursor is None:
+                return []
+            filas = self._cursor.fetchmany(self.fetch_size)
+        if not filas:
+            self.agotado = True
+        return list(filas)
+    
+    def cerrar(self) -> None:
+        """
+        Libera la conexión y el cupo de exportación, esperando a que termine
+        el bloque en curso. La conexión siempre se descarta en lugar de volver
+        al pool: si la exportación se interrumpió quedan filas pendientes en el
+        socket (leerlas podría tardar minutos) y además la sesión tiene
+        net_write_timeout modificado.
+        """
+        with self._lock:
+            item, self._item = self._item, None
+            self._cursor = None
+            if item is not None:
+                self._pool.release(item, discard=True)
+            if self._cupo:
+                self._cupo = False
+                _cupos_exportacion.release()
@@ -0,0 +1,302 @@
+"""
+Diagnóstico de índices de las consultas calientes
+Ejecuta EXPLAIN sobre cada sentencia del catálogo que usan los endpoints,
+marca los recorridos completos (alertas) y los filesort (advertencias), y
+compara los índices existentes contra los índices compuestos recomendados.
+
+Se ejecuta al iniciar la aplicación (INDEX_CHECK_ENABLED) y desde
+scripts/revisar_indices.py. Con INDEX_CHECK_REQUIRED, /health/ready responde
+503 mientras alguna consulta caliente no use índice.
+"""
+
+import asyncio
+import logging
+import threading
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple
+import os
+from dotenv import load_dotenv
+import pymysql
+
+from config.database import get_db_connection, run_db
+from repositories.resumen_credito import RollupConfig
+from repositories.statements import FILTROS_CONDONADO, ejecutar, sql
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+DATABASE = "db-mega-reporte"
+
+
+class IndicesConfig:
+    """Configuración del diagnóstico de índices"""
+
+    ENABLED = os.getenv("INDEX_CHECK_ENABLED", "true").strip().lower() in ("1", "true", "yes", "si", "sí")
+    # Si una consulta caliente no usa índice, /health/ready responde 503
+    REQUIRED = os.getenv("INDEX_CHECK_REQUIRED", "false").strip().lower() in ("1", "true", "yes", "si", "sí")
+
+
+class IndiceRecomendado:
+    """Índice compuesto recomendado para una tabla"""
+
+    __slots__ = ("tabla", "nombre", "columnas", "motivo")
+
+    def __init__(self, tabla: str, nombre: str, columnas: Tuple[str, ...], motivo: str):
+        self.tabla = tabla
+        self.nombre = nombre
+        self.columnas = columnas
+        self.motivo = motivo
+
+    def ddl(self) -> str:
+        return (
+            f"ALTER TABLE {self.tabla} ADD INDEX {self.nombre} ({', '.join(self.columnas)}), "
+            f"ALGORITHM=INPLACE, LOCK=NONE;"
+        )
+
+    def cubierto_por(self, columnas: List[str]) -> bool:
+        """True si un índice existente empieza con las mismas columnas"""
+        existentes = [columna.lower() for columna in columnas[:len(self.columnas)]]
+        return existentes == [columna.lower() for columna in self.columnas]
+
+
+INDICES_RECOMENDADOS = [
+    IndiceRecomendado(
+        "tbl_segundometro_semana", "idx_segundometro_credito", ("Id_credito",),
+        "Datos generales y existencia del crédito"
+    ),
+    IndiceRecomendado(
+        "gastos_cobranza", "idx_gastos_credito_periodo", ("Id_credito", "periodo_inicio"),
+        "Detalle por crédito ordenado por periodo_inicio, paginación keyset y agregados por crédito"
+    ),
+    IndiceRecomendado(
+        "gastos_cobranza", "idx_gastos_credito_condonado_periodo", ("Id_credito", "condonado", "periodo_inicio"),
+        "Detalle de condonados de un crédito ordenado por periodo_inicio"
+    ),
+    IndiceRecomendado(
+        "gastos_cobranza_cambios", "idx_cambios_credito", ("Id_credito",),
+        "Cambios pendientes del rollup por crédito"
+    ),
+]
+
+
+def consultas_endpoints(id_credito: int) -> List[Tuple[str, dict, tuple, bool]]:
+    """
+    Sentencias que usan los endpoints, con parámetros de muestra:
+    (sentencia, variantes, params, caliente). Las no calientes se reportan
+    pero no cuentan como problema (la exportación recorre un segmento completo).
+    """
+    consultas = []
+    for filtro in FILTROS_CONDONADO:
+        consultas += [
+            ("credito_con_gastos", {"filtro": filtro, "incluir_status": True}, (id_credito,), True),
+            ("gastos_lote", {"filtro": filtro, "incluir_status": True}, (id_credito,), True),
+            ("resumen_general", {"filtro": filtro}, (id_credito,), True),
+            ("huella_gastos", {"filtro": filtro}, (id_credito,), True),
+        ]
+    consultas += [
+        ("datos_generales_lote", {}, (id_credito,), True),
+        ("creditos_existentes_lote", {}, (id_credito,), True),
+        ("resumen_simple", {}, (id_credito, id_credito), True),
+        ("resumen_simple_lote", {}, (id_credito,), True),
+        ("pagina_general", {"incluir_status": True}, (id_credito, id_credito, id_credito, 51), True),
+        (
+            "pagina_general", {"incluir_status": True, "con_cursor": True},
+            (id_credito, id_credito, id_credito, date(2000, 1, 1), date(2000, 1, 1), 0, date(2000, 1, 1), 51), True
+        ),
+        ("exportar_gastos", {"incluir_status": True}, (), False),
+    ]
+    if RollupConfig.ENABLED:
+        consultas += [
+            ("resumen_rollup", {}, (id_credito, id_credito, id_credito), True),
+            ("resumen_rollup_lote", {}, (id_credito,), True),
+            ("rollup_pendientes_lote", {}, (id_credito,), True),
+        ]
+    return consultas
+
+
+def _revisar_plan(plan: List[dict]) -> Tuple[List[str], List[str]]:
+    """
+    Revisa un plan de EXPLAIN.
+    
+    Returns:
+        Tupla (alertas: recorridos completos de tabla o de índice,
+        advertencias: filesort). Las consultas calientes filtran por
+        Id_credito, así que un filesort ordena solo las filas de un crédito
+        (ej. ORDER BY después del LEFT JOIN con la tabla derivada del
+        encabezado) y no cuenta como problema.
+    """
+    alertas = []
+    advertencias = []
+    for paso in plan:
+        tabla = paso.get("table")
+        if not tabla or tabla.startswith("<"):
+            # Tablas derivadas y uniones: sus tablas base aparecen en otros pasos
+            continue
+        if paso.get("type") == "ALL":
+            alertas.append(f"recorrido_completo:{tabla}")
+        elif paso.get("type") == "index":
+            alertas.append(f"recorrido_indice:{tabla}")
+        if "Using filesort" in (paso.get("Extra") or ""):
+            advertencias.append(f"filesort:{tabla}")
+    return alertas, advertencias
+
+
+class AsesorIndices:
+    """
+    Último diagnóstico de índices. `revisar` es bloqueante (usar con run_db).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reporte: Optional[dict] = None
+        self.errores = 0
+
+    def revisar(self) -> dict:
+        """
+        Ejecuta EXPLAIN sobre las consultas de los endpoints y revisa los
+        índices recomendados.
+
+        Returns:
+            Reporte con el plan, las alertas y las advertencias por consulta,
+            el número de consultas calientes con alertas (problemas) y con
+            advertencias, y el DDL de los índices faltantes
+        """
+        with self._lock:
+            consultas = []
+            with get_db_connection(database=DATABASE) as conn:
+                with conn.cursor() as cursor:
+                    ejecutar(cursor, "indices_muestra")
+                    id_credito = cursor.fetchone()["id_credito"] or 0
+
+                    for nombre, variantes, params, caliente in consultas_endpoints(id_credito):
+                        etiqueta = nombre + "".join(f"[{clave}={valor}]" for clave, valor in variantes.items())
+                        try:
+                            cursor.execute("EXPLAIN " + sql(nombre, **variantes), params)
+                        except pymysql.MySQLError as e:
+                            # Ej. tablas del rollup sin migrar
+                            consultas.append({
+                                "consulta": etiqueta,
+                                "caliente": caliente,
+                                "plan": [],
+                                "alertas": [f"error:{e.args[-1] if e.args else e}"],
+                                "advertencias": []
+                            })
+                            continue
+                        plan = list(cursor.fetchall())
+                        alertas, advertencias = _revisar_plan(plan)
+                        consultas.append({
+                            "consulta": etiqueta,
+                            "caliente": caliente,
+                            "plan": [
+                                {
+                                    "tabla": paso.get("table"),
+                                    "tipo": paso.get("type"),
+                                    "indice": paso.get("key"),
+                                    "filas": paso.get("rows"),
+                                    "extra": paso.get("Extra")
+                                }
+                                for paso in plan
+                            ],
+                            "alertas": alertas,
+                            "advertencias": advertencias
+                        })
+
+                    tablas = sorted({indice.tabla for indice in INDICES_RECOMENDADOS})
+                    ejecutar(cursor, "indices_existentes", tablas, marcadores=len(tablas))
+                    existentes: Dict[str, Dict[str, List[str]]] = {}
+                    for row in cursor.fetchall():
+                        existentes.setdefault(row["tabla"], {}).setdefault(row["indice"], []).append(row["columna"])
+
+            faltantes = [
+                {
+                    "tabla": indice.tabla,
+                    "indice": indice.nombre,
+                    "columnas": list(indice.columnas),
+                    "motivo": indice.motivo,
+                    "ddl": indice.ddl()
+                }
+                for indice in INDICES_RECOMENDADOS
+                # Las tablas que no existen (rollup sin migrar) no se revisan
+                if indice.tabla in existentes
+                and not any(indice.cubierto_por(columnas) for columnas in existentes[indice.tabla].values())
+            ]
+            self.reporte = {
+                "revisado_en": datetime.now().isoformat(),
+                "id_credito_muestra": id_credito,
+                "problemas": sum(1 for c in consultas if c["caliente"] and c["alertas"]),
+                "advertencias": sum(1 for c in consultas if c["caliente"] and c["advertencias"]),
+                "consultas": consultas,
+                "indices_faltantes": faltantes
+            }
+            return self.reporte
+
+    async def revisar_al_iniciar(self) -> None:
+        """Tarea de arranque: revisa y deja el resumen en el log"""
+        try:
+            reporte = await run_db(self.revisar)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.errores += 1
+            logger.warning("No se pudo revisar los índices de las consultas: %s", e)
+            return
+        if reporte["problemas"] or reporte["indices_faltantes"]:
+            logger.warning("Diagnóstico de índices:\n%s", formatear_reporte(reporte))
+        else:
+            logger.info(
+                "Diagnóstico de índices: %s consultas revisadas sin alertas (%s calientes con filesort)",
+                len(reporte["consultas"]), reporte["advertencias"]
+            )
+
+    def listo(self) -> Tuple[bool, Optional[str]]:
+        """
+        Estado para /health/ready. Sin INDEX_CHECK_REQUIRED siempre está listo.
+
+        Returns:
+            (listo, motivo si no lo está)
+        """
+        if not (IndicesConfig.ENABLED and IndicesConfig.REQUIRED):
+            return True, None
+        if self.reporte is None:
+            return False, "Diagnóstico de índices pendiente"
+        if self.reporte["problemas"]:
+            return False, f"{self.reporte['problemas']} consultas calientes sin índice adecuado"
+        return True, None
+
+    def stats(self) -> dict:
+        """Último reporte para monitoreo"""
+        return {
+            "habilitado": IndicesConfig.ENABLED,
+            "requerido": IndicesConfig.REQUIRED,
+            "errores": self.errores,
+            "reporte": self.reporte
+        }
+
+
+def formatear_reporte(reporte: dict) -> str:
+    """Reporte legible: consultas con alertas o advertencias y DDL de los índices faltantes"""
+    lineas = []
+    for consulta in reporte["consultas"]:
+        if not consulta["alertas"] and not consulta["advertencias"]:
+            continue
+        marca = "CALIENTE" if consulta["caliente"] else "informativa"
+        hallazgos = consulta["alertas"] + [f"{advertencia} (advertencia)" for advertencia in consulta["advertencias"]]
+        lineas.append(f"- {consulta['consulta']} ({marca}): {', '.join(hallazgos)}")
+        for paso in consulta["plan"]:
+            lineas.append(
+                f"    {paso['tabla']}: type={paso['tipo']} key={paso['indice']} "
+                f"rows={paso['filas']} extra={paso['extra']}"
+            )
+    if reporte["indices_faltantes"]:
+        lineas.append("Índices recomendados faltantes:")
+        for indice in reporte["indices_faltantes"]:
+            lineas.append(f"  -- {indice['motivo']}")
+            lineas.append(f"  {indice['ddl']}")
+    if not lineas:
+        lineas.append(f"{len(reporte['consultas'])} consultas revisadas sin alertas")
+    return "\n".join(lineas)
+
+
+# Instancia compartida por la aplicación
+asesor_indices = AsesorIndices()
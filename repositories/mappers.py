@@ -0,0 +1,94 @@
+"""
+Mappers de filas a respuestas
+Convierten las filas de MySQL (tuplas en el orden de COLUMNAS_DETALLE + status)
+al formato JSON de cada endpoint sin pasar por Pydantic
+"""
+
+from utils.serializacion import CONVERSIONES, compilar_mapper
+
+
+COLUMNAS_DATOS_GENERALES = (
+    "id_credito",
+    "nombre_cliente",
+    "id_cliente",
+    "domicilio_completo",
+    "bucket_morosidad",
+    "dias_mora",
+    "saldo_vencido"
+)
+
+COLUMNAS_DETALLE = (
+    "periodoinicio",
+    "periodofin",
+    "semana",
+    "parcialidad",
+    "monto_valor",
+    "cuota",
+    "condonado",
+    "fecha_condonacion"
+)
+
+_entero = CONVERSIONES["int"]
+_decimal_a_float = CONVERSIONES["float"]
+
+# Mismo formato JSON que DetalleCondonacion
+_CONVERSIONES_MODELO = {"monto_valor": "float", "cuota": "float", "condonado": "int"}
+# Formato del endpoint general (montos en 0 si vienen vacíos, fecha_condonacion con espacio)
+_CONVERSIONES_GENERAL = {
+    "monto_valor": "float_o_cero",
+    "cuota": "float_o_cero",
+    "fecha_condonacion": "fecha_hora_texto"
+}
+# Formato de la exportación NDJSON (fechas como texto "YYYY-MM-DD")
+_CONVERSIONES_EXPORTACION = dict(_CONVERSIONES_GENERAL, periodoinicio="fecha_texto", periodofin="fecha_texto")
+
+
+def _mapper_detalle(conversiones: dict, con_status: bool, desplazamiento: int = 0, prefijo: tuple = ()):
+    campos = list(prefijo)
+    campos += [
+        (columna, desplazamiento + indice, conversiones.get(columna, "valor"))
+        for indice, columna in enumerate(COLUMNAS_DETALLE)
+    ]
+    campos.append(("status", desplazamiento + len(COLUMNAS_DETALLE) if con_status else None, "valor"))
+    return compilar_mapper(campos)
+
+
+# Filas de detalle -> DetalleCondonacion (status en null)
+detalle_modelo = _mapper_detalle(_CONVERSIONES_MODELO, con_status=False)
+
+# Filas de detalle con status -> detalle del endpoint general
+detalle_general = _mapper_detalle(_CONVERSIONES_GENERAL, con_status=True)
+
+# Filas de la exportación (id_credito + detalle + status) -> línea NDJSON
+fila_exportacion = _mapper_detalle(
+    _CONVERSIONES_EXPORTACION,
+    con_status=True,
+    desplazamiento=1,
+    prefijo=(("id_credito", 0, "valor"),)
+)
+
+
+def datos_generales_modelo(datos_generales_row: dict) -> dict:
+    """Datos generales con el formato de DatosGenerales (enteros y float como los convertía Pydantic)"""
+    return {
+        "id_credito": _entero(datos_generales_row['id_credito']),
+        "nombre_cliente": datos_generales_row['nombre_cliente'],
+        "id_cliente": _entero(datos_generales_row['id_cliente']),
+        "domicilio_completo": datos_generales_row['domicilio_completo'],
+        "bucket_morosidad": datos_generales_row['bucket_morosidad'],
+        "dias_mora": _entero(datos_generales_row['dias_mora']),
+        "saldo_vencido": _decimal_a_float(datos_generales_row['saldo_vencido'])
+    }
+
+
+def datos_generales_general(datos_generales_row: dict) -> dict:
+    """Datos generales con el formato del endpoint general"""
+    return {
+        "id_credito": datos_generales_row['id_credito'],
+        "nombre_cliente": datos_generales_row['nombre_cliente'],
+        "id_cliente": datos_generales_row['id_cliente'],
+        "domicilio_completo": datos_generales_row['domicilio_completo'],
+        "bucket_morosidad": datos_generales_row['bucket_morosidad'],
+        "dias_mora": datos_generales_row['dias_mora'],
+        "saldo_vencido": float(datos_generales_row['saldo_vencido']) if datos_generales_row['saldo_vencido'] else 0
+    }
@@ -0,0 +1,292 @@
+"""
+Rollup por crédito de los totales del resumen simple
+Tabla resumen_gastos_credito (total_parcialidades, monto_total, condonados y
+pendientes por Id_credito) mantenida de forma incremental: los triggers de
+gastos_cobranza anotan los créditos tocados en gastos_cobranza_cambios y
+una tarea de fondo recalcula solo esos créditos.
+
+Con el rollup activo /resumen-simple es una búsqueda por llave primaria en
+lugar del agregado condicional sobre todos los gastos del crédito. Los
+créditos con cambios sin aplicar se siguen resolviendo con el agregado en
+vivo, así que la respuesta nunca está atrasada.
+
+DDL: scripts/resumen_gastos_credito.sql
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+import os
+from dotenv import load_dotenv
+
+from config.database import get_db_connection, run_db
+from repositories.statements import ejecutar
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+DATABASE = "db-mega-reporte"
+
+# Máximo de IDs por sentencia IN (...), igual que en las consultas por lote
+BATCH_CHUNK_SIZE = int(os.getenv("BATCH_CHUNK_SIZE", "500"))
+
+
+class RollupConfig:
+    """Configuración del rollup de resumen_gastos_credito"""
+
+    ENABLED = os.getenv("RESUMEN_ROLLUP_ENABLED", "false").strip().lower() in ("1", "true", "yes", "si", "sí")
+    # Cada cuántos segundos se aplican los cambios pendientes
+    REFRESH_INTERVAL = float(os.getenv("RESUMEN_ROLLUP_REFRESH_INTERVAL", "2"))
+    # Máximo de cambios leídos de gastos_cobranza_cambios por ronda
+    BATCH = int(os.getenv("RESUMEN_ROLLUP_BATCH", "5000"))
+    # Créditos por rango en la reconstrucción y la verificación
+    RANGO = int(os.getenv("RESUMEN_ROLLUP_RANGE", "50000"))
+
+
+def _en_bloques(ids: List[int], tamano: int):
+    tamano = max(1, tamano)
+    for inicio in range(0, len(ids), tamano):
+        yield ids[inicio:inicio + tamano]
+
+
+class RollupResumen:
+    """
+    Aplicación incremental de cambios al rollup. Todos los métodos son
+    bloqueantes (se ejecutan con run_db).
+
+    Varias instancias de la API pueden tener el rollup habilitado: el
+    bloqueo con nombre de MySQL (GET_LOCK) garantiza que solo una aplique
+    cambios a la vez; las demás solo leen.
+
+    `disponible()` es False hasta que una ronda termina bien (las tablas
+    existen); mientras tanto los repositorios usan el agregado en vivo.
+    """
+
+    def __init__(self):
+        self._disponible = False
+        self._lock = threading.Lock()
+        self.rondas = 0
+        self.cambios_aplicados = 0
+        self.creditos_recalculados = 0
+        self.sin_bloqueo = 0
+        self.errores = 0
+        self.consultas = 0
+        self.respaldos_en_vivo = 0
+        self.pendientes = 0
+        self.ultima_ronda: Optional[float] = None
+        self.ultima_duracion = 0.0
+
+    def disponible(self) -> bool:
+        return RollupConfig.ENABLED and self._disponible
+
+    def aplicar_cambios(self) -> int:
+        """
+        Aplica una ronda de cambios pendientes: lee hasta RollupConfig.BATCH
+        cambios, recalcula sus créditos desde gastos_cobranza (INSERT ...
+        SELECT ... ON DUPLICATE KEY UPDATE), quita los que ya no tienen
+        gastos y borra exactamente los cambios leídos.
+
+        Un cambio registrado mientras corre la ronda tiene un id que no se
+        leyó, así que queda para la siguiente. Si la ronda se interrumpe los
+        cambios no se borran y se vuelven a aplicar (recalcular es idempotente).
+
+        Returns:
+            Cambios aplicados (0 si otro proceso tiene el bloqueo)
+        """
+        with self._lock:
+            inicio = time.perf_counter()
+            with get_db_connection(database=DATABASE) as conn:
+                with conn.cursor() as cursor:
+                    ejecutar(cursor, "rollup_bloqueo")
+                    if not cursor.fetchone()["obtenido"]:
+                        self.sin_bloqueo += 1
+                        # Otro proceso aplica los cambios; el rollup solo se lee
+                        # si sus tablas ya están migradas
+                        ejecutar(cursor, "rollup_tablas")
+                        self._disponible = cursor.fetchone()["tablas"] == 2
+                        return 0
+                    try:
+                        ejecutar(cursor, "rollup_cambios", (RollupConfig.BATCH,))
+                        cambios = cursor.fetchall()
+                        ids_cambio = [row["id"] for row in cambios]
+                        creditos = sorted({row["id_credito"] for row in cambios})
+
+                        for bloque in _en_bloques(creditos, BATCH_CHUNK_SIZE):
+                            ejecutar(cursor, "rollup_recalcular_lote", bloque, marcadores=len(bloque))
+                            ejecutar(cursor, "rollup_eliminar_sin_gastos", bloque, marcadores=len(bloque))
+                        for bloque in _en_bloques(ids_cambio, BATCH_CHUNK_SIZE):
+                            ejecutar(cursor, "rollup_cambios_aplicados", bloque, marcadores=len(bloque))
+
+                        ejecutar(cursor, "rollup_cambios_total")
+                        self.pendientes = cursor.fetchone()["pendientes"]
+                    finally:
+                        ejecutar(cursor, "rollup_liberar")
+                        cursor.fetchall()
+
+            self._disponible = True
+            self.rondas += 1
+            self.cambios_aplicados += len(ids_cambio)
+            self.creditos_recalculados += len(creditos)
+            self.ultima_ronda = time.time()
+            self.ultima_duracion = time.perf_counter() - inicio
+            if creditos:
+                logger.debug(
+                    "Rollup de resumen: %s cambios, %s créditos en %.3f s",
+                    len(ids_cambio), len(creditos), self.ultima_duracion
+                )
+            return len(ids_cambio)
+
+    async def refrescar_periodicamente(self) -> None:
+        """Tarea de fondo: aplica los cambios pendientes cada REFRESH_INTERVAL"""
+        while True:
+            try:
+                aplicados = await run_db(self.aplicar_cambios)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                aplicados = 0
+                self.errores += 1
+                logger.warning("No se pudieron aplicar los cambios al rollup de resumen: %s", e)
+            # Si la ronda llenó el lote hay más cambios esperando
+            if aplicados < RollupConfig.BATCH:
+                await asyncio.sleep(RollupConfig.REFRESH_INTERVAL)
+
+    def obtener(self, cursor, id_credito: int) -> Tuple[bool, Optional[dict]]:
+        """
+        Existencia y totales de un crédito desde el rollup, en una sola consulta.
+
+        Returns:
+            (existe, totales). totales es None si el crédito no existe o si
+            tiene cambios sin aplicar y hay que usar el agregado en vivo.
+        """
+        self.consultas += 1
+        ejecutar(cursor, "resumen_rollup", (id_credito, id_credito, id_credito))
+        row = cursor.fetchone()
+        if row["id_credito_existe"] is None:
+            return False, None
+        if row["pendiente"]:
+            self.respaldos_en_vivo += 1
+            return True, None
+        return True, {
+            "total_parcialidades": row["total_parcialidades"],
+            "monto_total": row["monto_total"],
+            "condonados": row["condonados"],
+            "pendientes": row["pendientes"]
+        }
+
+    def obtener_lote(self, cursor, ids_credito: List[int]) -> Dict[int, Optional[dict]]:
+        """
+        Totales de varios créditos (que ya se sabe que existen) desde el rollup.
+
+        Returns:
+            id_credito -> fila de totales, o None si el crédito tiene cambios
+            sin aplicar y hay que usar el agregado en vivo
+        """
+        self.consultas += len(ids_credito)
+        ejecutar(cursor, "rollup_pendientes_lote", ids_credito, marcadores=len(ids_credito))
+        pendientes = {row["id_credito"] for row in cursor.fetchall()}
+        self.respaldos_en_vivo += len(pendientes)
+
+        resultado: Dict[int, Optional[dict]] = {
+            id_credito: None if id_credito in pendientes else {
+                "total_parcialidades": 0,
+                "monto_total": 0,
+                "condonados": 0,
+                "pendientes": 0
+            }
+            for id_credito in ids_credito
+        }
+        ejecutar(cursor, "resumen_rollup_lote", ids_credito, marcadores=len(ids_credito))
+        for row in cursor.fetchall():
+            if resultado.get(row["id_credito"]) is not None:
+                resultado[row["id_credito"]] = row
+        return resultado
+
+    def _rangos(self, cursor):
+        ejecutar(cursor, "rollup_rango")
+        row = cursor.fetchone()
+        if row["minimo"] is None:
+            return
+        paso = max(1, RollupConfig.RANGO)
+        for desde in range(row["minimo"], row["maximo"] + 1, paso):
+            yield desde, min(desde + paso - 1, row["maximo"])
+
+    def reconstruir(self) -> int:
+        """
+        Reconstruye el rollup completo por rangos de Id_credito. Los cambios
+        que lleguen durante la reconstrucción los registran los triggers y
+        se aplican en la siguiente ronda.
+
+        Returns:
+            Filas afectadas que reporta MySQL (1 por crédito nuevo, 2 por
+            crédito actualizado, 0 si no cambió)
+        """
+        afectadas = 0
+        with get_db_connection(database=DATABASE) as conn:
+            with conn.cursor() as cursor:
+                for desde, hasta in list(self._rangos(cursor)):
+                    afectadas += ejecutar(cursor, "rollup_reconstruir_rango", (desde, hasta))
+                    ejecutar(cursor, "rollup_eliminar_huerfanos_rango", (desde, hasta))
+                    logger.info("Rollup reconstruido para Id_credito %s-%s", desde, hasta)
+        return afectadas
+
+    def verificar(self, limite: int = 100) -> dict:
+        """
+        Compara el rollup contra el agregado en vivo por rangos de Id_credito.
+        Los créditos con cambios sin aplicar no se comparan.
+
+        Args:
+            limite: Máximo de diferencias a detallar
+
+        Returns:
+            {"diferencias": n, "huerfanos": n, "detalle": [...], "rangos": n}
+        """
+        diferencias = 0
+        huerfanos = 0
+        rangos = 0
+        detalle: List[dict] = []
+        with get_db_connection(database=DATABASE) as conn:
+            with conn.cursor() as cursor:
+                for desde, hasta in list(self._rangos(cursor)):
+                    rangos += 1
+                    ejecutar(cursor, "rollup_diferencias_rango", (desde, hasta))
+                    for row in cursor.fetchall():
+                        diferencias += 1
+                        if len(detalle) < limite:
+                            detalle.append(row)
+                    ejecutar(cursor, "rollup_huerfanos_rango", (desde, hasta))
+                    for row in cursor.fetchall():
+                        huerfanos += 1
+                        if len(detalle) < limite:
+                            detalle.append({"id_credito": row["id_credito"], "huerfano": True})
+        return {
+            "diferencias": diferencias,
+            "huerfanos": huerfanos,
+            "rangos": rangos,
+            "detalle": detalle
+        }
+
+    def stats(self) -> dict:
+        """Estadísticas del rollup para monitoreo"""
+        return {
+            "habilitado": RollupConfig.ENABLED,
+            "disponible": self.disponible(),
+            "rondas": self.rondas,
+            "cambios_aplicados": self.cambios_aplicados,
+            "creditos_recalculados": self.creditos_recalculados,
+            "cambios_pendientes": self.pendientes,
+            "rondas_sin_bloqueo": self.sin_bloqueo,
+            "errores": self.errores,
+            "consultas": self.consultas,
+            "respaldos_en_vivo": self.respaldos_en_vivo,
+            "ultima_ronda": datetime.fromtimestamp(self.ultima_ronda).isoformat() if self.ultima_ronda else None,
+            "ultima_duracion_segundos": round(self.ultima_duracion, 3)
+        }
+
+
+# Instancia compartida por la aplicación
+rollup_resumen = RollupResumen()
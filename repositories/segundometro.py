@@ -0,0 +1,225 @@
+"""
+Réplica en memoria de tbl_segundometro_semana
+Índice compacto por Id_credito para servir datos generales y validaciones
+de existencia sin consultar MySQL
+"""
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from datetime import date, datetime
+from typing import List, Optional
+import os
+from dotenv import load_dotenv
+import pymysql
+
+from config.database import get_pool, run_db
+from repositories.statements import ejecutar
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+DATABASE = "db-mega-reporte"
+
+
+class SegundometroConfig:
+    """Configuración de la réplica en memoria"""
+    
+    ENABLED = os.getenv("SEGUNDOMETRO_REPLICA_ENABLED", "true").strip().lower() in ("1", "true", "yes", "si", "sí")
+    # Cada cuántos segundos se revisa si el snapshot semanal cambió
+    REFRESH_INTERVAL = float(os.getenv("SEGUNDOMETRO_REFRESH_INTERVAL", "300"))
+    # Recarga completa forzada aunque la huella no cambie
+    RELOAD_MAX_AGE = float(os.getenv("SEGUNDOMETRO_RELOAD_MAX_AGE", "86400"))
+    # Columna de fecha/semana del snapshot (con índice); su MAX marca la semana cargada
+    COLUMNA_SEMANA = os.getenv("SEGUNDOMETRO_WEEK_COLUMN", "").strip()
+
+
+class FilaSegundometro:
+    """Datos generales de un crédito (sin __dict__ para ahorrar memoria)"""
+    
+    __slots__ = (
+        "id_credito",
+        "nombre_cliente",
+        "id_cliente",
+        "domicilio_completo",
+        "bucket_morosidad",
+        "dias_mora",
+        "saldo_vencido"
+    )
+    
+    def __init__(self, id_credito, nombre_cliente, id_cliente, domicilio_completo,
+                 bucket_morosidad, dias_mora, saldo_vencido):
+        self.id_credito = id_credito
+        self.nombre_cliente = nombre_cliente
+        self.id_cliente = id_cliente
+        self.domicilio_completo = domicilio_completo
+        self.bucket_morosidad = bucket_morosidad
+        self.dias_mora = dias_mora
+        self.saldo_vencido = saldo_vencido
+    
+    def como_dict(self) -> dict:
+        """Mismo formato que las filas de datos generales de MySQL"""
+        return {campo: getattr(self, campo) for campo in self.__slots__}
+
+
+class IndiceSegundometro:
+    """
+    Índice inmutable: arreglo ordenado de Id_credito (array 'q') y lista
+    paralela de filas. La búsqueda es binaria sobre el arreglo.
+    """
+    
+    __slots__ = ("_ids", "_filas", "huella", "cargado_en")
+    
+    def __init__(self, ids: array, filas: List[FilaSegundometro], huella: tuple):
+        self._ids = ids
+        self._filas = filas
+        self.huella = huella
+        self.cargado_en = time.time()
+    
+    def buscar(self, id_credito: int) -> Optional[FilaSegundometro]:
+        posicion = bisect_left(self._ids, id_credito)
+        if posicion < len(self._ids) and self._ids[posicion] == id_credito:
+            return self._filas[posicion]
+        return None
+    
+    def __len__(self) -> int:
+        return len(self._ids)
+
+
+class ReplicaSegundometro:
+    """
+    Réplica del snapshot semanal. La carga y la revisión de huella son
+    bloqueantes (se ejecutan con run_db); las búsquedas son en memoria.
+    Mientras no hay índice cargado, `disponible()` es False y los
+    repositorios consultan MySQL como siempre.
+    """
+    
+    def __init__(self):
+        self._indice: Optional[IndiceSegundometro] = None
+        self._lock = threading.Lock()
+        self.cargas = 0
+        self.revisiones = 0
+        self.errores = 0
+        self.consultas = 0
+        self.ultima_duracion = 0.0
+    
+    def disponible(self) -> bool:
+        return self._indice is not None
+    
+    def obtener(self, id_credito: int) -> Optional[dict]:
+        """Datos generales del crédito o None si no existe en el snapshot"""
+        indice = self._indice
+        self.consultas += 1
+        fila = indice.buscar(id_credito) if indice is not None else None
+        return fila.como_dict() if fila is not None else None
+    
+    def existe(self, id_credito: int) -> bool:
+        indice = self._indice
+        self.consultas += 1
+        return indice is not None and indice.buscar(id_credito) is not None
+    
+    def _huella(self, conn) -> tuple:
+        with conn.cursor() as cursor:
+            ejecutar(cursor, "segundometro_huella", columna_semana=SegundometroConfig.COLUMNA_SEMANA)
+            row = cursor.fetchone()
+        semana = row["semana"]
+        if isinstance(semana, (date, datetime)):
+            semana = semana.isoformat()
+        return (row["min_id_credito"], row["max_id_credito"], semana)
+    
+    def cargar(self, forzar: bool = False) -> bool:
+        """
+        Carga el snapshot completo si la huella cambió (o si `forzar`).
+        
+        Returns:
+            True si se cargó un índice nuevo
+        """
+        with self._lock:
+            pool = get_pool(DATABASE)
+            item = pool.acquire()
+            completo = False
+            try:
+                huella = self._huella(item.conn)
+                self.revisiones += 1
+                indice_actual = self._indice
+                vencido = (
+                    indice_actual is not None
+                    and time.time() - indice_actual.cargado_en >= SegundometroConfig.RELOAD_MAX_AGE
+                )
+                if not forzar and not vencido and indice_actual is not None and indice_actual.huella == huella:
+                    completo = True
+                    return False
+                
+                inicio = time.perf_counter()
+                ids = array("q")
+                filas: List[FilaSegundometro] = []
+                ultimo_id = None
+                # Cursor sin búfer: las filas se procesan conforme llegan
+                with item.conn.cursor(pymysql.cursors.SSCursor) as cursor:
+                    ejecutar(cursor, "segundometro_carga")
+                    for row in cursor:
+                        id_credito = row[0]
+                        if id_credito is None or id_credito == ultimo_id:
+                            # Se conserva la primera fila de cada crédito
+                            continue
+                        ultimo_id = id_credito
+                        saldo = row[6]
+                        ids.append(id_credito)
+                        filas.append(FilaSegundometro(
+                            id_credito,
+                            row[1],
+                            row[2],
+                            row[3],
+                            sys.intern(row[4]) if isinstance(row[4], str) else row[4],
+                            row[5],
+                            float(saldo) if saldo is not None else None
+                        ))
+                completo = True
+                
+                self._indice = IndiceSegundometro(ids, filas, huella)
+                self.cargas += 1
+                self.ultima_duracion = time.perf_counter() - inicio
+                logger.info(
+                    "Réplica de tbl_segundometro_semana cargada: %s créditos en %.2f s",
+                    len(ids), self.ultima_duracion
+                )
+                return True
+            finally:
+                # Si la lectura se interrumpió quedan filas sin leer en el socket
+                pool.release(item, discard=not completo)
+    
+    async def refrescar_periodicamente(self) -> None:
+        """Tarea de fondo: carga inicial y revisión periódica de la huella"""
+        while True:
+            try:
+                await run_db(self.cargar)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.errores += 1
+                logger.warning("No se pudo refrescar la réplica de tbl_segundometro_semana: %s", e)
+            await asyncio.sleep(SegundometroConfig.REFRESH_INTERVAL)
+    
+    def stats(self) -> dict:
+        """Estadísticas de la réplica para monitoreo"""
+        indice = self._indice
+        return {
+            "habilitada": SegundometroConfig.ENABLED,
+            "disponible": indice is not None,
+            "creditos": len(indice) if indice is not None else 0,
+            "cargado_en": datetime.fromtimestamp(indice.cargado_en).isoformat() if indice is not None else None,
+            "cargas": self.cargas,
+            "revisiones": self.revisiones,
+            "errores": self.errores,
+            "consultas": self.consultas,
+            "ultima_duracion_segundos": round(self.ultima_duracion, 3)
+        }
+
+
+# Instancia compartida por la aplicación
+replica_segundometro = ReplicaSegundometro()
@@ -0,0 +1,644 @@
+"""
+Catálogo de sentencias SQL
+Todas las consultas del API con nombre y parámetros; los repositorios las
+ejecutan con `ejecutar(cursor, nombre, params, ...)`, así que cualquier
+instrumentación o cambio de ejecución aplica a todos los endpoints.
+"""
+
+import time
+from functools import lru_cache
+from typing import Dict, Sequence
+
+from utils.metricas import medir_sentencia
+from utils.tiempos import registrar
+
+
+# Filtros por estatus de condonación sobre gastos_cobranza (alias g)
+FILTROS_CONDONADO = {
+    "condonados": "AND g.condonado = 1",
+    "pendientes": "AND (g.condonado IS NULL OR g.condonado = 0)",
+    "todos": ""
+}
+
+_COLUMNA_STATUS = """,
+        CASE 
+            WHEN g.condonado = 1 THEN 'CONDONADO'
+            ELSE 'PENDIENTE'
+        END as status"""
+
+
+# Totales del resumen simple sobre gastos_cobranza (sin alias). Los usan el
+# agregado en vivo, el rollup por crédito y su verificación, así que las
+# tres rutas calculan exactamente lo mismo.
+_AGREGADO_RESUMEN = """
+    COUNT(*) AS total_parcialidades,
+
+    COALESCE(
+        SUM(
+            CASE 
+                WHEN condonado != 1 
+                     AND (estatus_pago != 2 OR estatus_pago IS NULL)
+                THEN (monto_valor - COALESCE(condonacion_parcial_monto, 0)) 
+                     - COALESCE(monto_parcial_pagado, 0)
+                ELSE 0
+            END
+        ), 
+    0) AS monto_total,
+
+    SUM(
+        CASE 
+            WHEN condonado = 1 THEN 1 
+            ELSE 0 
+        END
+    ) AS condonados,
+
+    SUM(
+        CASE 
+            WHEN condonado != 1 
+                 AND (estatus_pago != 2 OR estatus_pago IS NULL)
+            THEN 1 
+            ELSE 0 
+        END
+    ) AS pendientes
+"""
+
+
+# Filas después de la llave (periodo, id) en el orden periodo_inicio ASC, id ASC
+# (NULL primero). Parámetros: periodo, periodo, id, periodo. Con periodo NULL
+# siguen los NULL de id mayor y luego todos los periodos no nulos.
+_CONDICION_CURSOR = (
+    "AND (g.periodo_inicio > %s"
+    " OR (g.periodo_inicio <=> %s AND g.id > %s)"
+    " OR (%s IS NULL AND g.periodo_inicio IS NOT NULL))"
+)
+
+
+class Sentencia:
+    """
+    Sentencia del catálogo. La plantilla puede usar los marcadores:
+    
+    - {filtro}: condición de FILTROS_CONDONADO
+    - {columna_status}: columna status (CONDONADO/PENDIENTE) si se pide
+    - {marcadores}: "%s, %s, ..." para IN (...)
+    - {condicion_cursor}: condición de keyset sobre (periodo_inicio, id)
+    - {condiciones}: condiciones adicionales ya armadas
+    - {marca_semana}: MAX de la columna de semana del snapshot (o NULL)
+    """
+    
+    __slots__ = ("nombre", "plantilla", "descripcion", "database")
+    
+    def __init__(self, nombre: str, plantilla: str, descripcion: str, database: str = "db-mega-reporte"):
+        self.nombre = nombre
+        self.plantilla = plantilla
+        self.descripcion = descripcion
+        self.database = database
+
+
+CATALOGO: Dict[str, Sentencia] = {}
+
+
+def _registrar(nombre: str, plantilla: str, descripcion: str) -> None:
+    CATALOGO[nombre] = Sentencia(nombre, plantilla, descripcion)
+
+
+# Encabezado del cliente + detalle de gastos en una sola consulta.
+# El LEFT JOIN conserva el encabezado aunque el crédito no tenga gastos
+# (en ese caso la fila trae gasto_id_credito = NULL).
+_registrar("credito_con_gastos", """
+    SELECT 
+        s.id_credito,
+        s.nombre_cliente,
+        s.id_cliente,
+        s.domicilio_completo,
+        s.bucket_morosidad,
+        s.dias_mora,
+        s.saldo_vencido,
+        g.Id_credito as gasto_id_credito,
+        g.periodo_inicio as periodoinicio,
+        g.periodo_fin as periodofin,
+        g.SEMANA as semana,
+        g.parcialidad,
+        g.monto_valor,
+        g.cuota,
+        g.condonado,
+        g.fecha_condonacion{columna_status}
+    FROM (
+        SELECT 
+            Id_credito as id_credito,
+            Nombre_cliente as nombre_cliente,
+            Id_cliente as id_cliente,
+            Domicilio_Completo as domicilio_completo,
+            Bucket_Morosidad_Real as bucket_morosidad,
+            Dias_mora as dias_mora,
+            saldo_vencido_inicio as saldo_vencido
+        FROM tbl_segundometro_semana
+        WHERE Id_credito = %s
+        LIMIT 1
+    ) s
+    LEFT JOIN gastos_cobranza g
+      ON g.Id_credito = s.id_credito
+     {filtro}
+    ORDER BY g.periodo_inicio ASC
+""", "Datos generales y gastos de un crédito")
+
+_registrar("datos_generales_lote", """
+    SELECT 
+        Id_credito as id_credito,
+        Nombre_cliente as nombre_cliente,
+        Id_cliente as id_cliente,
+        Domicilio_Completo as domicilio_completo,
+        Bucket_Morosidad_Real as bucket_morosidad,
+        Dias_mora as dias_mora,
+        saldo_vencido_inicio as saldo_vencido
+    FROM tbl_segundometro_semana
+    WHERE Id_credito IN ({marcadores})
+""", "Datos generales de varios créditos")
+
+_registrar("gastos_lote", """
+    SELECT 
+        g.Id_credito as gasto_id_credito,
+        g.periodo_inicio as periodoinicio,
+        g.periodo_fin as periodofin,
+        g.SEMANA as semana,
+        g.parcialidad,
+        g.monto_valor,
+        g.cuota,
+        g.condonado,
+        g.fecha_condonacion{columna_status}
+    FROM gastos_cobranza g
+    WHERE g.Id_credito IN ({marcadores})
+      {filtro}
+    ORDER BY g.Id_credito ASC, g.periodo_inicio ASC
+""", "Gastos de varios créditos")
+
+_registrar("creditos_existentes_lote", """
+    SELECT DISTINCT Id_credito as id_credito
+    FROM tbl_segundometro_semana
+    WHERE Id_credito IN ({marcadores})
+""", "Créditos existentes de una lista")
+
+# Mismo agregado que resumen_simple, agrupado por crédito
+_registrar("resumen_simple_lote", """
+    SELECT
+    Id_credito as id_credito,
+""" + _AGREGADO_RESUMEN + """
+    FROM gastos_cobranza
+    WHERE Id_credito IN ({marcadores})
+    GROUP BY Id_credito
+""", "Totales de gastos de varios créditos")
+
+# Página de gastos (keyset sobre periodo_inicio, id) con el resumen del crédito
+# completo. Los conteos se calculan una sola vez dentro de la tabla derivada
+# del encabezado, así que no dependen de la página solicitada. El orden es el
+# nativo de MySQL (periodo_inicio NULL primero) y el id desempata periodos
+# repetidos; ambos salen del índice (Id_credito, periodo_inicio), que en
+# InnoDB incluye la llave primaria.
+_registrar("pagina_general", """
+    SELECT 
+        s.id_credito,
+        s.nombre_cliente,
+        s.id_cliente,
+        s.domicilio_completo,
+        s.bucket_morosidad,
+        s.dias_mora,
+        s.saldo_vencido,
+        s.total_registros,
+        s.condonados,
+        g.id as gasto_id,
+        g.periodo_inicio as periodoinicio,
+        g.periodo_fin as periodofin,
+        g.SEMANA as semana,
+        g.parcialidad,
+        g.monto_valor,
+        g.cuota,
+        g.condonado,
+        g.fecha_condonacion{columna_status}
+    FROM (
+        SELECT 
+            Id_credito as id_credito,
+            Nombre_cliente as nombre_cliente,
+            Id_cliente as id_cliente,
+            Domicilio_Completo as domicilio_completo,
+            Bucket_Morosidad_Real as bucket_morosidad,
+            Dias_mora as dias_mora,
+            saldo_vencido_inicio as saldo_vencido,
+            (
+                SELECT COUNT(*) FROM gastos_cobranza WHERE Id_credito = %s
+            ) as total_registros,
+            (
+                SELECT COUNT(*) FROM gastos_cobranza WHERE Id_credito = %s AND condonado = 1
+            ) as condonados
+        FROM tbl_segundometro_semana
+        WHERE Id_credito = %s
+        LIMIT 1
+    ) s
+    LEFT JOIN gastos_cobranza g
+      ON g.Id_credito = s.id_credito
+     {condicion_cursor}
+    ORDER BY g.periodo_inicio ASC, g.id ASC
+    LIMIT %s
+""", "Página de gastos con datos generales y conteos")
+
+# Existencia del crédito + totales de gastos_cobranza en una sola consulta.
+# Un agregado sin GROUP BY siempre retorna exactamente una fila.
+_registrar("resumen_simple", """
+    SELECT
+    (
+        SELECT Id_credito
+        FROM tbl_segundometro_semana
+        WHERE Id_credito = %s
+        LIMIT 1
+    ) AS id_credito_existe,
+""" + _AGREGADO_RESUMEN + """
+    FROM gastos_cobranza
+    WHERE Id_credito = %s
+""", "Existencia y totales de gastos de un crédito")
+
+# Encabezado del cliente + agregados de sus gastos en un solo recorrido
+# (sin transferir el detalle). Con el LEFT JOIN un crédito sin gastos
+# retorna una fila con total_registros = 0; si el crédito no existe no
+# retorna filas.
+_registrar("resumen_general", """
+    SELECT 
+        s.id_credito,
+        s.nombre_cliente,
+        s.id_cliente,
+        s.domicilio_completo,
+        s.bucket_morosidad,
+        s.dias_mora,
+        s.saldo_vencido,
+        COUNT(g.Id_credito) AS total_registros,
+        COALESCE(
+            SUM(
+                CASE 
+                    WHEN g.condonado = 1 THEN 1 
+                    ELSE 0 
+                END
+            ),
+        0) AS condonados,
+        MAX(g.fecha_condonacion) AS ultima_condonacion,
+        MAX(g.periodo_inicio) AS ultimo_periodo,
+        COALESCE(SUM(g.monto_valor), 0) AS suma_monto_valor,
+        COALESCE(SUM(g.cuota), 0) AS suma_cuota
+    FROM (
+        SELECT 
+            Id_credito as id_credito,
+            Nombre_cliente as nombre_cliente,
+            Id_cliente as id_cliente,
+            Domicilio_Completo as domicilio_completo,
+            Bucket_Morosidad_Real as bucket_morosidad,
+            Dias_mora as dias_mora,
+            saldo_vencido_inicio as saldo_vencido
+        FROM tbl_segundometro_semana
+        WHERE Id_credito = %s
+        LIMIT 1
+    ) s
+    LEFT JOIN gastos_cobranza g
+      ON g.Id_credito = s.id_credito
+     {filtro}
+    GROUP BY
+        s.id_credito,
+        s.nombre_cliente,
+        s.id_cliente,
+        s.domicilio_completo,
+        s.bucket_morosidad,
+        s.dias_mora,
+        s.saldo_vencido
+""", "Datos generales y agregados de gastos de un crédito")
+
+# Huella barata de los gastos de un crédito para ETag (sin leer el detalle)
+_registrar("huella_gastos", """
+    SELECT
+        COUNT(*) AS total,
+        COALESCE(
+            SUM(
+                CASE 
+                    WHEN g.condonado = 1 THEN 1 
+                    ELSE 0 
+                END
+            ),
+        0) AS condonados,
+        MAX(g.fecha_condonacion) AS ultima_condonacion,
+        MAX(g.periodo_inicio) AS ultimo_periodo,
+        COALESCE(SUM(g.monto_valor), 0) AS suma_monto_valor,
+        COALESCE(SUM(g.cuota), 0) AS suma_cuota
+    FROM gastos_cobranza g
+    WHERE g.Id_credito = %s
+      {filtro}
+""", "Huella de los gastos de un crédito (ETag)")
+
+_registrar("exportar_gastos", """
+    SELECT 
+        g.Id_credito as id_credito,
+        g.periodo_inicio as periodoinicio,
+        g.periodo_fin as periodofin,
+        g.SEMANA as semana,
+        g.parcialidad,
+        g.monto_valor,
+        g.cuota,
+        g.condonado,
+        g.fecha_condonacion{columna_status}
+    FROM gastos_cobranza g
+    WHERE 1 = 1
+      {condiciones}
+    ORDER BY g.Id_credito ASC, g.periodo_inicio ASC
+""", "Exportación de gastos de un segmento")
+
+_registrar("segundometro_carga", """
+    SELECT 
+        Id_credito,
+        Nombre_cliente,
+        Id_cliente,
+        Domicilio_Completo,
+        Bucket_Morosidad_Real,
+        Dias_mora,
+        saldo_vencido_inicio
+    FROM tbl_segundometro_semana
+    ORDER BY Id_credito ASC
+""", "Carga completa de la réplica de tbl_segundometro_semana")
+
+# Huella barata del snapshot: cambia cuando se recarga la semana. MIN y MAX
+# de columnas indexadas se resuelven con el extremo del índice, sin recorrer
+# la tabla ("Select tables optimized away" en EXPLAIN).
+_registrar("segundometro_huella", """
+    SELECT
+        MIN(Id_credito) AS min_id_credito,
+        MAX(Id_credito) AS max_id_credito,
+        {marca_semana} AS semana
+    FROM tbl_segundometro_semana
+""", "Huella del snapshot de tbl_segundometro_semana")
+
+# Rollup por crédito (resumen_gastos_credito). gastos_cobranza_cambios lo
+# llenan los triggers de gastos_cobranza; mientras un crédito tenga cambios
+# sin aplicar su fila del rollup puede estar atrasada y se usa el agregado
+# en vivo.
+_registrar("resumen_rollup", """
+    SELECT
+        (
+            SELECT Id_credito
+            FROM tbl_segundometro_semana
+            WHERE Id_credito = %s
+            LIMIT 1
+        ) AS id_credito_existe,
+        EXISTS (
+            SELECT 1 FROM gastos_cobranza_cambios WHERE Id_credito = %s
+        ) AS pendiente,
+        COALESCE(r.total_parcialidades, 0) AS total_parcialidades,
+        COALESCE(r.monto_total, 0) AS monto_total,
+        COALESCE(r.condonados, 0) AS condonados,
+        COALESCE(r.pendientes, 0) AS pendientes
+    FROM (SELECT 1) d
+    LEFT JOIN resumen_gastos_credito r ON r.Id_credito = %s
+""", "Existencia y totales de un crédito desde el rollup")
+
+_registrar("resumen_rollup_lote", """
+    SELECT
+        Id_credito as id_credito,
+        total_parcialidades,
+        monto_total,
+        condonados,
+        pendientes
+    FROM resumen_gastos_credito
+    WHERE Id_credito IN ({marcadores})
+""", "Totales de varios créditos desde el rollup")
+
+_registrar("rollup_pendientes_lote", """
+    SELECT DISTINCT Id_credito as id_credito
+    FROM gastos_cobranza_cambios
+    WHERE Id_credito IN ({marcadores})
+""", "Créditos de una lista con cambios sin aplicar al rollup")
+
+# Las dos tablas del rollup existen (scripts/resumen_credito.py migrar)
+_registrar("rollup_tablas", """
+    SELECT COUNT(*) AS tablas
+    FROM information_schema.TABLES
+    WHERE TABLE_SCHEMA = DATABASE()
+      AND TABLE_NAME IN ('resumen_gastos_credito', 'gastos_cobranza_cambios')
+""", "Tablas del rollup migradas")
+
+_registrar("rollup_bloqueo", """
+    SELECT GET_LOCK('resumen_gastos_credito', 0) AS obtenido
+""", "Bloqueo para que un solo proceso aplique cambios al rollup")
+
+_registrar("rollup_liberar", """
+    SELECT RELEASE_LOCK('resumen_gastos_credito') AS liberado
+""", "Libera el bloqueo del rollup")
+
+_registrar("rollup_cambios", """
+    SELECT id, Id_credito as id_credito
+    FROM gastos_cobranza_cambios
+    ORDER BY id ASC
+    LIMIT %s
+""", "Cambios de gastos_cobranza pendientes de aplicar al rollup")
+
+_registrar("rollup_cambios_total", """
+    SELECT COUNT(*) AS pendientes
+    FROM gastos_cobranza_cambios
+""", "Cambios sin aplicar al rollup")
+
+# Recalcula los créditos tocados desde gastos_cobranza; la fila vieja se
+# reemplaza completa, así que aplicar el mismo cambio dos veces no altera nada
+_registrar("rollup_recalcular_lote", """
+    INSERT INTO resumen_gastos_credito
+        (Id_credito, total_parcialidades, monto_total, condonados, pendientes)
+    SELECT
+    Id_credito,
+""" + _AGREGADO_RESUMEN + """
+    FROM gastos_cobranza
+    WHERE Id_credito IN ({marcadores})
+    GROUP BY Id_credito
+    ON DUPLICATE KEY UPDATE
+        total_parcialidades = VALUES(total_parcialidades),
+        monto_total = VALUES(monto_total),
+        condonados = VALUES(condonados),
+        pendientes = VALUES(pendientes)
+""", "Recalcula el rollup de varios créditos")
+
+_registrar("rollup_eliminar_sin_gastos", """
+    DELETE r
+    FROM resumen_gastos_credito r
+    WHERE r.Id_credito IN ({marcadores})
+      AND NOT EXISTS (
+          SELECT 1 FROM gastos_cobranza g WHERE g.Id_credito = r.Id_credito
+      )
+""", "Quita del rollup los créditos que ya no tienen gastos")
+
+_registrar("rollup_cambios_aplicados", """
+    DELETE FROM gastos_cobranza_cambios
+    WHERE id IN ({marcadores})
+""", "Borra los cambios ya aplicados al rollup")
+
+_registrar("rollup_rango", """
+    SELECT MIN(Id_credito) AS minimo, MAX(Id_credito) AS maximo
+    FROM (
+        SELECT MIN(Id_credito) AS Id_credito FROM gastos_cobranza
+        UNION ALL SELECT MAX(Id_credito) FROM gastos_cobranza
+        UNION ALL SELECT MIN(Id_credito) FROM resumen_gastos_credito
+        UNION ALL SELECT MAX(Id_credito) FROM resumen_gastos_credito
+    ) extremos
+""", "Rango de Id_credito en gastos_cobranza y en el rollup")
+
+_registrar("rollup_reconstruir_rango", """
+    INSERT INTO resumen_gastos_credito
+        (Id_credito, total_parcialidades, monto_total, condonados, pendientes)
+    SELECT
+    Id_credito,
+""" + _AGREGADO_RESUMEN + """
+    FROM gastos_cobranza
+    WHERE Id_credito BETWEEN %s AND %s
+    GROUP BY Id_credito
+    ON DUPLICATE KEY UPDATE
+        total_parcialidades = VALUES(total_parcialidades),
+        monto_total = VALUES(monto_total),
+        condonados = VALUES(condonados),
+        pendientes = VALUES(pendientes)
+""", "Reconstruye el rollup de un rango de créditos")
+
+_registrar("rollup_eliminar_huerfanos_rango", """
+    DELETE r
+    FROM resumen_gastos_credito r
+    WHERE r.Id_credito BETWEEN %s AND %s
+      AND NOT EXISTS (
+          SELECT 1 FROM gastos_cobranza g WHERE g.Id_credito = r.Id_credito
+      )
+""", "Quita del rollup los créditos sin gastos de un rango")
+
+# Verificación: agregado en vivo contra el rollup en un rango de créditos.
+# Se omiten los créditos con cambios sin aplicar (su diferencia es esperada).
+_registrar("rollup_diferencias_rango", """
+    SELECT
+        v.Id_credito as id_credito,
+        v.total_parcialidades, v.monto_total, v.condonados, v.pendientes,
+        r.total_parcialidades AS rollup_total_parcialidades,
+        r.monto_total AS rollup_monto_total,
+        r.condonados AS rollup_condonados,
+        r.pendientes AS rollup_pendientes
+    FROM (
+        SELECT
+        Id_credito,
+""" + _AGREGADO_RESUMEN + """
+        FROM gastos_cobranza
+        WHERE Id_credito BETWEEN %s AND %s
+        GROUP BY Id_credito
+    ) v
+    LEFT JOIN resumen_gastos_credito r ON r.Id_credito = v.Id_credito
+    WHERE NOT EXISTS (
+              SELECT 1 FROM gastos_cobranza_cambios c WHERE c.Id_credito = v.Id_credito
+          )
+      AND (
+              r.Id_credito IS NULL
+              OR NOT (r.total_parcialidades <=> v.total_parcialidades)
+              OR NOT (r.monto_total <=> v.monto_total)
+              OR NOT (r.condonados <=> v.condonados)
+              OR NOT (r.pendientes <=> v.pendientes)
+          )
+""", "Créditos cuyo rollup no coincide con el agregado en vivo")
+
+_registrar("rollup_huerfanos_rango", """
+    SELECT r.Id_credito as id_credito
+    FROM resumen_gastos_credito r
+    WHERE r.Id_credito BETWEEN %s AND %s
+      AND NOT EXISTS (
+          SELECT 1 FROM gastos_cobranza g WHERE g.Id_credito = r.Id_credito
+      )
+      AND NOT EXISTS (
+          SELECT 1 FROM gastos_cobranza_cambios c WHERE c.Id_credito = r.Id_credito
+      )
+""", "Filas del rollup de créditos sin gastos")
+
+# Diagnóstico de índices (repositories/indices.py)
+_registrar("indices_muestra", """
+    SELECT MAX(Id_credito) AS id_credito
+    FROM tbl_segundometro_semana
+""", "Id_credito de muestra para EXPLAIN")
+
+_registrar("indices_existentes", """
+    SELECT
+        TABLE_NAME AS tabla,
+        INDEX_NAME AS indice,
+        COLUMN_NAME AS columna
+    FROM information_schema.STATISTICS
+    WHERE TABLE_SCHEMA = DATABASE()
+      AND TABLE_NAME IN ({marcadores})
+    ORDER BY TABLE_NAME, INDEX_NAME, SEQ_IN_INDEX
+""", "Índices existentes de las tablas consultadas")
+
+# Verificación del esquema al iniciar (repositories/condonaciones.py)
+_registrar("columnas_existentes", """
+    SELECT
+        TABLE_NAME AS tabla,
+        COLUMN_NAME AS columna,
+        COLUMN_KEY AS llave
+    FROM information_schema.COLUMNS
+    WHERE TABLE_SCHEMA = DATABASE()
+      AND TABLE_NAME IN ({marcadores})
+""", "Columnas existentes de las tablas consultadas")
+
+
+@lru_cache(maxsize=1024)
+def sql(
+    nombre: str,
+    filtro: str = "todos",
+    incluir_status: bool = False,
+    marcadores: int = 1,
+    con_cursor: bool = False,
+    condiciones: str = "",
+    columna_semana: str = ""
+) -> str:
+    """
+    Arma (y memoriza) el texto SQL de una sentencia del catálogo.
+    
+    Args:
+        nombre: Nombre de la sentencia en CATALOGO
+        filtro: 'condonados', 'pendientes' o 'todos'
+        incluir_status: Agrega la columna status (CONDONADO/PENDIENTE)
+        marcadores: Número de parámetros de IN (...)
+        con_cursor: Agrega la condición de keyset sobre (periodo_inicio, id)
+        condiciones: Condiciones adicionales (exportación)
+        columna_semana: Columna de semana del snapshot para la huella
+    
+    Returns:
+        Texto SQL parametrizado
+    
+    Raises:
+        KeyError: Si la sentencia o el filtro no existen
+        ValueError: Si columna_semana no es un identificador
+    """
+    if columna_semana and not columna_semana.isidentifier():
+        raise ValueError(f"Columna de semana inválida: {columna_semana!r}")
+    return CATALOGO[nombre].plantilla.format(
+        filtro=FILTROS_CONDONADO[filtro],
+        columna_status=_COLUMNA_STATUS if incluir_status else "",
+        marcadores=", ".join(["%s"] * marcadores),
+        condicion_cursor=_CONDICION_CURSOR if con_cursor else "",
+        condiciones=condiciones,
+        marca_semana=f"MAX(`{columna_semana}`)" if columna_semana else "NULL"
+    )
+
+
+def ejecutar(cursor, nombre: str, params: Sequence = (), **variantes) -> int:
+    """
+    Ejecuta una sentencia del catálogo en el cursor dado y registra su
+    duración en las métricas (`condonaciones_db_query_duration_seconds`) y
+    en el Server-Timing de la petición.
+    
+    Args:
+        cursor: Cursor de pymysql
+        nombre: Nombre de la sentencia en CATALOGO
+        params: Parámetros de la sentencia
+        **variantes: Argumentos de `sql` (filtro, incluir_status, marcadores, ...)
+    
+    Returns:
+        Filas afectadas/encontradas que reporta el cursor
+    """
+    texto = sql(nombre, **variantes)
+    inicio = time.perf_counter()
+    try:
+        filas = cursor.execute(texto, params)
+    except Exception as e:
+        medir_sentencia(nombre, time.perf_counter() - inicio, e)
+        raise
+    duracion = time.perf_counter() - inicio
+    medir_sentencia(nombre, duracion)
+    registrar("db", duracion, nombre)
+    return filas
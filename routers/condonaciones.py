@@ -3,30 +3,198 @@ Router de Condonaciones
 Endpoints para gestión de condonaciones de crédito
 """
 
-from fastapi import APIRouter, HTTPException, Depends, Path, Security
-from typing import Optional
+from fastapi import APIRouter, HTTPException, Path, Query, Security, Body, Request, Response
+from fastapi.responses import StreamingResponse
+from typing import AsyncIterator, List, Optional, Tuple
 from datetime import date
-import pymysql
-import httpx
+from http import HTTPStatus
+import asyncio
+import logging
+import time
+import os
 
 from models.condonaciones import (
     CondonacionResponse,
-    ErrorResponse,
-    DatosGenerales,
-    CondonacionCobranza,
-    DetalleCondonacion,
-    ResumenSimpleResponse
+    ResumenSimpleResponse,
+    BatchCondonacionRequest,
+    BatchCondonacionResponse,
+    BatchResumenSimpleRequest,
+    ErrorCreditoBatch
 )
-from config.database import get_db_connection
-from config.security import verify_api_key
+from config.database import run_db
+from config.security import verify_api_key, verify_admin_api_key
 from utils.validations import validar_id_credito, validar_datos_encontrados
+from repositories.condonaciones import (
+    obtener_credito_con_gastos,
+    obtener_creditos_con_gastos,
+    obtener_huella_credito,
+    obtener_pagina_general,
+    obtener_resumen_simple,
+    obtener_resumenes_simples,
+    ExportacionGastos,
+    ExportacionesOcupadasError
+)
+from repositories.mappers import (
+    datos_generales_general,
+    datos_generales_modelo,
+    detalle_general,
+    detalle_modelo,
+    fila_exportacion
+)
+from services.estadocuenta import (
+    EstadoCuentaConfig,
+    consultar_datos_saldos,
+    purgar_cache_credito,
+    cache_stats
+)
+from utils.singleflight import coalescedor
+from utils.paginacion import codificar_cursor, decodificar_cursor
+from utils.serializacion import dumps, respuesta_json
+from utils.errores import traducir_error, traducir_errores
+from utils.tiempos import medir
+from utils.http_cache import (
+    HttpCacheConfig,
+    agregar_encabezados_cache,
+    calcular_etag,
+    etag_coincide,
+    huella_desde_detalles,
+    respuesta_no_modificada
+)
 
 router = APIRouter()
 
-# URL y valor fijo de la API externa
-API_EXTERNA_URL = "https://servicios.s2movil.net/s2maxikash/estadocuenta"
+logger = logging.getLogger(__name__)
+
+# Valor fijo del cargo por pago tardío
 CARGO_PAGO_TARDIO = 250.00
 
+# Máximo de créditos por petición en los endpoints por lote
+BATCH_MAX_IDS = int(os.getenv("BATCH_MAX_IDS", "1000"))
+
+# Máximo de registros por página en el endpoint general
+GENERAL_MAX_LIMIT = int(os.getenv("GENERAL_MAX_LIMIT", "500"))
+
+
+def _respuesta_condonacion(mensaje: str, datos_generales_row: dict, detalles: list) -> dict:
+    """Contenido con el formato de CondonacionResponse"""
+    return {
+        "status_code": 200,
+        "status_message": "OK",
+        "success": True,
+        "mensaje": mensaje,
+        "datos_generales": datos_generales_modelo(datos_generales_row),
+        "condonacion_cobranza": {"detalle": detalles}
+    }
+
+
+def _mensaje_detalle(filtro: str, total: int) -> str:
+    """Mensaje de respuesta según el filtro de gastos consultado"""
+    if filtro == "pendientes":
+        return f"Se encontraron {total} gastos pendientes de condonación"
+    if filtro == "todos":
+        return f"Se encontraron {total} registros"
+    return f"Se encontraron {total} gastos condonados" if total else "No hay gastos condonados para este crédito"
+
+
+async def _respuesta_si_no_modificado(
+    request: Request,
+    variante: str,
+    id_credito: int,
+    filtro: str
+) -> Optional[Response]:
+    """
+    Si el cliente envía If-None-Match con el ETag vigente, retorna un 304
+    usando solo la huella del crédito (sin leer el detalle ni construir modelos).
+    
+    Returns:
+        Respuesta 304 o None si hay que construir la respuesta completa
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if not HttpCacheConfig.ETAG_ENABLED or not if_none_match:
+        return None
+    
+    encontrado = await run_db(obtener_huella_credito, id_credito, filtro)
+    if encontrado is None:
+        # El crédito no existe: la ruta normal responde el 404
+        return None
+    
+    etag = calcular_etag(variante, *encontrado)
+    return respuesta_no_modificada(etag) if etag_coincide(if_none_match, etag) else None
+
+
+def _etag_credito(variante: str, datos_generales_row: dict, detalles_rows: List[dict]) -> Optional[str]:
+    """ETag de una respuesta completa, calculado sobre las filas ya consultadas"""
+    if not HttpCacheConfig.ETAG_ENABLED:
+        return None
+    return calcular_etag(variante, datos_generales_row, huella_desde_detalles(detalles_rows))
+
+
+# Endpoints de detalle: filtro de gastos_cobranza y mensaje de respuesta por variante
+_VARIANTES_DETALLE = {
+    "condonaciones": ("condonados", lambda total: _mensaje_detalle("condonados", total)),
+    "solo-condonados": ("condonados", lambda total: f"Se encontraron {total} gastos condonados"),
+    "pendientes": ("pendientes", lambda total: _mensaje_detalle("pendientes", total))
+}
+
+
+async def _responder_detalle(request: Request, variante: str, id_credito: int) -> Response:
+    """
+    Flujo común de los endpoints de detalle: validación, 304 condicional,
+    consulta, mapeo de filas, serialización y headers de caché.
+    
+    Args:
+        request: Petición (para If-None-Match)
+        variante: Llave de _VARIANTES_DETALLE
+        id_credito: ID del crédito a consultar
+    
+    Returns:
+        Respuesta JSON con el formato de CondonacionResponse (o 304)
+    """
+    filtro, mensaje = _VARIANTES_DETALLE[variante]
+    with medir("validacion"):
+        validar_id_credito(id_credito)
+    
+    no_modificado = await _respuesta_si_no_modificado(request, variante, id_credito, filtro)
+    if no_modificado is not None:
+        return no_modificado
+    
+    datos_generales_row, detalles_rows = await run_db(obtener_credito_con_gastos, id_credito, filtro)
+    validar_datos_encontrados(datos_generales_row, 'cliente', id_credito)
+    detalles = [detalle_modelo(row) for row in detalles_rows]
+    
+    respuesta = respuesta_json(_respuesta_condonacion(mensaje(len(detalles)), datos_generales_row, detalles))
+    agregar_encabezados_cache(respuesta, _etag_credito(variante, datos_generales_row, detalles))
+    return respuesta
+
+
+def _ids_unicos(ids_credito: list) -> list:
+    """Quita IDs repetidos conservando el orden y valida el tamaño del lote"""
+    ids = list(dict.fromkeys(ids_credito))
+    if len(ids) > BATCH_MAX_IDS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Se permiten máximo {BATCH_MAX_IDS} créditos por petición (recibidos: {len(ids)})"
+        )
+    return ids
+
+
+def _validar_lote(ids: list) -> Tuple[list, dict]:
+    """
+    Valida cada ID del lote por separado.
+    
+    Returns:
+        Tupla (IDs válidos, {id_credito: HTTPException} de los inválidos)
+    """
+    errores = {}
+    validos = []
+    for id_credito in ids:
+        try:
+            validar_id_credito(id_credito)
+            validos.append(id_credito)
+        except HTTPException as e:
+            errores[id_credito] = e
+    return validos, errores
+
 
 @router.get(
     "/condonaciones/{id_credito}",
@@ -41,71 +209,86 @@ CARGO_PAGO_TARDIO = 250.00
     summary="Obtener información de condonación por ID de crédito",
     description="Retorna los gastos de cobranza CONDONADOS (condonado=1). Si no hay gastos condonados, retorna array vacío."
 )
+@traducir_errores
 async def get_condonacion_por_credito(
+    request: Request,
     id_credito: int = Path(..., description="ID del crédito a consultar", gt=0),
     api_key: str = Security(verify_api_key)
 ):
-    try:
-        validar_id_credito(id_credito)
-        
-        with get_db_connection(database="db-mega-reporte") as conn:
-            with conn.cursor() as cursor:
-                query_datos_generales = """
-                    SELECT 
-                        Id_credito as id_credito,
-                        Nombre_cliente as nombre_cliente,
-                        Id_cliente as id_cliente,
-                        Domicilio_Completo as domicilio_completo,
-                        Bucket_Morosidad_Real as bucket_morosidad,
-                        Dias_mora as dias_mora,
-                        saldo_vencido_inicio as saldo_vencido
-                    FROM tbl_segundometro_semana
-                    WHERE Id_credito = %s
-                    LIMIT 1
-                """
-                cursor.execute(query_datos_generales, (id_credito,))
-                datos_generales_row = cursor.fetchone()
-                validar_datos_encontrados(datos_generales_row, 'cliente', id_credito)
-                datos_generales = DatosGenerales(**datos_generales_row)
-        
-        with get_db_connection(database="db-mega-reporte") as conn:
-            with conn.cursor() as cursor:
-                query_gastos = """
-                    SELECT 
-                        periodo_inicio as periodoinicio,
-                        periodo_fin as periodofin,
-                        SEMANA as semana,
-                        parcialidad,
-                        monto_valor,
-                        cuota,
-                        condonado,
-                        fecha_condonacion
-                    FROM gastos_cobranza
-                    WHERE Id_credito = %s
-                      AND condonado = 1
-                    ORDER BY periodo_inicio ASC
-                """
-                cursor.execute(query_gastos, (id_credito,))
-                detalles_rows = cursor.fetchall()
-                detalles = [DetalleCondonacion(**row) for row in detalles_rows]
-                condonacion_cobranza = CondonacionCobranza(detalle=detalles)
+    return await _responder_detalle(request, "condonaciones", id_credito)
+
+
+@router.post(
+    "/condonaciones/batch",
+    response_model=BatchCondonacionResponse,
+    responses={
+        200: {"description": "Éxito - Resultados y errores por crédito"},
+        400: {"description": "Bad Request - Demasiados créditos en la petición"},
+        401: {"description": "No Autenticado - API Key inválida o faltante"},
+        422: {"description": "Entidad no procesable - Cuerpo inválido"},
+        500: {"description": "Error del Servidor - Error interno"}
+    },
+    summary="Consultar condonaciones de varios créditos",
+    description=(
+        "Resuelve una lista de créditos en una sola llamada usando consultas por conjunto (IN) "
+        "en bloques de BATCH_CHUNK_SIZE. Retorna un resultado por crédito; los IDs inválidos o "
+        "inexistentes se reportan como error individual sin afectar al resto."
+    )
+)
+@traducir_errores
+async def post_condonaciones_batch(
+    peticion: BatchCondonacionRequest = Body(...),
+    api_key: str = Security(verify_api_key)
+):
+    with medir("validacion"):
+        ids = _ids_unicos(peticion.ids_credito)
+        validos, errores = _validar_lote(ids)
+    
+    encontrados = await run_db(obtener_creditos_con_gastos, validos, peticion.filtro) if validos else {}
+    
+    resultados = []
+    for id_credito in ids:
+        if id_credito not in errores and id_credito not in encontrados:
+            try:
+                validar_datos_encontrados(None, 'cliente', id_credito)
+            except HTTPException as e:
+                errores[id_credito] = e
         
-        mensaje = f"Se encontraron {len(detalles)} gastos condonados" if detalles else "No hay gastos condonados para este crédito"
-        return CondonacionResponse(
-            status_code=200,
-            status_message="OK",
-            success=True,
-            mensaje=mensaje,
-            datos_generales=datos_generales,
-            condonacion_cobranza=condonacion_cobranza
-        )
+        # Mismo formato que ResultadoCreditoBatch
+        if id_credito in errores:
+            error = errores[id_credito]
+            resultados.append({
+                "id_credito": id_credito,
+                "status_code": error.status_code,
+                "success": False,
+                "mensaje": str(error.detail),
+                "datos_generales": None,
+                "condonacion_cobranza": None
+            })
+            continue
         
-    except HTTPException:
-        raise
-    except pymysql.Error as db_error:
-        raise HTTPException(status_code=500, detail=f"Error de base de datos: {str(db_error)}")
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error interno del servidor: {str(e)}")
+        datos_generales_row, detalles_rows = encontrados[id_credito]
+        detalles = [detalle_modelo(row) for row in detalles_rows]
+        resultados.append({
+            "id_credito": id_credito,
+            "status_code": 200,
+            "success": True,
+            "mensaje": _mensaje_detalle(peticion.filtro, len(detalles)),
+            "datos_generales": datos_generales_modelo(datos_generales_row),
+            "condonacion_cobranza": {"detalle": detalles}
+        })
+    
+    total_errores = len(errores)
+    return respuesta_json({
+        "status_code": 200,
+        "status_message": "OK",
+        "success": True,
+        "mensaje": f"Se procesaron {len(ids)} créditos: {len(ids) - total_errores} exitosos, {total_errores} con error",
+        "total_solicitados": len(ids),
+        "total_exitosos": len(ids) - total_errores,
+        "total_errores": total_errores,
+        "resultados": resultados
+    })
 
 
 @router.get(
@@ -121,70 +304,13 @@ async def get_condonacion_por_credito(
     summary="Obtener solo gastos condonados",
     description="Retorna únicamente los gastos que ya fueron condonados (condonado = 1). Igual al endpoint principal."
 )
+@traducir_errores
 async def get_solo_condonados(
+    request: Request,
     id_credito: int = Path(..., description="ID del crédito a consultar", gt=0),
     api_key: str = Security(verify_api_key)
 ):
-    try:
-        validar_id_credito(id_credito)
-        
-        with get_db_connection(database="db-mega-reporte") as conn:
-            with conn.cursor() as cursor:
-                query_datos_generales = """
-                    SELECT 
-                        Id_credito as id_credito,
-                        Nombre_cliente as nombre_cliente,
-                        Id_cliente as id_cliente,
-                        Domicilio_Completo as domicilio_completo,
-                        Bucket_Morosidad_Real as bucket_morosidad,
-                        Dias_mora as dias_mora,
-                        saldo_vencido_inicio as saldo_vencido
-                    FROM tbl_segundometro_semana
-                    WHERE Id_credito = %s
-                    LIMIT 1
-                """
-                cursor.execute(query_datos_generales, (id_credito,))
-                datos_generales_row = cursor.fetchone()
-                validar_datos_encontrados(datos_generales_row, 'cliente', id_credito)
-                datos_generales = DatosGenerales(**datos_generales_row)
-        
-        with get_db_connection(database="db-mega-reporte") as conn:
-            with conn.cursor() as cursor:
-                query_gastos = """
-                    SELECT 
-                        periodo_inicio as periodoinicio,
-                        periodo_fin as periodofin,
-                        SEMANA as semana,
-                        parcialidad,
-                        monto_valor,
-                        cuota,
-                        condonado,
-                        fecha_condonacion
-                    FROM gastos_cobranza
-                    WHERE Id_credito = %s
-                      AND condonado = 1
-                    ORDER BY periodo_inicio ASC
-                """
-                cursor.execute(query_gastos, (id_credito,))
-                detalles_rows = cursor.fetchall()
-                detalles = [DetalleCondonacion(**row) for row in detalles_rows]
-                condonacion_cobranza = CondonacionCobranza(detalle=detalles)
-        
-        return CondonacionResponse(
-            status_code=200,
-            status_message="OK",
-            success=True,
-            mensaje=f"Se encontraron {len(detalles)} gastos condonados",
-            datos_generales=datos_generales,
-            condonacion_cobranza=condonacion_cobranza
-        )
-        
-    except HTTPException:
-        raise
-    except pymysql.Error as db_error:
-        raise HTTPException(status_code=500, detail=f"Error de base de datos: {str(db_error)}")
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error interno del servidor: {str(e)}")
+    return await _responder_detalle(request, "solo-condonados", id_credito)
 
 
 @router.get(
@@ -200,70 +326,124 @@ async def get_solo_condonados(
     summary="Obtener solo gastos pendientes de condonar",
     description="Retorna únicamente los gastos que NO han sido condonados (condonado = 0 o NULL)"
 )
+@traducir_errores
 async def get_pendientes_condonacion(
+    request: Request,
     id_credito: int = Path(..., description="ID del crédito a consultar", gt=0),
     api_key: str = Security(verify_api_key)
 ):
-    try:
-        validar_id_credito(id_credito)
-        
-        with get_db_connection(database="db-mega-reporte") as conn:
-            with conn.cursor() as cursor:
-                query_datos_generales = """
-                    SELECT 
-                        Id_credito as id_credito,
-                        Nombre_cliente as nombre_cliente,
-                        Id_cliente as id_cliente,
-                        Domicilio_Completo as domicilio_completo,
-                        Bucket_Morosidad_Real as bucket_morosidad,
-                        Dias_mora as dias_mora,
-                        saldo_vencido_inicio as saldo_vencido
-                    FROM tbl_segundometro_semana
-                    WHERE Id_credito = %s
-                    LIMIT 1
-                """
-                cursor.execute(query_datos_generales, (id_credito,))
-                datos_generales_row = cursor.fetchone()
-                validar_datos_encontrados(datos_generales_row, 'cliente', id_credito)
-                datos_generales = DatosGenerales(**datos_generales_row)
-        
-        with get_db_connection(database="db-mega-reporte") as conn:
-            with conn.cursor() as cursor:
-                query_gastos = """
-                    SELECT 
-                        periodo_inicio as periodoinicio,
-                        periodo_fin as periodofin,
-                        SEMANA as semana,
-                        parcialidad,
-                        monto_valor,
-                        cuota,
-                        condonado,
-                        fecha_condonacion
-                    FROM gastos_cobranza
-                    WHERE Id_credito = %s
-                      AND (condonado IS NULL OR condonado = 0)
-                    ORDER BY periodo_inicio ASC
-                """
-                cursor.execute(query_gastos, (id_credito,))
-                detalles_rows = cursor.fetchall()
-                detalles = [DetalleCondonacion(**row) for row in detalles_rows]
-                condonacion_cobranza = CondonacionCobranza(detalle=detalles)
-        
-        return CondonacionResponse(
-            status_code=200,
-            status_message="OK",
-            success=True,
-            mensaje=f"Se encontraron {len(detalles)} gastos pendientes de condonación",
-            datos_generales=datos_generales,
-            condonacion_cobranza=condonacion_cobranza
-        )
-        
-    except HTTPException:
-        raise
-    except pymysql.Error as db_error:
-        raise HTTPException(status_code=500, detail=f"Error de base de datos: {str(db_error)}")
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error interno del servidor: {str(e)}")
+    return await _responder_detalle(request, "pendientes", id_credito)
+
+
+async def _consultar_general(id_credito: int) -> Tuple[bytes, Optional[str]]:
+    """
+    Construye la respuesta del endpoint general (todos los gastos con STATUS).
+    Se serializa aquí para que las peticiones coalescidas compartan el JSON.
+    
+    Args:
+        id_credito: ID del crédito ya validado
+    
+    Returns:
+        Tupla (JSON de respuesta, ETag)
+    """
+    datos_generales_row, gastos_rows = await run_db(
+        obtener_credito_con_gastos, id_credito, "todos", incluir_status=True
+    )
+    validar_datos_encontrados(datos_generales_row, 'cliente', id_credito)
+    datos_generales = datos_generales_general(datos_generales_row)
+    
+    detalles = [detalle_general(row) for row in gastos_rows]
+    etag = _etag_credito("general", datos_generales_row, detalles)
+    
+    total_registros = len(detalles)
+    condonados = sum(1 for d in detalles if d['condonado'] == 1)
+    pendientes = total_registros - condonados
+    
+    return dumps({
+        "status_code": 200,
+        "status_message": "OK",
+        "success": True,
+        "mensaje": f"Se encontraron {total_registros} registros",
+        "datos_generales": datos_generales,
+        "resumen": {
+            "total_registros": total_registros,
+            "condonados": condonados,
+            "pendientes": pendientes
+        },
+        "detalle": detalles
+    }), etag
+
+
+async def _consultar_general_paginado(id_credito: int, limit: int, cursor: Optional[str]) -> Tuple[bytes, Optional[str]]:
+    """
+    Construye una página del endpoint general. El resumen se calcula sobre
+    todos los gastos del crédito, no solo sobre la página. Las páginas no
+    llevan ETag.
+    
+    Args:
+        id_credito: ID del crédito ya validado
+        limit: Máximo de registros de detalle en la página
+        cursor: Cursor opaco de la página anterior (None para la primera)
+    
+    Returns:
+        Tupla (JSON de respuesta con la sección "paginacion", None)
+    """
+    despues_de = decodificar_cursor(cursor) if cursor else None
+    datos_generales_row, gastos_rows, resumen, hay_mas, llave_siguiente = await run_db(
+        obtener_pagina_general, id_credito, limit, despues_de
+    )
+    validar_datos_encontrados(datos_generales_row, 'cliente', id_credito)
+    
+    siguiente_cursor = codificar_cursor(*llave_siguiente) if hay_mas else None
+    
+    return dumps({
+        "status_code": 200,
+        "status_message": "OK",
+        "success": True,
+        "mensaje": f"Se encontraron {resumen['total_registros']} registros",
+        "datos_generales": datos_generales_general(datos_generales_row),
+        "resumen": resumen,
+        "detalle": [detalle_general(row) for row in gastos_rows],
+        "paginacion": {
+            "limit": limit,
+            "siguiente_cursor": siguiente_cursor,
+            "tiene_mas": hay_mas
+        }
+    }), None
+
+
+async def _consultar_general_resumen(id_credito: int) -> Tuple[bytes, Optional[str]]:
+    """
+    Construye la respuesta del endpoint general sin detalle: el resumen sale
+    de una consulta agregada, así que no se transfiere ninguna fila de
+    gastos_cobranza.
+    
+    Args:
+        id_credito: ID del crédito ya validado
+    
+    Returns:
+        Tupla (JSON de respuesta sin "detalle", ETag)
+    """
+    encontrado = await run_db(obtener_huella_credito, id_credito, "todos")
+    validar_datos_encontrados(encontrado, 'cliente', id_credito)
+    datos_generales_row, huella = encontrado
+    
+    total_registros = int(huella["total"])
+    condonados = int(huella["condonados"])
+    etag = calcular_etag("general-resumen", datos_generales_row, huella) if HttpCacheConfig.ETAG_ENABLED else None
+    
+    return dumps({
+        "status_code": 200,
+        "status_message": "OK",
+        "success": True,
+        "mensaje": f"Se encontraron {total_registros} registros",
+        "datos_generales": datos_generales_general(datos_generales_row),
+        "resumen": {
+            "total_registros": total_registros,
+            "condonados": condonados,
+            "pendientes": total_registros - condonados
+        }
+    }), etag
 
 
 @router.get(
@@ -276,104 +456,121 @@ async def get_pendientes_condonacion(
         500: {"description": "Error del Servidor - Error interno"}
     },
     summary="Obtener información general con STATUS",
-    description="Retorna TODOS los gastos (condonados y pendientes) con un campo STATUS que indica 'CONDONADO' o 'PENDIENTE'"
+    description=(
+        "Retorna TODOS los gastos (condonados y pendientes) con un campo STATUS que indica 'CONDONADO' o 'PENDIENTE'. "
+        "Opcionalmente pagina el detalle por periodo_inicio: envía `limit` y, para las páginas siguientes, "
+        "el `siguiente_cursor` recibido. El resumen siempre cuenta todos los gastos del crédito. "
+        "Con `solo_resumen=true` retorna solo los datos generales y el resumen (sin `detalle`), "
+        "calculado con una consulta agregada."
+    )
 )
+@traducir_errores
 async def get_general(
+    request: Request,
     id_credito: int = Path(..., description="ID del crédito a consultar", gt=0),
+    limit: Optional[int] = Query(None, gt=0, le=GENERAL_MAX_LIMIT, description="Registros de detalle por página (activa la paginación)"),
+    cursor: Optional[str] = Query(None, description="Cursor opaco devuelto en paginacion.siguiente_cursor"),
+    solo_resumen: bool = Query(False, description="Retorna solo datos generales y resumen, sin detalle"),
     api_key: str = Security(verify_api_key)
 ):
-    try:
+    with medir("validacion"):
         validar_id_credito(id_credito)
         
-        with get_db_connection(database="db-mega-reporte") as conn:
-            with conn.cursor() as cursor:
-                query_datos_generales = """
-                    SELECT 
-                        Id_credito as id_credito,
-                        Nombre_cliente as nombre_cliente,
-                        Id_cliente as id_cliente,
-                        Domicilio_Completo as domicilio_completo,
-                        Bucket_Morosidad_Real as bucket_morosidad,
-                        Dias_mora as dias_mora,
-                        saldo_vencido_inicio as saldo_vencido
-                    FROM tbl_segundometro_semana
-                    WHERE Id_credito = %s
-                    LIMIT 1
-                """
-                cursor.execute(query_datos_generales, (id_credito,))
-                datos_generales_row = cursor.fetchone()
-                validar_datos_encontrados(datos_generales_row, 'cliente', id_credito)
-                datos_generales = {
-                    "id_credito": datos_generales_row['id_credito'],
-                    "nombre_cliente": datos_generales_row['nombre_cliente'],
-                    "id_cliente": datos_generales_row['id_cliente'],
-                    "domicilio_completo": datos_generales_row['domicilio_completo'],
-                    "bucket_morosidad": datos_generales_row['bucket_morosidad'],
-                    "dias_mora": datos_generales_row['dias_mora'],
-                    "saldo_vencido": float(datos_generales_row['saldo_vencido']) if datos_generales_row['saldo_vencido'] else 0
-                }
-        
-        with get_db_connection(database="db-mega-reporte") as conn:
-            with conn.cursor() as cursor:
-                query_gastos = """
-                    SELECT 
-                        periodo_inicio as periodoinicio,
-                        periodo_fin as periodofin,
-                        SEMANA as semana,
-                        parcialidad,
-                        monto_valor,
-                        cuota,
-                        condonado,
-                        fecha_condonacion,
-                        CASE 
-                            WHEN condonado = 1 THEN 'CONDONADO'
-                            ELSE 'PENDIENTE'
-                        END as status
-                    FROM gastos_cobranza
-                    WHERE Id_credito = %s
-                    ORDER BY periodo_inicio ASC
-                """
-                cursor.execute(query_gastos, (id_credito,))
-                gastos_rows = cursor.fetchall()
-                
-                detalles = []
-                for row in gastos_rows:
-                    detalles.append({
-                        "periodoinicio": row['periodoinicio'].strftime("%Y-%m-%d") if row['periodoinicio'] else None,
-                        "periodofin": row['periodofin'].strftime("%Y-%m-%d") if row['periodofin'] else None,
-                        "semana": row['semana'],
-                        "parcialidad": row['parcialidad'],
-                        "monto_valor": float(row['monto_valor']) if row['monto_valor'] else 0,
-                        "cuota": float(row['cuota']) if row['cuota'] else 0,
-                        "condonado": row['condonado'],
-                        "fecha_condonacion": row['fecha_condonacion'].strftime("%Y-%m-%d %H:%M:%S") if row['fecha_condonacion'] else None,
-                        "status": row['status']
-                    })
-        
-        total_registros = len(detalles)
-        condonados = sum(1 for d in detalles if d['condonado'] == 1)
-        pendientes = total_registros - condonados
-        
-        return {
-            "status_code": 200,
-            "status_message": "OK",
-            "success": True,
-            "mensaje": f"Se encontraron {total_registros} registros",
-            "datos_generales": datos_generales,
-            "resumen": {
-                "total_registros": total_registros,
-                "condonados": condonados,
-                "pendientes": pendientes
-            },
-            "detalle": detalles
-        }
-        
-    except HTTPException:
-        raise
-    except pymysql.Error as db_error:
-        raise HTTPException(status_code=500, detail=f"Error de base de datos: {str(db_error)}")
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error interno del servidor: {str(e)}")
+        if cursor is not None and limit is None:
+            raise HTTPException(status_code=400, detail="El parámetro cursor requiere limit")
+        if solo_resumen and limit is not None:
+            raise HTTPException(status_code=400, detail="El parámetro solo_resumen no admite limit ni cursor")
+    
+    # Peticiones concurrentes del mismo crédito comparten una sola consulta
+    if solo_resumen:
+        no_modificado = await _respuesta_si_no_modificado(request, "general-resumen", id_credito, "todos")
+        if no_modificado is not None:
+            return no_modificado
+        body, etag = await coalescedor.do(
+            ("general-resumen", id_credito),
+            lambda: _consultar_general_resumen(id_credito)
+        )
+    elif limit is not None:
+        body, etag = await coalescedor.do(
+            ("general", id_credito, limit, cursor),
+            lambda: _consultar_general_paginado(id_credito, limit, cursor)
+        )
+    else:
+        no_modificado = await _respuesta_si_no_modificado(request, "general", id_credito, "todos")
+        if no_modificado is not None:
+            return no_modificado
+        body, etag = await coalescedor.do(
+            ("general", id_credito),
+            lambda: _consultar_general(id_credito)
+        )
+    
+    respuesta = respuesta_json(body)
+    agregar_encabezados_cache(respuesta, etag)
+    return respuesta
+
+
+def _calcular_resumen_simple(
+    id_credito: int,
+    row_bd: dict,
+    datos_saldos: dict,
+    antiguedad: Optional[int] = None
+) -> ResumenSimpleResponse:
+    """
+    Combina los totales de gastos_cobranza con datosSaldos de la API externa.
+    
+    Args:
+        id_credito: ID del crédito
+        row_bd: Fila con monto_total y pendientes de nuestra BD
+        datos_saldos: datosSaldos de la API externa
+        antiguedad: Segundos de antigüedad si datosSaldos está desactualizado
+    
+    Returns:
+        ResumenSimpleResponse
+    """
+    saldo_total_vencido  = float(datos_saldos.get("saldoTotalVencido") or 0)
+    cuotas_devengadas    = int(datos_saldos.get("cuotasDevengadas") or 0)
+    cuotas_pagadas       = int(datos_saldos.get("cuotasPagadas") or 0)
+
+    # Campos derivados
+    numero_cuotas_credito = cuotas_devengadas - cuotas_pagadas
+    monto_total           = float(row_bd["monto_total"] or 0)
+    pendientes            = int(row_bd["pendientes"] or 0)
+    total_a_pagar         = round(monto_total + saldo_total_vencido, 2)
+
+    return ResumenSimpleResponse(
+        status_code=200,
+        status_message="OK",
+        id_credito=id_credito,
+        cargo_pago_tardio=monto_total,
+        total_cargos_pagos_tardio=pendientes,
+        saldo_vencido_credito=saldo_total_vencido,
+        numero_cuotas_credito=numero_cuotas_credito,
+        total_a_pagar=total_a_pagar,
+        bandera=1 if pendientes > 0 else 0,
+        saldo_desactualizado=antiguedad is not None,
+        antiguedad_saldo_segundos=antiguedad
+    )
+
+
+async def _consultar_resumen_simple(id_credito: int) -> ResumenSimpleResponse:
+    """
+    Calcula el resumen simple combinando los totales de nuestra BD y la API externa.
+    
+    Args:
+        id_credito: ID del crédito ya validado
+    
+    Returns:
+        ResumenSimpleResponse
+    """
+    # ── 1. Validar que el crédito existe y obtener totales de nuestra BD ──
+    row_bd = await run_db(obtener_resumen_simple, id_credito)
+    validar_datos_encontrados(row_bd, 'cliente', id_credito)
+
+    # ── 2. Consultar API externa de estado de cuenta y extraer datosSaldos ──
+    fecha_corte = date.today().strftime("%Y-%m-%d")
+    datos_saldos, antiguedad = await consultar_datos_saldos(id_credito, fecha_corte)
+
+    return _calcular_resumen_simple(id_credito, row_bd, datos_saldos, antiguedad)
 
 
 @router.get(
@@ -395,6 +592,7 @@ async def get_general(
         "saldo vencido, número de cuotas, cargo por pago tardío y total a pagar."
     )
 )
+@traducir_errores
 async def get_resumen_simple(
     id_credito: int = Path(..., description="ID del crédito a consultar", gt=0),
     api_key: str = Security(verify_api_key)
@@ -413,119 +611,215 @@ async def get_resumen_simple(
     - **total_a_pagar**: saldoTotalVencido + 250.00
     """
 
-    try:
+    with medir("validacion"):
         validar_id_credito(id_credito)
 
-        # ── 1. Validar que el crédito existe y obtener totales de nuestra BD ──
-        with get_db_connection(database="db-mega-reporte") as conn:
-            with conn.cursor() as cursor:
-
-                cursor.execute(
-                    "SELECT Id_credito FROM tbl_segundometro_semana WHERE Id_credito = %s LIMIT 1",
-                    (id_credito,)
-                )
-                validar_datos_encontrados(cursor.fetchone(), 'cliente', id_credito)
-
-                query_resumen = """
-                     SELECT
-                     COUNT(*) AS total_parcialidades,
-                 
-                     COALESCE(
-                         SUM(
-                             CASE 
-                                 WHEN condonado != 1 
-                                      AND (estatus_pago != 2 OR estatus_pago IS NULL)
-                                 THEN (monto_valor - COALESCE(condonacion_parcial_monto, 0)) 
-                                      - COALESCE(monto_parcial_pagado, 0)
-                                 ELSE 0
-                             END
-                         ), 
-                     0) AS monto_total,
-                 
-                     SUM(
-                         CASE 
-                             WHEN condonado = 1 THEN 1 
-                             ELSE 0 
-                         END
-                     ) AS condonados,
-                 
-                     SUM(
-                         CASE 
-                             WHEN condonado != 1 
-                                  AND (estatus_pago != 2 OR estatus_pago IS NULL)
-                             THEN 1 
-                             ELSE 0 
-                         END
-                     ) AS pendientes
-                 
-                 FROM gastos_cobranza
-                 WHERE Id_credito = %s
-                """
-                cursor.execute(query_resumen, (id_credito,))
-                row_bd = cursor.fetchone()
-
-        # ── 2. Consultar API externa de estado de cuenta ──
-        fecha_corte = date.today().strftime("%Y-%m-%d")
-        payload = {
-            "idCredito": id_credito,
-            "fechaCorte": fecha_corte
-        }
+    return await coalescedor.do(
+        ("resumen-simple", id_credito),
+        lambda: _consultar_resumen_simple(id_credito)
+    )
+
+
+@router.delete(
+    "/condonaciones/{id_credito}/cache",
+    responses={
+        200: {"description": "Éxito - Caché del crédito eliminada"},
+        401: {"description": "No Autenticado - API Key inválida o faltante"},
+        403: {"description": "Prohibido - El API Key no es de administración"}
+    },
+    summary="Purgar caché de estado de cuenta de un crédito",
+    description="Elimina los datosSaldos en caché del crédito para forzar una nueva consulta a la API externa. Requiere un API Key de administración."
+)
+async def purgar_cache_estado_cuenta(
+    id_credito: int = Path(..., description="ID del crédito a purgar", gt=0),
+    api_key: str = Security(verify_admin_api_key)
+):
+    eliminadas = purgar_cache_credito(id_credito)
+    return {
+        "status_code": 200,
+        "status_message": "OK",
+        "success": True,
+        "mensaje": f"Se eliminaron {eliminadas} entradas de caché del crédito {id_credito}",
+        "cache": cache_stats()
+    }
 
-        headers = {
-            "Token": "3oJVoAHtwWn7oBT4o340gFkvq9uWRRmpFo7p",
-            "Content-Type": "application/json"
-        }
 
+def _linea_ndjson(contenido: dict) -> bytes:
+    return dumps(contenido) + b"\n"
+
+
+def _linea_error(id_credito: int, error: HTTPException) -> bytes:
+    return _linea_ndjson(ErrorCreditoBatch(
+        status_code=error.status_code,
+        status_message=HTTPStatus(error.status_code).phrase,
+        id_credito=id_credito,
+        mensaje=str(error.detail)
+    ).model_dump())
+
+
+async def _resumenes_en_streaming(
+    ids: list,
+    errores: dict,
+    totales: dict,
+    fecha_corte: str
+) -> AsyncIterator[bytes]:
+    """
+    Emite una línea NDJSON por crédito conforme se completa su consulta a la API externa.
+    Las llamadas se lanzan en paralelo acotadas por ESTADOCUENTA_MAX_CONCURRENCY.
+    """
+    for id_credito in ids:
+        if id_credito in errores:
+            yield _linea_error(id_credito, errores[id_credito])
+    
+    semaforo = asyncio.Semaphore(max(1, EstadoCuentaConfig.MAX_CONCURRENCY))
+    
+    async def resolver(id_credito: int) -> bytes:
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                resp = await client.post(API_EXTERNA_URL, json=payload, headers=headers)
-                resp.raise_for_status()
-                data_externa = resp.json()
-        except httpx.TimeoutException:
-            raise HTTPException(status_code=502, detail="Tiempo de espera agotado al consultar la API externa")
-        except httpx.HTTPStatusError as e:
-            raise HTTPException(status_code=502, detail=f"Error en la API externa: {e.response.status_code}")
+            async with semaforo:
+                datos_saldos, antiguedad = await consultar_datos_saldos(id_credito, fecha_corte)
+            resumen = _calcular_resumen_simple(id_credito, totales[id_credito], datos_saldos, antiguedad)
+            return _linea_ndjson(resumen.model_dump())
         except Exception as e:
-            raise HTTPException(status_code=502, detail=f"No se pudo conectar con la API externa: {str(e)}")
+            return _linea_error(id_credito, traducir_error(e))
+    
+    tareas = [asyncio.ensure_future(resolver(id_credito)) for id_credito in ids if id_credito in totales]
+    try:
+        for siguiente in asyncio.as_completed(tareas):
+            yield await siguiente
+    finally:
+        # Si el cliente se desconecta se cancelan las llamadas pendientes
+        for tarea in tareas:
+            tarea.cancel()
 
-        # ── 3. Extraer datosSaldos ──
-        datos_saldos = (
-            data_externa
-            .get("estadoCuenta", {})
-            .get("datosSaldos", {})
-        )
 
-        if not datos_saldos:
-            raise HTTPException(
-                status_code=502,
-                detail="La API externa no retornó datosSaldos para este crédito"
-            )
-
-        saldo_total_vencido  = float(datos_saldos.get("saldoTotalVencido") or 0)
-        cuotas_devengadas    = int(datos_saldos.get("cuotasDevengadas") or 0)
-        cuotas_pagadas       = int(datos_saldos.get("cuotasPagadas") or 0)
-
-        # ── 4. Calcular campos derivados ──
-        numero_cuotas_credito = cuotas_devengadas - cuotas_pagadas
-        monto_total           = float(row_bd["monto_total"] or 0)
-        pendientes            = int(row_bd["pendientes"] or 0)
-        total_a_pagar         = round(monto_total + saldo_total_vencido, 2)
-
-        return ResumenSimpleResponse(
-            status_code=200,
-            status_message="OK",
-            id_credito=id_credito,
-            cargo_pago_tardio=monto_total,
-            total_cargos_pagos_tardio=pendientes,
-            saldo_vencido_credito=saldo_total_vencido,
-            numero_cuotas_credito=numero_cuotas_credito,
-            total_a_pagar=total_a_pagar,
-            bandera=1 if pendientes > 0 else 0
-        )
+@router.post(
+    "/condonaciones/resumen-simple/batch",
+    responses={
+        200: {
+            "description": "Éxito - Una línea JSON (NDJSON) por crédito, en orden de finalización",
+            "content": {"application/x-ndjson": {}}
+        },
+        400: {"description": "Bad Request - Demasiados créditos en la petición"},
+        401: {"description": "No Autenticado - API Key inválida o faltante"},
+        422: {"description": "Entidad no procesable - Cuerpo inválido"},
+        500: {"description": "Error del Servidor - Error interno"}
+    },
+    summary="Resumen simple de varios créditos (streaming)",
+    description=(
+        "Calcula el resumen simple de una lista de créditos. Los totales de gastos_cobranza se "
+        "obtienen con un solo agregado agrupado por crédito y las consultas a estadocuenta se "
+        "ejecutan en paralelo (máximo ESTADOCUENTA_MAX_CONCURRENCY simultáneas). La respuesta es "
+        "NDJSON: cada línea es un ResumenSimpleResponse o un error del crédito, emitida en cuanto está lista."
+    )
+)
+@traducir_errores
+async def post_resumen_simple_batch(
+    peticion: BatchResumenSimpleRequest = Body(...),
+    api_key: str = Security(verify_api_key)
+):
+    with medir("validacion"):
+        ids = _ids_unicos(peticion.ids_credito)
+        validos, errores = _validar_lote(ids)
+    
+    totales = await run_db(obtener_resumenes_simples, validos) if validos else {}
+    
+    for id_credito in validos:
+        if id_credito not in totales:
+            try:
+                validar_datos_encontrados(None, 'cliente', id_credito)
+            except HTTPException as e:
+                errores[id_credito] = e
+    
+    fecha_corte = date.today().strftime("%Y-%m-%d")
+    return StreamingResponse(
+        _resumenes_en_streaming(ids, errores, totales, fecha_corte),
+        media_type="application/x-ndjson"
+    )
 
-    except HTTPException:
-        raise
-    except pymysql.Error as db_error:
-        raise HTTPException(status_code=500, detail=f"Error de base de datos: {str(db_error)}")
+
+async def _exportar_en_streaming(exportacion: ExportacionGastos) -> AsyncIterator[bytes]:
+    """
+    Lee bloques del cursor sin búfer en el executor de BD y los emite como NDJSON.
+    La última línea reporta filas exportadas, duración y filas por segundo.
+    """
+    inicio = time.perf_counter()
+    filas = 0
+    try:
+        while True:
+            bloque = await run_db(exportacion.siguiente_bloque)
+            if not bloque:
+                break
+            filas += len(bloque)
+            yield b"".join(_linea_ndjson(fila_exportacion(row)) for row in bloque)
+        
+        segundos = time.perf_counter() - inicio
+        filas_por_segundo = round(filas / segundos, 1) if segundos > 0 else float(filas)
+        logger.info("Exportación de gastos_cobranza: %s filas en %.2f s (%s filas/s)", filas, segundos, filas_por_segundo)
+        yield _linea_ndjson({
+            "_resumen": {
+                "filas": filas,
+                "segundos": round(segundos, 3),
+                "filas_por_segundo": filas_por_segundo
+            }
+        })
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error interno del servidor: {str(e)}")
\ No newline at end of file
+        # El status 200 ya se envió; el error se reporta como última línea
+        logger.exception("Exportación de gastos_cobranza interrumpida tras %s filas", filas)
+        yield _linea_ndjson({"_error": {"filas": filas, "mensaje": f"Exportación interrumpida: {str(e)}"}})
+    finally:
+        # En el executor: si el cliente se desconectó, el hilo puede seguir
+        # leyendo un bloque y `cerrar` espera a que termine
+        await asyncio.shield(run_db(exportacion.cerrar))
+
+
+@router.get(
+    "/condonaciones/export/gastos-cobranza",
+    responses={
+        200: {
+            "description": "Éxito - Una línea JSON (NDJSON) por gasto; la última línea trae el resumen de la exportación",
+            "content": {"application/x-ndjson": {}}
+        },
+        400: {"description": "Bad Request - Rango de fechas inválido"},
+        401: {"description": "No Autenticado - API Key inválida o faltante"},
+        500: {"description": "Error del Servidor - Error interno"},
+        503: {"description": "Servicio no disponible - Ya hay EXPORT_MAX_CONCURRENT exportaciones en curso"}
+    },
+    summary="Exportar gastos de cobranza de un segmento de cartera (streaming)",
+    description=(
+        "Exporta gastos_cobranza filtrando por bucket de morosidad, rango de periodo_inicio y estatus "
+        "de condonación. Usa un cursor sin búfer en MySQL y emite NDJSON conforme lee, por lo que la "
+        "memoria se mantiene constante sin importar cuántas filas se exporten."
+    )
+)
+async def exportar_gastos_cobranza(
+    bucket_morosidad: Optional[str] = Query(None, description="Bucket_Morosidad_Real del crédito (ej. B2)"),
+    fecha_desde: Optional[date] = Query(None, description="periodo_inicio mayor o igual a (YYYY-MM-DD)"),
+    fecha_hasta: Optional[date] = Query(None, description="periodo_inicio menor o igual a (YYYY-MM-DD)"),
+    condonado: Optional[bool] = Query(None, description="true = solo condonados, false = solo pendientes"),
+    api_key: str = Security(verify_api_key)
+):
+    if fecha_desde and fecha_hasta and fecha_desde > fecha_hasta:
+        raise HTTPException(status_code=400, detail="fecha_desde no puede ser mayor a fecha_hasta")
+    
+    exportacion = ExportacionGastos(
+        bucket_morosidad=bucket_morosidad,
+        fecha_desde=fecha_desde,
+        fecha_hasta=fecha_hasta,
+        condonado=condonado
+    )
+    
+    try:
+        await run_db(exportacion.abrir)
+    except ExportacionesOcupadasError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "30"})
+    except BaseException as e:
+        # También si se cancela la petición: el hilo puede seguir dentro de `abrir`
+        await asyncio.shield(run_db(exportacion.cerrar))
+        if isinstance(e, Exception):
+            raise traducir_error(e)
+        raise
+    
+    return StreamingResponse(
+        _exportar_en_streaming(exportacion),
+        media_type="application/x-ndjson"
+    )
@@ -0,0 +1,159 @@
+"""
+Benchmark de serialización de respuestas de condonaciones
+
+Compara la ruta anterior (DictCursor + modelos Pydantic por fila +
+revalidación con response_model + JSONResponse) contra la ruta rápida
+(cursor de tuplas + mapper por formato + orjson) con filas sintéticas.
+
+Uso:
+    python scripts/bench_serializacion.py [--filas 52 520] [--repeticiones 2000]
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("API_KEYS", "benchmark")
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.routing import _prepare_response_content
+from fastapi.utils import create_response_field
+
+from models.condonaciones import CondonacionResponse, DatosGenerales, CondonacionCobranza, DetalleCondonacion
+from repositories import mappers
+from repositories.mappers import COLUMNAS_DETALLE
+from routers import condonaciones as router
+from utils.serializacion import dumps, orjson
+
+
+DATOS_GENERALES = {
+    "id_credito": 12345,
+    "nombre_cliente": "Juan Pérez García",
+    "id_cliente": 67890,
+    "domicilio_completo": "Calle Principal #123, Col. Centro",
+    "bucket_morosidad": "B2",
+    "dias_mora": 15,
+    "saldo_vencido": Decimal("3500.00")
+}
+
+
+def filas_sinteticas(total: int, con_status: bool) -> list:
+    """Filas de gastos_cobranza como las entrega pymysql (tuplas)"""
+    filas = []
+    for i in range(total):
+        inicio = date(2025, 1, 6) + timedelta(weeks=i)
+        condonado = i % 3 == 0
+        fila = (
+            inicio,
+            inicio + timedelta(days=6),
+            f"2025-{i + 1:02d}",
+            f"{i + 1}/52",
+            Decimal("150.50"),
+            Decimal("150.00"),
+            1 if condonado else 0,
+            datetime(2025, 3, 1, 10, 30) if condonado else None
+        )
+        if con_status:
+            fila += ("CONDONADO" if condonado else "PENDIENTE",)
+        filas.append(fila)
+    return filas
+
+
+_campo_respuesta = create_response_field(name="Response_bench", type_=CondonacionResponse)
+
+
+def detalle_antes(filas: list) -> bytes:
+    columnas = COLUMNAS_DETALLE
+    rows = [dict(zip(columnas, fila)) for fila in filas]
+    respuesta = CondonacionResponse(
+        status_code=200,
+        status_message="OK",
+        success=True,
+        mensaje=f"Se encontraron {len(rows)} gastos condonados",
+        datos_generales=DatosGenerales(**DATOS_GENERALES),
+        condonacion_cobranza=CondonacionCobranza(detalle=[DetalleCondonacion(**row) for row in rows])
+    )
+    # Lo mismo que hace FastAPI con response_model: volcar, revalidar y serializar
+    volcado = _prepare_response_content(respuesta, exclude_unset=False)
+    valor, _ = _campo_respuesta.validate(volcado, {}, loc=("response",))
+    return JSONResponse(_campo_respuesta.serialize(valor, mode="json")).body
+
+
+def detalle_despues(filas: list) -> bytes:
+    detalles = [mappers.detalle_modelo(fila) for fila in filas]
+    mensaje = f"Se encontraron {len(detalles)} gastos condonados"
+    return dumps(router._respuesta_condonacion(mensaje, DATOS_GENERALES, detalles))
+
+
+def general_antes(filas: list) -> bytes:
+    columnas = COLUMNAS_DETALLE + ("status",)
+    detalles = []
+    for fila in filas:
+        row = dict(zip(columnas, fila))
+        detalles.append({
+            "periodoinicio": row['periodoinicio'].strftime("%Y-%m-%d") if row['periodoinicio'] else None,
+            "periodofin": row['periodofin'].strftime("%Y-%m-%d") if row['periodofin'] else None,
+            "semana": row['semana'],
+            "parcialidad": row['parcialidad'],
+            "monto_valor": float(row['monto_valor']) if row['monto_valor'] else 0,
+            "cuota": float(row['cuota']) if row['cuota'] else 0,
+            "condonado": row['condonado'],
+            "fecha_condonacion": row['fecha_condonacion'].strftime("%Y-%m-%d %H:%M:%S") if row['fecha_condonacion'] else None,
+            "status": row['status']
+        })
+    contenido = {
+        "status_code": 200,
+        "datos_generales": mappers.datos_generales_general(DATOS_GENERALES),
+        "detalle": detalles
+    }
+    return JSONResponse(jsonable_encoder(contenido)).body
+
+
+def general_despues(filas: list) -> bytes:
+    contenido = {
+        "status_code": 200,
+        "datos_generales": mappers.datos_generales_general(DATOS_GENERALES),
+        "detalle": [mappers.detalle_general(fila) for fila in filas]
+    }
+    return dumps(contenido)
+
+
+def medir(funcion, filas: list, repeticiones: int) -> float:
+    """Microsegundos por respuesta"""
+    funcion(filas)
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        funcion(filas)
+    return (time.perf_counter() - inicio) / repeticiones * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--filas", type=int, nargs="+", default=[52, 520])
+    parser.add_argument("--repeticiones", type=int, default=2000)
+    args = parser.parse_args()
+    
+    print(f"orjson: {'sí' if orjson is not None else 'no (json estándar)'}")
+    print(f"{'caso':<12}{'filas':>7}{'antes µs':>12}{'después µs':>13}{'mejora':>9}")
+    
+    for total in args.filas:
+        for nombre, antes, despues, con_status in (
+            ("detalle", detalle_antes, detalle_despues, False),
+            ("general", general_antes, general_despues, True)
+        ):
+            filas = filas_sinteticas(total, con_status)
+            if antes(filas) != despues(filas):
+                raise SystemExit(f"La salida de '{nombre}' no es idéntica entre ambas rutas")
+            repeticiones = max(1, args.repeticiones * 52 // total)
+            t_antes = medir(antes, filas, repeticiones)
+            t_despues = medir(despues, filas, repeticiones)
+            print(f"{nombre:<12}{total:>7}{t_antes:>12.1f}{t_despues:>13.1f}{t_antes / t_despues:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
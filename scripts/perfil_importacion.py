@@ -0,0 +1,91 @@
+"""
+Perfil del tiempo de importación de la aplicación
+
+Importa el módulo indicado (por defecto `main`) en un intérprete nuevo con
+`python -X importtime` y reporta los módulos más costosos por tiempo
+acumulado (incluye sus dependencias) y por tiempo propio, agrupados además
+por paquete de primer nivel. Sale con código 1 si el total supera
+`--presupuesto-ms`, para usarlo en CI y mantener el arranque en frío acotado.
+
+Uso:
+    python scripts/perfil_importacion.py [--modulo main] [--top 25] [--presupuesto-ms 1500]
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# "import time:       self [us] |  cumulative | imported package"
+_LINEA = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$")
+
+
+def medir(modulo: str) -> list:
+    """
+    Importa `modulo` en un proceso nuevo y retorna las filas de -X importtime.
+
+    Returns:
+        Lista de (módulo, propio_us, acumulado_us, nivel de anidamiento)
+    """
+    entorno = dict(os.environ)
+    # La configuración de seguridad exige API_KEYS al importar
+    entorno.setdefault("API_KEYS", "perfil-importacion")
+    proceso = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {modulo}"],
+        cwd=RAIZ,
+        env=entorno,
+        capture_output=True,
+        text=True
+    )
+    if proceso.returncode != 0:
+        errores = [linea for linea in proceso.stderr.splitlines() if not linea.startswith("import time:")]
+        raise RuntimeError(f"No se pudo importar '{modulo}':\n" + "\n".join(errores[-20:]))
+
+    filas = []
+    for linea in proceso.stderr.splitlines():
+        coincidencia = _LINEA.match(linea)
+        if coincidencia:
+            propio, acumulado, sangria, nombre = coincidencia.groups()
+            filas.append((nombre, int(propio), int(acumulado), (len(sangria) - 1) // 2))
+    return filas
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modulo", default="main", help="Módulo a importar")
+    parser.add_argument("--top", type=int, default=25, help="Módulos a mostrar en cada tabla")
+    parser.add_argument("--presupuesto-ms", type=float, default=0, help="Falla si el total supera este tiempo (0 = sin presupuesto)")
+    args = parser.parse_args()
+
+    filas = medir(args.modulo)
+    total_us = sum(propio for _, propio, _, _ in filas)
+
+    print(f"Importación de '{args.modulo}': {total_us / 1000:.1f} ms en {len(filas)} módulos\n")
+
+    print(f"{'acumulado ms':>13}  {'propio ms':>10}  módulo")
+    for nombre, propio, acumulado, _ in sorted(filas, key=lambda f: f[2], reverse=True)[:args.top]:
+        print(f"{acumulado / 1000:>13.1f}  {propio / 1000:>10.1f}  {nombre}")
+
+    print(f"\n{'propio ms':>10}  módulo")
+    for nombre, propio, _, _ in sorted(filas, key=lambda f: f[1], reverse=True)[:args.top]:
+        print(f"{propio / 1000:>10.1f}  {nombre}")
+
+    paquetes = defaultdict(int)
+    for nombre, propio, _, _ in filas:
+        paquetes[nombre.split(".")[0]] += propio
+    print(f"\n{'propio ms':>10}  paquete")
+    for paquete, propio in sorted(paquetes.items(), key=lambda p: p[1], reverse=True)[:args.top]:
+        print(f"{propio / 1000:>10.1f}  {paquete}")
+
+    if args.presupuesto_ms and total_us / 1000 > args.presupuesto_ms:
+        print(f"\nEl total ({total_us / 1000:.1f} ms) supera el presupuesto de {args.presupuesto_ms:.0f} ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
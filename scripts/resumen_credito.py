@@ -0,0 +1,121 @@
+"""
+Administración del rollup por crédito (resumen_gastos_credito)
+
+- migrar: crea las tablas y los triggers de scripts/resumen_gastos_credito.sql
+- reconstruir: recalcula el rollup completo desde gastos_cobranza. Necesario
+  después de migrar y después de cargas que no disparan triggers
+  (TRUNCATE, LOAD DATA con los triggers deshabilitados, restauraciones).
+- aplicar: aplica los cambios pendientes (lo mismo que hace la API en
+  segundo plano con RESUMEN_ROLLUP_ENABLED=true)
+- verificar: compara el rollup contra el agregado en vivo; sale con código 1
+  si hay diferencias
+
+Uso:
+    python scripts/resumen_credito.py migrar
+    python scripts/resumen_credito.py reconstruir
+    python scripts/resumen_credito.py aplicar
+    python scripts/resumen_credito.py verificar [--limite 20]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.database import close_pools, get_db_connection
+from repositories.resumen_credito import DATABASE, RollupConfig, rollup_resumen
+
+
+DDL = os.path.join(os.path.dirname(os.path.abspath(__file__)), "resumen_gastos_credito.sql")
+
+
+def _sentencias_ddl(texto: str):
+    """Separa el archivo en sentencias respetando DELIMITER (cuerpos de triggers)"""
+    delimitador = ";"
+    actual = []
+    for linea in texto.splitlines():
+        limpia = linea.strip()
+        if limpia.upper().startswith("DELIMITER "):
+            delimitador = limpia.split(None, 1)[1]
+            continue
+        if not actual and (not limpia or limpia.startswith("--")):
+            continue
+        actual.append(linea)
+        if limpia.endswith(delimitador):
+            sentencia = "\n".join(actual).rstrip()[:-len(delimitador)].strip()
+            if sentencia:
+                yield sentencia
+            actual = []
+
+
+def migrar() -> int:
+    with open(DDL, encoding="utf-8") as archivo:
+        sentencias = list(_sentencias_ddl(archivo.read()))
+    with get_db_connection(database=DATABASE) as conn:
+        with conn.cursor() as cursor:
+            for sentencia in sentencias:
+                cursor.execute(sentencia)
+    print(f"{len(sentencias)} sentencias aplicadas de {os.path.basename(DDL)}")
+    print("Siguiente paso: python scripts/resumen_credito.py reconstruir")
+    return 0
+
+
+def reconstruir() -> int:
+    inicio = time.perf_counter()
+    afectadas = rollup_resumen.reconstruir()
+    print(f"Rollup reconstruido ({afectadas} filas afectadas) en {time.perf_counter() - inicio:.1f} s")
+    return 0
+
+
+def aplicar() -> int:
+    total = 0
+    while True:
+        aplicados = rollup_resumen.aplicar_cambios()
+        total += aplicados
+        if aplicados < RollupConfig.BATCH:
+            break
+    stats = rollup_resumen.stats()
+    if stats["rondas_sin_bloqueo"]:
+        print("Otro proceso está aplicando los cambios (GET_LOCK ocupado)")
+    print(f"{total} cambios aplicados, {stats['cambios_pendientes']} pendientes")
+    return 0
+
+
+def verificar(limite: int) -> int:
+    inicio = time.perf_counter()
+    resultado = rollup_resumen.verificar(limite=limite)
+    print(
+        f"{resultado['rangos']} rangos revisados en {time.perf_counter() - inicio:.1f} s: "
+        f"{resultado['diferencias']} diferencias, {resultado['huerfanos']} huérfanos"
+    )
+    for fila in resultado["detalle"]:
+        print(f"  {fila}")
+    return 1 if resultado["diferencias"] or resultado["huerfanos"] else 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    comandos = parser.add_subparsers(dest="comando", required=True)
+    comandos.add_parser("migrar", help="Crea tablas y triggers del rollup")
+    comandos.add_parser("reconstruir", help="Recalcula el rollup completo")
+    comandos.add_parser("aplicar", help="Aplica los cambios pendientes")
+    verificacion = comandos.add_parser("verificar", help="Compara el rollup contra el agregado en vivo")
+    verificacion.add_argument("--limite", type=int, default=20, help="Diferencias a mostrar")
+    args = parser.parse_args()
+
+    try:
+        if args.comando == "migrar":
+            return migrar()
+        if args.comando == "reconstruir":
+            return reconstruir()
+        if args.comando == "aplicar":
+            return aplicar()
+        return verificar(args.limite)
+    finally:
+        close_pools()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,64 @@
+-- Rollup por crédito de los totales del resumen simple (db-mega-reporte).
+--
+-- resumen_gastos_credito guarda por Id_credito los mismos totales que el
+-- agregado en vivo de /resumen-simple. Los triggers de gastos_cobranza
+-- anotan en gastos_cobranza_cambios cada crédito cuyos gastos cambian y la
+-- API los recalcula en segundo plano (repositories/resumen_credito.py).
+--
+-- Aplicar con:
+--     python scripts/resumen_credito.py migrar
+--     python scripts/resumen_credito.py reconstruir
+
+CREATE TABLE IF NOT EXISTS resumen_gastos_credito (
+    Id_credito INT NOT NULL PRIMARY KEY,
+    total_parcialidades INT NOT NULL DEFAULT 0,
+    monto_total DECIMAL(16, 2) NOT NULL DEFAULT 0,
+    condonados INT NOT NULL DEFAULT 0,
+    pendientes INT NOT NULL DEFAULT 0,
+    actualizado DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE IF NOT EXISTS gastos_cobranza_cambios (
+    id BIGINT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    Id_credito INT NOT NULL,
+    registrado DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    KEY idx_cambios_credito (Id_credito)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+DROP TRIGGER IF EXISTS trg_gastos_cobranza_rollup_ins;
+DROP TRIGGER IF EXISTS trg_gastos_cobranza_rollup_upd;
+DROP TRIGGER IF EXISTS trg_gastos_cobranza_rollup_del;
+
+DELIMITER //
+
+CREATE TRIGGER trg_gastos_cobranza_rollup_ins
+AFTER INSERT ON gastos_cobranza
+FOR EACH ROW
+BEGIN
+    INSERT INTO gastos_cobranza_cambios (Id_credito) VALUES (NEW.Id_credito);
+END//
+
+-- Solo las columnas que entran en el agregado generan un cambio
+CREATE TRIGGER trg_gastos_cobranza_rollup_upd
+AFTER UPDATE ON gastos_cobranza
+FOR EACH ROW
+BEGIN
+    IF NOT (OLD.Id_credito <=> NEW.Id_credito) THEN
+        INSERT INTO gastos_cobranza_cambios (Id_credito) VALUES (OLD.Id_credito), (NEW.Id_credito);
+    ELSEIF NOT (OLD.monto_valor <=> NEW.monto_valor)
+        OR NOT (OLD.condonado <=> NEW.condonado)
+        OR NOT (OLD.estatus_pago <=> NEW.estatus_pago)
+        OR NOT (OLD.condonacion_parcial_monto <=> NEW.condonacion_parcial_monto)
+        OR NOT (OLD.monto_parcial_pagado <=> NEW.monto_parcial_pagado) THEN
+        INSERT INTO gastos_cobranza_cambios (Id_credito) VALUES (NEW.Id_credito);
+    END IF;
+END//
+
+CREATE TRIGGER trg_gastos_cobranza_rollup_del
+AFTER DELETE ON gastos_cobranza
+FOR EACH ROW
+BEGIN
+    INSERT INTO gastos_cobranza_cambios (Id_credito) VALUES (OLD.Id_credito);
+END//
+
+DELIMITER ;
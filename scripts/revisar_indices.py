@@ -0,0 +1,59 @@
+"""
+Diagnóstico de índices de las consultas de los endpoints
+
+Ejecuta EXPLAIN sobre cada sentencia del catálogo que usan los endpoints,
+muestra las que hacen recorridos completos o filesort y el DDL de los
+índices compuestos recomendados que faltan. Sale con código 1 si alguna
+consulta caliente no usa índice o si falta algún índice recomendado.
+
+Uso:
+    python scripts/revisar_indices.py [--todas] [--json]
+"""
+
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.database import close_pools
+from repositories.indices import asesor_indices, formatear_reporte
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--todas", action="store_true", help="Muestra el plan de todas las consultas, no solo las que tienen alertas")
+    parser.add_argument("--json", action="store_true", help="Imprime el reporte completo en JSON")
+    args = parser.parse_args()
+
+    try:
+        reporte = asesor_indices.revisar()
+    finally:
+        close_pools()
+
+    if args.json:
+        print(json.dumps(reporte, indent=2, ensure_ascii=False, default=str))
+    else:
+        if args.todas:
+            for consulta in reporte["consultas"]:
+                hallazgos = consulta["alertas"] + [f"{advertencia} (advertencia)" for advertencia in consulta["advertencias"]]
+                print(f"{consulta['consulta']}: {', '.join(hallazgos) or 'sin alertas'}")
+                for paso in consulta["plan"]:
+                    print(
+                        f"    {paso['tabla']}: type={paso['tipo']} key={paso['indice']} "
+                        f"rows={paso['filas']} extra={paso['extra']}"
+                    )
+            print()
+        print(formatear_reporte(reporte))
+        print(
+            f"\n{len(reporte['consultas'])} consultas revisadas (Id_credito de muestra "
+            f"{reporte['id_credito_muestra']}): {reporte['problemas']} calientes con alertas, "
+            f"{reporte['advertencias']} calientes con filesort, "
+            f"{len(reporte['indices_faltantes'])} índices recomendados faltantes"
+        )
+    return 1 if reporte["problemas"] or reporte["indices_faltantes"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
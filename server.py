@@ -0,0 +1,117 @@
+"""
+Arranque de producción
+Lanza uvicorn con varios workers (uno por CPU disponible por defecto),
+uvloop y httptools cuando están instalados, y límites de keep-alive,
+backlog y concurrencia tomados del entorno.
+
+Cada worker ejecuta el lifespan de la aplicación (pools de MySQL, cliente
+HTTP, réplica, ...) antes de empezar a aceptar conexiones del socket
+compartido, así que ningún worker recibe tráfico con las conexiones frías.
+
+Uso:
+    python server.py
+    WEB_CONCURRENCY=4 python server.py
+
+Para desarrollo sigue usándose `python main.py` (un proceso con reload).
+"""
+
+import logging
+import math
+import os
+from dotenv import load_dotenv
+import uvicorn
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+
+def _cpus_disponibles() -> int:
+    """
+    CPUs que el proceso puede usar: afinidad del proceso acotada por la
+    cuota de CPU del cgroup (límite de CPU del contenedor en Cloud Run/Docker).
+    """
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    try:
+        # cgroup v2: "max 100000" o "<cuota> <periodo>"
+        with open("/sys/fs/cgroup/cpu.max") as archivo:
+            cuota, periodo = archivo.read().split()
+        if cuota != "max":
+            cpus = min(cpus, max(1, math.ceil(int(cuota) / int(periodo))))
+    except (OSError, ValueError):
+        pass
+    return max(1, cpus)
+
+
+class ServerConfig:
+    """Configuración del servidor de producción"""
+
+    HOST = os.getenv("HOST", "0.0.0.0")
+    PORT = int(os.getenv("PORT", "8080"))
+    # WEB_CONCURRENCY (convención de uvicorn/gunicorn) fija el número de workers;
+    # sin ella se usan SERVER_WORKERS_PER_CPU workers por CPU disponible
+    WORKERS = int(os.getenv("WEB_CONCURRENCY", "0"))
+    WORKERS_PER_CPU = float(os.getenv("SERVER_WORKERS_PER_CPU", "1"))
+    MAX_WORKERS = int(os.getenv("SERVER_MAX_WORKERS", "8"))
+    # Mayor que el idle timeout del balanceador para que no reutilice una conexión que uvicorn ya cerró
+    KEEPALIVE = int(os.getenv("SERVER_KEEPALIVE", "75"))
+    BACKLOG = int(os.getenv("SERVER_BACKLOG", "2048"))
+    # Conexiones simultáneas por worker antes de responder 503 (0 = sin límite)
+    LIMIT_CONCURRENCY = int(os.getenv("SERVER_LIMIT_CONCURRENCY", "0"))
+    # Segundos para terminar las peticiones en curso al recibir SIGTERM
+    GRACEFUL_TIMEOUT = int(os.getenv("SERVER_GRACEFUL_TIMEOUT", "8"))
+    ACCESS_LOG = os.getenv("SERVER_ACCESS_LOG", "true").strip().lower() in ("1", "true", "yes", "si", "sí")
+    FORWARDED_ALLOW_IPS = os.getenv("SERVER_FORWARDED_ALLOW_IPS", "*")
+
+
+def calcular_workers() -> int:
+    """Workers a lanzar: WEB_CONCURRENCY o CPUs × SERVER_WORKERS_PER_CPU, entre 1 y SERVER_MAX_WORKERS"""
+    if ServerConfig.WORKERS > 0:
+        return ServerConfig.WORKERS
+    workers = int(_cpus_disponibles() * ServerConfig.WORKERS_PER_CPU)
+    return max(1, min(workers, ServerConfig.MAX_WORKERS))
+
+
+def _disponible(modulo: str) -> bool:
+    try:
+        __import__(modulo)
+    except ImportError:
+        return False
+    return True
+
+
+def opciones_uvicorn() -> dict:
+    """Argumentos de uvicorn.run para producción"""
+    return {
+        "host": ServerConfig.HOST,
+        "port": ServerConfig.PORT,
+        "workers": calcular_workers(),
+        "loop": "uvloop" if _disponible("uvloop") else "asyncio",
+        "http": "httptools" if _disponible("httptools") else "h11",
+        "timeout_keep_alive": ServerConfig.KEEPALIVE,
+        "backlog": ServerConfig.BACKLOG,
+        "limit_concurrency": ServerConfig.LIMIT_CONCURRENCY or None,
+        "timeout_graceful_shutdown": ServerConfig.GRACEFUL_TIMEOUT,
+        "access_log": ServerConfig.ACCESS_LOG,
+        "proxy_headers": True,
+        "forwarded_allow_ips": ServerConfig.FORWARDED_ALLOW_IPS,
+        "lifespan": "on"
+    }
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO)
+    opciones = opciones_uvicorn()
+    logger.info(
+        "Iniciando %s workers en %s:%s (loop=%s, http=%s, keep-alive=%ss, backlog=%s)",
+        opciones["workers"], opciones["host"], opciones["port"],
+        opciones["loop"], opciones["http"], opciones["timeout_keep_alive"], opciones["backlog"]
+    )
+    uvicorn.run("main:app", **opciones)
+
+
+if __name__ == "__main__":
+    main()
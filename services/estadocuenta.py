@@ -0,0 +1,400 @@
+"""
+Servicio de Estado de Cuenta
+Consulta a la API externa estadocuenta (servicios.s2movil.net)
+"""
+
+import asyncio
+import httpx
+import math
+from fastapi import HTTPException
+import os
+import time
+from typing import Optional, Tuple
+from dotenv import load_dotenv
+
+from config.http_client import post_json
+from utils.cache import TTLCache
+from utils.circuito import CircuitBreaker, CircuitoAbiertoError, CERRADO
+from utils.metricas import estadocuenta_duracion, estadocuenta_en_vuelo, estadocuenta_errores
+from utils.singleflight import coalescedor
+from utils.tiempos import registrar
+
+load_dotenv()
+
+
+def _env_bool(nombre: str, default: str) -> bool:
+    return os.getenv(nombre, default).strip().lower() in ("1", "true", "yes", "si", "sí")
+
+
+class EstadoCuentaConfig:
+    """Configuración de la API externa de estado de cuenta"""
+    
+    URL = os.getenv("ESTADOCUENTA_URL", "https://servicios.s2movil.net/s2maxikash/estadocuenta")
+    TOKEN = os.getenv("ESTADOCUENTA_TOKEN", "3oJVoAHtwWn7oBT4o340gFkvq9uWRRmpFo7p")
+    
+    # Caché de datosSaldos por (idCredito, fechaCorte); TTL 0 la desactiva
+    CACHE_TTL = float(os.getenv("ESTADOCUENTA_CACHE_TTL", "900"))
+    CACHE_MAX_ENTRIES = int(os.getenv("ESTADOCUENTA_CACHE_MAX_ENTRIES", "10000"))
+    CACHE_MAX_BYTES = int(os.getenv("ESTADOCUENTA_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+    
+    # stale-while-revalidate: durante N segundos después de expirar, el
+    # datosSaldos se responde de inmediato (marcado como desactualizado)
+    # mientras se refresca en segundo plano. TTL 0 lo desactiva.
+    SWR_SECONDS = float(os.getenv("ESTADOCUENTA_SWR_SECONDS", "300"))
+    # Antigüedad máxima del último datosSaldos conocido que se responde
+    # cuando la API externa falla (0 desactiva el respaldo)
+    STALE_MAX_AGE = float(os.getenv("ESTADOCUENTA_STALE_MAX_AGE", "3600"))
+    
+    # Llamadas simultáneas a la API externa en los endpoints por lote
+    MAX_CONCURRENCY = int(os.getenv("ESTADOCUENTA_MAX_CONCURRENCY", "10"))
+    
+    # Circuit breaker: falla rápido cuando la API externa está caída o muy lenta
+    CB_ENABLED = _env_bool("ESTADOCUENTA_CB_ENABLED", "true")
+    CB_WINDOW = int(os.getenv("ESTADOCUENTA_CB_WINDOW", "50"))
+    CB_MIN_CALLS = int(os.getenv("ESTADOCUENTA_CB_MIN_CALLS", "20"))
+    CB_FAILURE_RATE = float(os.getenv("ESTADOCUENTA_CB_FAILURE_RATE", "0.5"))
+    CB_SLOW_CALL_MS = float(os.getenv("ESTADOCUENTA_CB_SLOW_CALL_MS", "5000"))
+    CB_SLOW_CALL_RATE = float(os.getenv("ESTADOCUENTA_CB_SLOW_CALL_RATE", "0.8"))
+    CB_OPEN_SECONDS = float(os.getenv("ESTADOCUENTA_CB_OPEN_SECONDS", "30"))
+    CB_HALF_OPEN_CALLS = int(os.getenv("ESTADOCUENTA_CB_HALF_OPEN_CALLS", "3"))
+    
+    # Peticiones de cobertura (hedging): segundo intento si el primero tarda más que el percentil
+    HEDGE_ENABLED = _env_bool("ESTADOCUENTA_HEDGE_ENABLED", "false")
+    HEDGE_PERCENTILE = float(os.getenv("ESTADOCUENTA_HEDGE_PERCENTILE", "95"))
+    HEDGE_MIN_DELAY_MS = float(os.getenv("ESTADOCUENTA_HEDGE_MIN_DELAY_MS", "50"))
+    HEDGE_DEFAULT_DELAY_MS = float(os.getenv("ESTADOCUENTA_HEDGE_DEFAULT_DELAY_MS", "500"))
+
+
+_cache = TTLCache(
+    max_entries=EstadoCuentaConfig.CACHE_MAX_ENTRIES,
+    ttl=EstadoCuentaConfig.CACHE_TTL,
+    max_bytes=EstadoCuentaConfig.CACHE_MAX_BYTES
+)
+
+
+# Último datosSaldos conocido por crédito: (datos_saldos, fecha_corte, obtenido_en)
+_respaldo = TTLCache(
+    max_entries=EstadoCuentaConfig.CACHE_MAX_ENTRIES,
+    ttl=EstadoCuentaConfig.STALE_MAX_AGE,
+    max_bytes=EstadoCuentaConfig.CACHE_MAX_BYTES
+)
+
+# Contadores de respuestas con datosSaldos desactualizado
+_desactualizadas = {"revalidaciones": 0, "respaldos_por_error": 0}
+
+# Tareas de revalidación en segundo plano (referencia para que no las recolecte el GC)
+_revalidaciones: set = set()
+
+_circuito = CircuitBreaker(
+    "estadocuenta",
+    ventana=EstadoCuentaConfig.CB_WINDOW,
+    min_llamadas=EstadoCuentaConfig.CB_MIN_CALLS,
+    tasa_fallos=EstadoCuentaConfig.CB_FAILURE_RATE,
+    umbral_lento=EstadoCuentaConfig.CB_SLOW_CALL_MS / 1000,
+    tasa_lentas=EstadoCuentaConfig.CB_SLOW_CALL_RATE,
+    espera_abierto=EstadoCuentaConfig.CB_OPEN_SECONDS,
+    llamadas_prueba=EstadoCuentaConfig.CB_HALF_OPEN_CALLS
+)
+
+# Contadores de peticiones de cobertura
+_coberturas = {"lanzadas": 0, "ganadoras": 0}
+
+
+class ErrorEstadoCuenta(HTTPException):
+    """
+    502 por un error de la API externa. `falla_servicio` indica si el error
+    cuenta para el circuit breaker (timeouts, errores de conexión y 5xx).
+    """
+    
+    def __init__(self, detail: str, falla_servicio: bool = True):
+        super().__init__(status_code=502, detail=detail)
+        self.falla_servicio = falla_servicio
+
+
+def purgar_cache_credito(id_credito: int) -> int:
+    """
+    Elimina de la caché todas las entradas de un crédito (cualquier fecha de corte).
+    
+    Returns:
+        Número de entradas eliminadas
+    """
+    eliminadas = _cache.invalidate_where(lambda key: key[0] == id_credito)
+    return eliminadas + int(_respaldo.invalidate(id_credito))
+
+
+def estadocuenta_stats() -> dict:
+    """Estado del circuit breaker y de las peticiones de cobertura"""
+    retraso = _retraso_cobertura()
+    return {
+        "circuito": {
+            "habilitado": EstadoCuentaConfig.CB_ENABLED,
+            **_circuito.stats()
+        },
+        "cobertura": {
+            "habilitada": EstadoCuentaConfig.HEDGE_ENABLED,
+            "retraso_ms": round(retraso * 1000, 1) if retraso is not None else None,
+            **_coberturas
+        }
+    }
+
+
+def cache_stats() -> dict:
+    """Estadísticas de la caché de estado de cuenta"""
+    return {
+        "habilitada": EstadoCuentaConfig.CACHE_TTL > 0,
+        **_cache.stats(),
+        "respaldo": {
+            "habilitado": EstadoCuentaConfig.STALE_MAX_AGE > 0,
+            "swr_segundos": EstadoCuentaConfig.SWR_SECONDS,
+            **_desactualizadas,
+            **_respaldo.stats()
+        }
+    }
+
+
+async def consultar_datos_saldos(id_credito: int, fecha_corte: str) -> Tuple[dict, Optional[int]]:
+    """
+    Consulta el estado de cuenta del crédito y extrae `datosSaldos`.
+    
+    El resultado no cambia durante el día, por lo que se guarda en caché
+    por (idCredito, fechaCorte) durante ESTADOCUENTA_CACHE_TTL segundos.
+    Las consultas concurrentes del mismo crédito comparten una sola llamada.
+    
+    Además se conserva el último datosSaldos de cada crédito:
+    
+    - Si la entrada expiró hace menos de ESTADOCUENTA_SWR_SECONDS, se
+      responde de inmediato y se refresca en segundo plano.
+    - Si la API externa falla, se responde el último conocido mientras
+      no tenga más de ESTADOCUENTA_STALE_MAX_AGE segundos.
+    
+    Args:
+        id_credito: ID del crédito
+        fecha_corte: Fecha de corte en formato YYYY-MM-DD
+    
+    Returns:
+        Tupla (datosSaldos, antigüedad en segundos si está desactualizado o None)
+    
+    Raises:
+        HTTPException: 502 si la API externa falla (o no retorna datosSaldos)
+            y no hay un respaldo vigente
+    """
+    if EstadoCuentaConfig.CACHE_TTL > 0:
+        datos_saldos = _cache.get((id_credito, fecha_corte))
+        if datos_saldos is not None:
+            return datos_saldos, None
+
+    respaldo = _respaldo.get(id_credito) if EstadoCuentaConfig.STALE_MAX_AGE > 0 else None
+
+    if (
+        respaldo is not None
+        and EstadoCuentaConfig.CACHE_TTL > 0
+        and respaldo[1] == fecha_corte
+        and _antiguedad(respaldo) <= EstadoCuentaConfig.CACHE_TTL + EstadoCuentaConfig.SWR_SECONDS
+    ):
+        _revalidar_en_segundo_plano(id_credito, fecha_corte)
+        _desactualizadas["revalidaciones"] += 1
+        return respaldo[0], _antiguedad(respaldo)
+
+    try:
+        datos_saldos = await coalescedor.do(
+            ("estadocuenta", id_credito, fecha_corte),
+            lambda: _solicitar_datos_saldos(id_credito, fecha_corte)
+        )
+    except HTTPException as e:
+        if e.status_code != 502 or respaldo is None:
+            raise
+        _desactualizadas["respaldos_por_error"] += 1
+        return respaldo[0], _antiguedad(respaldo)
+    return datos_saldos, None
+
+
+def _antiguedad(respaldo: tuple) -> int:
+    """Segundos desde que se obtuvo el datosSaldos del respaldo"""
+    return int(time.monotonic() - respaldo[2])
+
+
+def _revalidar_en_segundo_plano(id_credito: int, fecha_corte: str) -> None:
+    """Refresca datosSaldos sin bloquear la respuesta (coalescido con cualquier consulta en vuelo)"""
+    tarea = asyncio.ensure_future(coalescedor.do(
+        ("estadocuenta", id_credito, fecha_corte),
+        lambda: _solicitar_datos_saldos(id_credito, fecha_corte)
+    ))
+    _revalidaciones.add(tarea)
+    tarea.add_done_callback(_terminar_revalidacion)
+
+
+def _terminar_revalidacion(tarea: asyncio.Task) -> None:
+    _revalidaciones.discard(tarea)
+    # El error ya quedó en las métricas; se marca como recuperado
+    if not tarea.cancelled():
+        tarea.exception()
+
+
+async def _solicitar_datos_saldos(id_credito: int, fecha_corte: str) -> dict:
+    """
+    Llama a la API externa (protegida por el circuit breaker), valida la
+    respuesta y guarda datosSaldos en caché.
+    
+    Raises:
+        HTTPException: 502 si el circuito está abierto, si la API externa
+            falla o si no retorna datosSaldos
+    """
+    payload = {
+        "idCredito": id_credito,
+        "fechaCorte": fecha_corte
+    }
+
+    headers = {
+        "Token": EstadoCuentaConfig.TOKEN,
+        "Content-Type": "application/json"
+    }
+
+    data_externa = await _llamar_con_circuito(payload, headers)
+
+    datos_saldos = (
+        data_externa
+        .get("estadoCuenta", {})
+        .get("datosSaldos", {})
+    )
+
+    if not datos_saldos:
+        estadocuenta_errores.inc("sin_datos_saldos")
+        raise HTTPException(
+            status_code=502,
+            detail="La API externa no retornó datosSaldos para este crédito"
+        )
+
+    if EstadoCuentaConfig.CACHE_TTL > 0:
+        _cache.set((id_credito, fecha_corte), datos_saldos)
+    if EstadoCuentaConfig.STALE_MAX_AGE > 0:
+        _respaldo.set(id_credito, (datos_saldos, fecha_corte, time.monotonic()))
+
+    return datos_saldos
+
+
+async def _llamar_con_circuito(payload: dict, headers: dict) -> dict:
+    """
+    Pide permiso al circuit breaker, hace la llamada (con cobertura si está
+    habilitada) y le reporta el resultado. Con el circuito abierto responde
+    502 de inmediato, sin esperar el timeout de la API externa.
+    """
+    if not EstadoCuentaConfig.CB_ENABLED:
+        return await _llamar_con_cobertura(payload, headers)
+
+    try:
+        _circuito.adquirir()
+    except CircuitoAbiertoError as e:
+        estadocuenta_errores.inc("circuito_abierto")
+        raise HTTPException(
+            status_code=502,
+            detail=f"La API externa no está disponible (circuito abierto); reintente en {math.ceil(e.reintentar_en)} s"
+        )
+
+    inicio = time.perf_counter()
+    registrado = False
+    try:
+        data_externa = await _llamar_con_cobertura(payload, headers)
+        _circuito.registrar_exito(time.perf_counter() - inicio)
+        registrado = True
+        return data_externa
+    except ErrorEstadoCuenta as e:
+        if e.falla_servicio:
+            _circuito.registrar_fallo(time.perf_counter() - inicio)
+        else:
+            _circuito.registrar_exito(time.perf_counter() - inicio)
+        registrado = True
+        raise
+    finally:
+        if not registrado:
+            _circuito.liberar()
+
+
+def _retraso_cobertura() -> Optional[float]:
+    """
+    Segundos que se espera antes de lanzar la petición de cobertura: el
+    percentil ESTADOCUENTA_HEDGE_PERCENTILE de las latencias recientes (o
+    ESTADOCUENTA_HEDGE_DEFAULT_DELAY_MS mientras no hay muestras suficientes).
+    None si la cobertura está deshabilitada o el circuito no está cerrado.
+    """
+    if not EstadoCuentaConfig.HEDGE_ENABLED:
+        return None
+    if EstadoCuentaConfig.CB_ENABLED and _circuito.estado != CERRADO:
+        return None
+    percentil = _circuito.percentil(EstadoCuentaConfig.HEDGE_PERCENTILE)
+    retraso = percentil if percentil is not None else EstadoCuentaConfig.HEDGE_DEFAULT_DELAY_MS / 1000
+    return max(retraso, EstadoCuentaConfig.HEDGE_MIN_DELAY_MS / 1000)
+
+
+async def _llamar_con_cobertura(payload: dict, headers: dict) -> dict:
+    """
+    Llamada con petición de cobertura: si la primera no responde dentro del
+    retraso de cobertura se lanza una segunda idéntica y gana la primera
+    que responda bien; la otra se cancela. Solo falla si fallan ambas.
+    """
+    retraso = _retraso_cobertura()
+    if retraso is None:
+        return await _llamar_estadocuenta(payload, headers)
+
+    tareas = [asyncio.ensure_future(_llamar_estadocuenta(payload, headers))]
+    try:
+        hechas, _ = await asyncio.wait(tareas, timeout=retraso)
+        if hechas:
+            return tareas[0].result()
+
+        _coberturas["lanzadas"] += 1
+        tareas.append(asyncio.ensure_future(_llamar_estadocuenta(payload, headers)))
+        pendientes = set(tareas)
+        error = None
+        while pendientes:
+            hechas, pendientes = await asyncio.wait(pendientes, return_when=asyncio.FIRST_COMPLETED)
+            exitosas = [tarea for tarea in hechas if tarea.exception() is None]
+            if exitosas:
+                if exitosas[0] is tareas[1]:
+                    _coberturas["ganadoras"] += 1
+                return exitosas[0].result()
+            error = error or next(tarea.exception() for tarea in hechas)
+        raise error
+    finally:
+        for tarea in tareas:
+            tarea.cancel()
+
+
+async def _llamar_estadocuenta(payload: dict, headers: dict) -> dict:
+    """
+    Un intento de llamada a la API externa con métricas.
+    
+    Returns:
+        JSON de la respuesta
+    
+    Raises:
+        ErrorEstadoCuenta: 502 si la API externa falla
+    """
+    inicio = time.perf_counter()
+    # Si la tarea se cancela antes de responder queda como "cancelada"
+    resultado = "cancelada"
+    estadocuenta_en_vuelo.inc()
+    try:
+        resp = await post_json(EstadoCuentaConfig.URL, payload, headers=headers)
+        resp.raise_for_status()
+        data_externa = resp.json()
+        resultado = "ok"
+        return data_externa
+    except httpx.TimeoutException:
+        resultado = "timeout"
+        raise ErrorEstadoCuenta("Tiempo de espera agotado al consultar la API externa")
+    except httpx.HTTPStatusError as e:
+        resultado = f"http_{e.response.status_code}"
+        raise ErrorEstadoCuenta(
+            f"Error en la API externa: {e.response.status_code}",
+            falla_servicio=e.response.status_code >= 500
+        )
+    except Exception as e:
+        resultado = "error"
+        raise ErrorEstadoCuenta(f"No se pudo conectar con la API externa: {str(e)}")
+    finally:
+        estadocuenta_en_vuelo.dec()
+        duracion = time.perf_counter() - inicio
+        estadocuenta_duracion.observe(duracion, resultado)
+        registrar("estadocuenta", duracion, resultado)
+        if resultado not in ("ok", "cancelada"):
+            estadocuenta_errores.inc(resultado)
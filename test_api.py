@@ -11,7 +11,8 @@ from dotenv import load_dotenv
 load_dotenv()
 
 # Obtener API Key del .env
-API_KEY = os.getenv("API_KEYS", "").split(",")[0].strip()
+# Cada llave puede traer límites (llave:rps:rafaga:cuota); solo se envía la llave
+API_KEY = os.getenv("API_KEYS", "").split(",")[0].split(":")[0].strip()
 
 
 def test_condonacion(id_credito: int, base_url: str = "http://localhost:8000"):
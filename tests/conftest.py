@@ -0,0 +1,26 @@
+"""
+Configuración común de las pruebas
+"""
+
+import pytest
+
+from utils import cache, circuito, limites
+
+
+class Reloj:
+    """Sustituye a time.monotonic para controlar expiraciones, esperas y recargas"""
+
+    def __init__(self):
+        self.ahora = 1000.0
+
+    def monotonic(self) -> float:
+        return self.ahora
+
+
+@pytest.fixture
+def reloj(monkeypatch):
+    """Reloj manual para utils.cache, utils.circuito y utils.limites"""
+    reloj = Reloj()
+    for modulo in (cache, circuito, limites):
+        monkeypatch.setattr(modulo, "time", reloj)
+    return reloj
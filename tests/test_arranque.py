@@ -0,0 +1,112 @@
+"""
+Pruebas de utils/arranque.py y de /health/ready con pasos requeridos fallidos
+"""
+
+import asyncio
+
+import httpx
+import pymysql
+import pytest
+
+import main
+from config.database import ConnectionPool
+from config.http_client import HttpClientConfig
+from repositories.indices import IndicesConfig
+from repositories.resumen_credito import RollupConfig
+from repositories.segundometro import SegundometroConfig
+from utils.arranque import ArranqueConfig, EstadoArranque
+
+
+def _fallar(*args, **kwargs):
+    raise pymysql.err.OperationalError(2003, "Can't connect to MySQL server")
+
+
+@pytest.fixture
+def estado(monkeypatch):
+    """Estado de arranque nuevo y solo con los pasos requeridos"""
+    estado = EstadoArranque()
+    monkeypatch.setattr(main, "arranque", estado)
+    monkeypatch.setattr(ArranqueConfig, "ESPERAR", True)
+    monkeypatch.setattr(ArranqueConfig, "TIMEOUT", 0.2)
+    monkeypatch.setattr(ArranqueConfig, "REINTENTO", 0.01)
+    monkeypatch.setattr(HttpClientConfig, "WARMUP", False)
+    monkeypatch.setattr(SegundometroConfig, "ENABLED", False)
+    monkeypatch.setattr(RollupConfig, "ENABLED", False)
+    monkeypatch.setattr(IndicesConfig, "ENABLED", False)
+    return estado
+
+
+async def _ready() -> httpx.Response:
+    transporte = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transporte, base_url="http://prueba") as cliente:
+        return await cliente.get("/health/ready")
+
+
+def test_paso_opcional_fallido_no_impide_marcar_listo():
+    async def escenario():
+        estado = EstadoArranque()
+        async with estado.paso("segundometro"):
+            raise RuntimeError("sin réplica")
+        estado.marcar_listo()
+        return estado
+
+    estado = asyncio.run(escenario())
+    assert estado.listo
+    assert estado.stats()["pasos"][0]["error"] == "sin réplica"
+
+
+def test_paso_requerido_fallido_impide_marcar_listo_hasta_reintentar():
+    async def escenario():
+        estado = EstadoArranque()
+        async with estado.paso("mysql", requerido=True):
+            raise RuntimeError("sin conexión")
+        estado.marcar_listo()
+        listo_con_fallo = estado.listo
+        async with estado.paso("mysql", requerido=True):
+            pass
+        estado.marcar_listo()
+        return estado, listo_con_fallo
+
+    estado, listo_con_fallo = asyncio.run(escenario())
+    assert not listo_con_fallo
+    assert estado.listo
+    assert estado.fallidos == {}
+    # El reintento reemplaza el registro del paso
+    assert [(paso["paso"], paso["error"]) for paso in estado.stats()["pasos"]] == [("mysql", None)]
+
+
+def test_health_ready_no_responde_200_con_mysql_caido(estado, monkeypatch):
+    monkeypatch.setattr(ConnectionPool, "_conectar", _fallar)
+
+    async def escenario():
+        async with main.lifespan(main.app):
+            return await _ready()
+
+    respuesta = asyncio.run(escenario())
+    assert respuesta.status_code == 503
+    cuerpo = respuesta.json()
+    assert "mysql" in cuerpo["motivos"][0] and "esquema" in cuerpo["motivos"][0]
+    assert cuerpo["arranque"]["pasos_fallidos"] == ["esquema", "mysql"]
+    assert cuerpo["arranque"]["reintentos"] > 0
+    assert not estado.listo
+
+
+def test_health_ready_responde_200_cuando_mysql_vuelve(estado, monkeypatch):
+    intentos = []
+
+    def init_pools():
+        intentos.append(1)
+        if len(intentos) < 3:
+            _fallar()
+
+    monkeypatch.setitem(main.PASOS_REQUERIDOS, "mysql", init_pools)
+    monkeypatch.setitem(main.PASOS_REQUERIDOS, "esquema", lambda: None)
+
+    async def escenario():
+        async with main.lifespan(main.app):
+            return await _ready()
+
+    respuesta = asyncio.run(escenario())
+    assert respuesta.status_code == 200
+    assert len(intentos) == 3
+    assert respuesta.json()["arranque"]["pasos_fallidos"] == []
@@ -0,0 +1,90 @@
+"""
+Pruebas de utils/cache.py
+"""
+
+import pytest
+
+from utils.cache import TTLCache, estimar_tamano
+
+
+def test_get_retorna_valor_y_cuenta_hits_y_misses(reloj):
+    cache = TTLCache(max_entries=10, ttl=60)
+    assert cache.get("a") is None
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+
+
+def test_entrada_expira_despues_del_ttl(reloj):
+    cache = TTLCache(max_entries=10, ttl=60)
+    cache.set("a", 1)
+    reloj.ahora += 59.9
+    assert cache.get("a") == 1
+    reloj.ahora += 0.1
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
+    assert len(cache) == 0
+
+
+def test_desaloja_la_menos_usada_al_exceder_entradas(reloj):
+    cache = TTLCache(max_entries=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    # "a" pasa a ser la más reciente; "b" es la LRU
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_desaloja_por_memoria_y_lleva_la_cuenta_de_bytes(reloj):
+    cache = TTLCache(max_entries=100, ttl=60, max_bytes=25, sizeof=lambda valor: 10)
+    cache.set("a", "x")
+    cache.set("b", "x")
+    assert cache.stats()["bytes"] == 20
+    cache.set("c", "x")
+    assert cache.get("a") is None
+    assert cache.stats()["bytes"] == 20
+
+
+def test_reemplazar_una_llave_no_duplica_bytes(reloj):
+    cache = TTLCache(max_entries=10, ttl=60, sizeof=lambda valor: len(valor))
+    cache.set("a", "xxxx")
+    cache.set("a", "xx")
+    assert len(cache) == 1
+    assert cache.stats()["bytes"] == 2
+
+
+def test_valor_mayor_que_max_bytes_no_se_guarda(reloj):
+    cache = TTLCache(max_entries=10, ttl=60, max_bytes=5, sizeof=lambda valor: 10)
+    cache.set("a", "x")
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_valor_mayor_que_max_bytes_desaloja_el_anterior(reloj):
+    cache = TTLCache(max_entries=10, ttl=60, max_bytes=5, sizeof=len)
+    cache.set("a", "xx")
+    cache.set("a", "x" * 10)
+    assert cache.get("a") is None
+    assert cache.stats()["bytes"] == 0
+
+
+def test_invalidate_e_invalidate_where(reloj):
+    cache = TTLCache(max_entries=10, ttl=60, sizeof=lambda valor: 1)
+    for llave in [(1, "2024-01-01"), (1, "2024-02-01"), (2, "2024-01-01")]:
+        cache.set(llave, "x")
+    assert cache.invalidate((2, "2024-01-01")) is True
+    assert cache.invalidate((2, "2024-01-01")) is False
+    assert cache.invalidate_where(lambda llave: llave[0] == 1) == 2
+    assert len(cache) == 0
+    assert cache.stats()["bytes"] == 0
+
+
+def test_estimar_tamano_recorre_contenedores():
+    plano = estimar_tamano({})
+    anidado = estimar_tamano({"a": [1, 2, {"b": "texto"}]})
+    assert anidado > plano
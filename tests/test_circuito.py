@@ -0,0 +1,127 @@
+"""
+Pruebas de utils/circuito.py
+"""
+
+import pytest
+
+from utils.circuito import ABIERTO, CERRADO, SEMI_ABIERTO, CircuitBreaker, CircuitoAbiertoError
+
+
+def _circuito(**opciones) -> CircuitBreaker:
+    parametros = dict(
+        ventana=10, min_llamadas=4, tasa_fallos=0.5, umbral_lento=1.0,
+        tasa_lentas=0.75, espera_abierto=30.0, llamadas_prueba=2
+    )
+    parametros.update(opciones)
+    return CircuitBreaker("prueba", **parametros)
+
+
+def _llamar(circuito: CircuitBreaker, falla: bool = False, duracion: float = 0.1) -> None:
+    circuito.adquirir()
+    if falla:
+        circuito.registrar_fallo(duracion)
+    else:
+        circuito.registrar_exito(duracion)
+
+
+def _abrir(circuito: CircuitBreaker) -> None:
+    for _ in range(circuito.min_llamadas):
+        _llamar(circuito, falla=True)
+    assert circuito.estado == ABIERTO
+
+
+def test_no_abre_antes_del_minimo_de_llamadas(reloj):
+    circuito = _circuito()
+    for _ in range(3):
+        _llamar(circuito, falla=True)
+    assert circuito.estado == CERRADO
+
+
+def test_abre_por_tasa_de_fallos(reloj):
+    circuito = _circuito()
+    _llamar(circuito)
+    _llamar(circuito)
+    _llamar(circuito, falla=True)
+    assert circuito.estado == CERRADO
+    _llamar(circuito, falla=True)
+    assert circuito.estado == ABIERTO
+    assert circuito.aperturas == 1
+
+
+def test_abre_por_llamadas_lentas(reloj):
+    circuito = _circuito()
+    _llamar(circuito, duracion=0.1)
+    for _ in range(3):
+        _llamar(circuito, duracion=2.0)
+    assert circuito.estado == ABIERTO
+
+
+def test_abierto_rechaza_sin_llamar(reloj):
+    circuito = _circuito()
+    _abrir(circuito)
+    reloj.ahora += 10
+    with pytest.raises(CircuitoAbiertoError) as error:
+        circuito.adquirir()
+    assert error.value.reintentar_en == pytest.approx(20.0)
+    assert circuito.rechazadas == 1
+
+
+def test_semi_abierto_limita_las_pruebas_y_cierra_si_salen_bien(reloj):
+    circuito = _circuito()
+    _abrir(circuito)
+    reloj.ahora += 30
+    assert circuito.estado == SEMI_ABIERTO
+    circuito.adquirir()
+    circuito.adquirir()
+    with pytest.raises(CircuitoAbiertoError):
+        circuito.adquirir()
+    circuito.registrar_exito(0.1)
+    assert circuito.estado == SEMI_ABIERTO
+    circuito.registrar_exito(0.1)
+    assert circuito.estado == CERRADO
+    assert circuito.stats()["llamadas_en_ventana"] == 0
+
+
+def test_semi_abierto_vuelve_a_abrir_con_un_fallo_o_una_lenta(reloj):
+    circuito = _circuito()
+    _abrir(circuito)
+    reloj.ahora += 30
+    _llamar(circuito, falla=True)
+    assert circuito.estado == ABIERTO
+    assert circuito.aperturas == 2
+    reloj.ahora += 30
+    _llamar(circuito, duracion=5.0)
+    assert circuito.estado == ABIERTO
+
+
+def test_liberar_devuelve_el_permiso_de_prueba(reloj):
+    circuito = _circuito(llamadas_prueba=1)
+    _abrir(circuito)
+    reloj.ahora += 30
+    circuito.adquirir()
+    circuito.liberar()
+    circuito.adquirir()
+    circuito.registrar_exito(0.1)
+    assert circuito.estado == CERRADO
+
+
+def test_percentil_requiere_muestras(reloj):
+    circuito = _circuito(min_llamadas=4, tasa_lentas=1.1)
+    for duracion in (0.1, 0.2, 0.3):
+        _llamar(circuito, duracion=duracion)
+    assert circuito.percentil(95) is None
+    _llamar(circuito, duracion=0.4)
+    assert circuito.percentil(50) == 0.2
+    assert circuito.percentil(95) == 0.4
+    assert circuito.percentil(0) == 0.1
+
+
+def test_stats(reloj):
+    circuito = _circuito()
+    _llamar(circuito)
+    _llamar(circuito, falla=True)
+    stats = circuito.stats()
+    assert stats["estado"] == CERRADO
+    assert stats["llamadas_en_ventana"] == 2
+    assert stats["tasa_fallos"] == 0.5
+    assert (stats["exitos"], stats["fallos"]) == (1, 1)
@@ -0,0 +1,32 @@
+"""
+Pruebas de la verificación de columnas requeridas (repositories/condonaciones.py)
+"""
+
+import pytest
+
+from repositories import condonaciones
+from repositories.condonaciones import EsquemaIncompletoError, verificar_esquema
+
+
+def _columnas(monkeypatch, rows):
+    monkeypatch.setattr(condonaciones, "_consultar", lambda nombre, params=(), **variantes: rows)
+
+
+def test_esquema_con_id_primario(monkeypatch):
+    _columnas(monkeypatch, [
+        {"tabla": "gastos_cobranza", "columna": "Id_credito", "llave": "MUL"},
+        {"tabla": "gastos_cobranza", "columna": "id", "llave": "PRI"},
+    ])
+    verificar_esquema()
+
+
+def test_esquema_sin_id(monkeypatch):
+    _columnas(monkeypatch, [{"tabla": "gastos_cobranza", "columna": "Id_credito", "llave": "MUL"}])
+    with pytest.raises(EsquemaIncompletoError, match="gastos_cobranza.id"):
+        verificar_esquema()
+
+
+def test_esquema_con_id_no_unico(monkeypatch):
+    _columnas(monkeypatch, [{"tabla": "gastos_cobranza", "columna": "id", "llave": "MUL"}])
+    with pytest.raises(EsquemaIncompletoError):
+        verificar_esquema()
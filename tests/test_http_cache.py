@@ -0,0 +1,134 @@
+"""
+Pruebas de utils/http_cache.py
+"""
+
+from datetime import date, datetime
+from decimal import Decimal
+
+from fastapi import Response
+
+from utils.http_cache import (
+    HttpCacheConfig,
+    agregar_encabezados_cache,
+    calcular_etag,
+    etag_coincide,
+    huella_desde_detalles,
+    respuesta_no_modificada
+)
+
+
+DATOS_GENERALES = {
+    "id_credito": 1600,
+    "nombre_cliente": "Juan Pérez",
+    "id_cliente": 10,
+    "domicilio_completo": "Calle 1",
+    "bucket_morosidad": "B2",
+    "dias_mora": 15,
+    "saldo_vencido": Decimal("1200.50")
+}
+
+
+def _detalle(periodo, monto, cuota, condonado=0, fecha_condonacion=None):
+    return {
+        "periodoinicio": periodo,
+        "monto_valor": monto,
+        "cuota": cuota,
+        "condonado": condonado,
+        "fecha_condonacion": fecha_condonacion
+    }
+
+
+DETALLES = [
+    _detalle(date(2026, 1, 5), 0.1, 250.0),
+    _detalle(date(2026, 1, 12), 0.2, 250.0, condonado=1, fecha_condonacion=datetime(2026, 2, 1, 10, 0)),
+    _detalle(None, None, None),
+    _detalle(date(2026, 1, 19), 250.5, 250.0, condonado=1, fecha_condonacion=datetime(2026, 1, 20, 9, 30)),
+]
+
+# Lo que retorna huella_gastos en MySQL para las mismas filas
+HUELLA_MYSQL = {
+    "total": 4,
+    "condonados": Decimal("2"),
+    "ultima_condonacion": datetime(2026, 2, 1, 10, 0),
+    "ultimo_periodo": date(2026, 1, 19),
+    "suma_monto_valor": Decimal("250.80"),
+    "suma_cuota": Decimal("750.00")
+}
+
+
+def test_huella_desde_detalles_calcula_los_agregados():
+    huella = huella_desde_detalles(DETALLES)
+    assert huella["total"] == 4
+    assert huella["condonados"] == 2
+    assert huella["ultima_condonacion"] == datetime(2026, 2, 1, 10, 0)
+    assert huella["ultimo_periodo"] == date(2026, 1, 19)
+    # Suma exacta: 0.1 + 0.2 + 250.5 con floats no es 250.8
+    assert huella["suma_monto_valor"] == Decimal("250.8")
+    assert huella["suma_cuota"] == Decimal("750")
+
+
+def test_huella_sin_detalles():
+    huella = huella_desde_detalles([])
+    assert huella["total"] == 0
+    assert huella["ultima_condonacion"] is None
+    assert huella["suma_monto_valor"] == 0
+
+
+def test_etag_igual_desde_detalles_y_desde_mysql():
+    datos_replica = dict(DATOS_GENERALES, saldo_vencido=1200.5)
+    desde_detalles = calcular_etag("general", datos_replica, huella_desde_detalles(DETALLES))
+    desde_mysql = calcular_etag("general", DATOS_GENERALES, HUELLA_MYSQL)
+    assert desde_detalles == desde_mysql
+
+
+def test_etag_es_fuerte_y_entre_comillas():
+    etag = calcular_etag("general", DATOS_GENERALES, HUELLA_MYSQL)
+    assert etag.startswith('"') and etag.endswith('"')
+    assert not etag.startswith("W/")
+
+
+def test_etag_cambia_con_la_variante():
+    assert calcular_etag("general", DATOS_GENERALES, HUELLA_MYSQL) != calcular_etag(
+        "condonados", DATOS_GENERALES, HUELLA_MYSQL
+    )
+
+
+def test_etag_cambia_con_monto_valor_o_cuota():
+    base = calcular_etag("general", DATOS_GENERALES, HUELLA_MYSQL)
+    otro_monto = dict(HUELLA_MYSQL, suma_monto_valor=Decimal("260.80"))
+    otra_cuota = dict(HUELLA_MYSQL, suma_cuota=Decimal("700.00"))
+    assert calcular_etag("general", DATOS_GENERALES, otro_monto) != base
+    assert calcular_etag("general", DATOS_GENERALES, otra_cuota) != base
+
+
+def test_etag_cambia_con_los_datos_generales():
+    base = calcular_etag("general", DATOS_GENERALES, HUELLA_MYSQL)
+    assert calcular_etag("general", dict(DATOS_GENERALES, dias_mora=16), HUELLA_MYSQL) != base
+
+
+def test_if_none_match():
+    etag = '"abc"'
+    assert etag_coincide('"abc"', etag)
+    assert etag_coincide('W/"abc"', etag)
+    assert etag_coincide('"xyz", "abc"', etag)
+    assert etag_coincide("*", etag)
+    assert not etag_coincide('"xyz"', etag)
+    assert not etag_coincide(None, etag)
+    assert not etag_coincide("", etag)
+
+
+def test_respuesta_no_modificada(monkeypatch):
+    monkeypatch.setattr(HttpCacheConfig, "CACHE_CONTROL", "private, no-cache")
+    respuesta = respuesta_no_modificada('"abc"')
+    assert respuesta.status_code == 304
+    assert respuesta.body == b""
+    assert respuesta.headers["ETag"] == '"abc"'
+    assert respuesta.headers["Cache-Control"] == "private, no-cache"
+
+
+def test_encabezados_sin_etag_ni_cache_control(monkeypatch):
+    monkeypatch.setattr(HttpCacheConfig, "CACHE_CONTROL", "")
+    respuesta = Response()
+    agregar_encabezados_cache(respuesta, None)
+    assert "ETag" not in respuesta.headers
+    assert "Cache-Control" not in respuesta.headers
@@ -0,0 +1,83 @@
+"""
+Pruebas de utils/limites.py y de su aplicación por API Key
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+
+from config.security import _ClaveApi, _aplicar_limites
+from utils.limites import CuotaDiaria, TokenBucket
+
+
+def test_bucket_permite_la_rafaga_y_luego_pide_esperar(reloj):
+    bucket = TokenBucket(tasa=2, capacidad=3)
+    assert [bucket.consumir() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.consumir() == pytest.approx(0.5)
+
+
+def test_bucket_se_recarga_con_el_tiempo_hasta_la_capacidad(reloj):
+    bucket = TokenBucket(tasa=2, capacidad=3)
+    for _ in range(3):
+        bucket.consumir()
+    reloj.ahora += 1
+    assert bucket.disponibles == pytest.approx(2)
+    reloj.ahora += 100
+    assert bucket.disponibles == pytest.approx(3)
+    assert bucket.consumir() == 0.0
+
+
+def test_bucket_capacidad_minima_de_uno(reloj):
+    bucket = TokenBucket(tasa=0.5, capacidad=0)
+    assert bucket.consumir() == 0.0
+    assert bucket.consumir() == pytest.approx(2.0)
+
+
+def test_cuota_se_agota_y_reporta_segundos_hasta_medianoche():
+    cuota = CuotaDiaria(2)
+    ahora = datetime.combine(cuota._dia, datetime.min.time()).replace(hour=23, minute=59)
+    assert cuota.consumir(ahora) == 0.0
+    assert cuota.consumir(ahora) == 0.0
+    assert cuota.consumir(ahora) == pytest.approx(60)
+    assert cuota.usadas == 2
+
+
+def test_cuota_espera_no_cuenta_la_peticion():
+    cuota = CuotaDiaria(1)
+    ahora = datetime.combine(cuota._dia, datetime.min.time()).replace(hour=12)
+    assert cuota.espera(ahora) == 0.0
+    assert cuota.usadas == 0
+
+
+def test_cuota_se_reinicia_al_cambiar_de_dia():
+    cuota = CuotaDiaria(1)
+    hoy = datetime.combine(cuota._dia, datetime.min.time()).replace(hour=12)
+    cuota.consumir(hoy)
+    assert cuota.consumir(hoy) > 0
+    manana = hoy + timedelta(days=1)
+    assert cuota.consumir(manana) == 0.0
+    assert cuota.usadas == 1
+
+
+def test_rechazo_por_cuota_no_gasta_token(reloj):
+    clave = _ClaveApi("huella", rps=1, rafaga=5, cuota_diaria=1)
+    _aplicar_limites(clave)
+    tokens = clave.limite.disponibles
+    with pytest.raises(HTTPException) as error:
+        _aplicar_limites(clave)
+    assert error.value.status_code == 429
+    assert "Cuota diaria" in error.value.detail
+    assert clave.limite.disponibles == tokens
+    assert (clave.rechazadas_cuota, clave.rechazadas_limite) == (1, 0)
+
+
+def test_rechazo_por_limite_no_gasta_cuota(reloj):
+    clave = _ClaveApi("huella", rps=1, rafaga=1, cuota_diaria=10)
+    _aplicar_limites(clave)
+    with pytest.raises(HTTPException) as error:
+        _aplicar_limites(clave)
+    assert error.value.status_code == 429
+    assert error.value.headers["Retry-After"] == "1"
+    assert clave.cuota.usadas == 1
+    assert (clave.rechazadas_cuota, clave.rechazadas_limite) == (0, 1)
@@ -0,0 +1,105 @@
+"""
+Pruebas de repositories/mappers.py
+"""
+
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from models.condonaciones import DatosGenerales, DetalleCondonacion
+from repositories.mappers import (
+    COLUMNAS_DETALLE,
+    datos_generales_general,
+    datos_generales_modelo,
+    detalle_general,
+    detalle_modelo,
+    fila_exportacion
+)
+from utils.serializacion import dumps
+
+
+# Fila de gastos_cobranza como la entrega pymysql (orden de COLUMNAS_DETALLE)
+FILA = (
+    date(2026, 1, 5),
+    date(2026, 1, 11),
+    "2026-01",
+    "1/52",
+    Decimal("150.50"),
+    Decimal("150.00"),
+    1,
+    datetime(2026, 1, 28, 10, 30)
+)
+FILA_VACIA = (date(2026, 1, 12), None, None, None, None, None, 0, None)
+
+DATOS_GENERALES = {
+    "id_credito": 1600,
+    "nombre_cliente": "Juan Pérez García",
+    "id_cliente": 67890,
+    "domicilio_completo": "Calle Principal #123",
+    "bucket_morosidad": "B2",
+    "dias_mora": 15,
+    "saldo_vencido": Decimal("3500.00")
+}
+
+
+def test_detalle_modelo_igual_que_pydantic():
+    for fila in (FILA, FILA_VACIA):
+        modelo = DetalleCondonacion(**dict(zip(COLUMNAS_DETALLE, fila)))
+        assert dumps(detalle_modelo(fila)) == modelo.model_dump_json().encode("utf-8")
+
+
+def test_detalle_general():
+    assert json.loads(dumps(detalle_general(FILA + ("CONDONADO",)))) == {
+        "periodoinicio": "2026-01-05",
+        "periodofin": "2026-01-11",
+        "semana": "2026-01",
+        "parcialidad": "1/52",
+        "monto_valor": 150.5,
+        "cuota": 150.0,
+        "condonado": 1,
+        "fecha_condonacion": "2026-01-28 10:30:00",
+        "status": "CONDONADO"
+    }
+
+
+def test_detalle_general_montos_vacios_en_cero():
+    detalle = detalle_general(FILA_VACIA + ("PENDIENTE",))
+    assert detalle["monto_valor"] == 0
+    assert detalle["cuota"] == 0
+    assert detalle["periodofin"] is None
+    assert detalle["fecha_condonacion"] is None
+
+
+def test_fila_exportacion_lleva_id_credito_primero():
+    linea = fila_exportacion((1600,) + FILA + ("CONDONADO",))
+    assert list(linea)[0] == "id_credito"
+    assert linea["id_credito"] == 1600
+    assert linea["periodoinicio"] == "2026-01-05"
+    assert linea["status"] == "CONDONADO"
+    assert json.loads(dumps(linea)) == linea
+
+
+def test_datos_generales_modelo_igual_que_pydantic():
+    modelo = DatosGenerales(**DATOS_GENERALES)
+    assert dumps(datos_generales_modelo(DATOS_GENERALES)) == modelo.model_dump_json().encode("utf-8")
+
+
+def test_datos_generales_modelo_convierte_enteros():
+    # Columnas VARCHAR/DECIMAL en la tabla: Pydantic las convertía a int
+    fila = dict(DATOS_GENERALES, id_credito="1600", id_cliente=Decimal("67890"), dias_mora="15")
+    datos = datos_generales_modelo(fila)
+    assert datos["id_credito"] == 1600 and type(datos["id_credito"]) is int
+    assert datos["id_cliente"] == 67890 and type(datos["id_cliente"]) is int
+    assert datos["dias_mora"] == 15 and type(datos["dias_mora"]) is int
+    assert dumps(datos) == DatosGenerales(**fila).model_dump_json().encode("utf-8")
+
+
+def test_datos_generales_modelo_con_nulos():
+    fila = dict.fromkeys(DATOS_GENERALES)
+    assert datos_generales_modelo(fila) == fila
+
+
+def test_datos_generales_general():
+    datos = datos_generales_general(DATOS_GENERALES)
+    assert datos["saldo_vencido"] == 3500.0
+    assert datos_generales_general(dict(DATOS_GENERALES, saldo_vencido=None))["saldo_vencido"] == 0
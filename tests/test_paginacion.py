@@ -0,0 +1,144 @@
+"""
+Pruebas de utils/paginacion.py y de la paginación keyset del endpoint general
+"""
+
+import asyncio
+import base64
+import json
+from datetime import date
+
+import pytest
+from fastapi import HTTPException
+
+import repositories.condonaciones as repositorio
+from repositories.mappers import COLUMNAS_DATOS_GENERALES
+from routers.condonaciones import _consultar_general_paginado
+from utils.paginacion import codificar_cursor, decodificar_cursor
+
+
+def test_cursor_ida_y_vuelta():
+    assert decodificar_cursor(codificar_cursor(date(2026, 1, 22), 48213)) == (date(2026, 1, 22), 48213)
+
+
+def test_cursor_con_periodo_nulo():
+    assert decodificar_cursor(codificar_cursor(None, 7)) == (None, 7)
+
+
+def test_cursor_es_url_safe_sin_relleno():
+    cursor = codificar_cursor(date(2026, 1, 22), 1)
+    assert "=" not in cursor
+    assert "+" not in cursor and "/" not in cursor
+
+
+def _cursor_crudo(contenido) -> str:
+    return base64.urlsafe_b64encode(json.dumps(contenido).encode()).decode().rstrip("=")
+
+
+@pytest.mark.parametrize("cursor", [
+    "no-es-base64!",
+    _cursor_crudo({"p": "2026-01-22"}),
+    _cursor_crudo({"p": "2026-13-40", "i": 1}),
+    _cursor_crudo({"p": "2026-01-22", "i": "1"}),
+    _cursor_crudo({"p": "2026-01-22", "i": True}),
+    _cursor_crudo([1, 2]),
+])
+def test_cursor_invalido_responde_400(cursor):
+    with pytest.raises(HTTPException) as error:
+        decodificar_cursor(cursor)
+    assert error.value.status_code == 400
+
+
+# --- Paginación keyset contra una tabla en memoria ---------------------------
+
+ID_CREDITO = 1600
+
+DATOS_GENERALES = (ID_CREDITO, "Juan Pérez", 10, "Calle 1", "B2", 15, 1200.0)
+
+# (id, periodo_inicio): periodos repetidos, NULL y ids fuera de orden
+GASTOS = [
+    (9, date(2026, 1, 5)),
+    (3, date(2026, 1, 5)),
+    (4, None),
+    (12, date(2026, 1, 12)),
+    (1, None),
+    (7, date(2026, 1, 5)),
+    (2, date(2026, 1, 19)),
+    (15, None),
+    (5, date(2026, 1, 12)),
+    (6, date(2026, 1, 19)),
+    (8, date(2026, 1, 26)),
+]
+
+
+def _orden_mysql(gasto):
+    """ORDER BY periodo_inicio ASC, id ASC (MySQL ordena NULL primero)"""
+    id_gasto, periodo = gasto
+    return (periodo is not None, periodo or date.min, id_gasto)
+
+
+def _despues_de(gasto, periodo, id_gasto) -> bool:
+    """Misma lógica que la condición de cursor del catálogo, con semántica de NULL de SQL"""
+    id_fila, periodo_fila = gasto
+    if periodo is None:
+        return (periodo_fila is None and id_fila > id_gasto) or periodo_fila is not None
+    if periodo_fila is None:
+        return False
+    return periodo_fila > periodo or (periodo_fila == periodo and id_fila > id_gasto)
+
+
+def _consultar_falso(nombre, params=(), tuplas=False, **variantes):
+    """Ejecuta pagina_general sobre GASTOS (LEFT JOIN: una fila vacía si no hay gastos)"""
+    assert nombre == "pagina_general"
+    params = list(params)
+    limite = params.pop()
+    gastos = sorted(GASTOS, key=_orden_mysql)
+    if variantes.get("con_cursor"):
+        periodo, periodo_igual, id_gasto, periodo_nulo = params[3:]
+        assert periodo == periodo_igual == periodo_nulo
+        gastos = [gasto for gasto in gastos if _despues_de(gasto, periodo, id_gasto)]
+    encabezado = DATOS_GENERALES + (len(GASTOS), 0)
+    if not gastos:
+        return [encabezado + (None,) * 10]
+    return [
+        encabezado + (id_gasto, periodo, None, f"S{id_gasto}", "1", 250.0, 250.0, 0, None, "PENDIENTE")
+        for id_gasto, periodo in gastos[:limite]
+    ]
+
+
+@pytest.fixture
+def tabla_en_memoria(monkeypatch):
+    monkeypatch.setattr(repositorio, "_consultar", _consultar_falso)
+    monkeypatch.setattr(repositorio.replica_segundometro, "disponible", lambda: False)
+
+
+def _recorrer(limite: int) -> list:
+    paginas = []
+    cursor = None
+    while True:
+        cuerpo, _ = asyncio.run(_consultar_general_paginado(ID_CREDITO, limite, cursor))
+        respuesta = json.loads(cuerpo)
+        paginas.append(respuesta)
+        paginacion = respuesta["paginacion"]
+        assert paginacion["tiene_mas"] == (paginacion["siguiente_cursor"] is not None)
+        if not paginacion["tiene_mas"]:
+            return paginas
+        cursor = paginacion["siguiente_cursor"]
+        assert len(paginas) <= len(GASTOS)
+
+
+@pytest.mark.parametrize("limite", [1, 2, 3, 4, len(GASTOS), len(GASTOS) + 5])
+def test_keyset_recorre_cada_gasto_una_vez_con_periodos_repetidos_y_nulos(tabla_en_memoria, limite):
+    paginas = _recorrer(limite)
+    semanas = [detalle["semana"] for pagina in paginas for detalle in pagina["detalle"]]
+    esperadas = [f"S{id_gasto}" for id_gasto, _ in sorted(GASTOS, key=_orden_mysql)]
+    assert semanas == esperadas
+    assert all(len(pagina["detalle"]) <= limite for pagina in paginas)
+    assert all(pagina["resumen"]["total_registros"] == len(GASTOS) for pagina in paginas)
+
+
+def test_keyset_ultima_fila_con_periodo_nulo_genera_cursor(tabla_en_memoria):
+    # Con limit=2 la primera página termina en un gasto con periodo NULL
+    cuerpo, _ = asyncio.run(_consultar_general_paginado(ID_CREDITO, 2, None))
+    paginacion = json.loads(cuerpo)["paginacion"]
+    assert paginacion["tiene_mas"] is True
+    assert decodificar_cursor(paginacion["siguiente_cursor"]) == (None, 4)
@@ -0,0 +1,93 @@
+"""
+Pruebas de utils/serializacion.py
+"""
+
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+
+import utils.serializacion as serializacion
+from utils.serializacion import compilar_mapper, dumps, respuesta_json
+
+
+CONTENIDO = {
+    "texto": "Pérez Ñandú",
+    "entero": 3,
+    "decimal": 150.5,
+    "nulo": None,
+    "booleano": True,
+    "fecha": date(2026, 1, 5),
+    "fecha_hora": datetime(2026, 1, 5, 10, 30),
+    "lista": [1, "dos"]
+}
+
+
+def test_dumps_json_compacto_utf8():
+    cuerpo = dumps(CONTENIDO)
+    assert isinstance(cuerpo, bytes)
+    assert b" " not in cuerpo.replace("Pérez Ñandú".encode(), b"")
+    assert "Pérez Ñandú".encode("utf-8") in cuerpo
+    assert json.loads(cuerpo)["fecha"] == "2026-01-05"
+    assert json.loads(cuerpo)["fecha_hora"] == "2026-01-05T10:30:00"
+
+
+def test_dumps_sin_orjson_produce_lo_mismo(monkeypatch):
+    con_orjson = dumps(CONTENIDO)
+    monkeypatch.setattr(serializacion, "orjson", None)
+    assert dumps(CONTENIDO) == con_orjson
+
+
+def test_dumps_sin_orjson_rechaza_tipos_desconocidos(monkeypatch):
+    monkeypatch.setattr(serializacion, "orjson", None)
+    with pytest.raises(TypeError):
+        dumps({"valor": Decimal("1.5")})
+
+
+def test_mapper_aplica_conversiones_y_conserva_el_orden():
+    mapper = compilar_mapper([
+        ("monto", 2, "float"),
+        ("status", None, "valor"),
+        ("periodo", 0, "fecha_texto"),
+        ("condonado", 1, "int"),
+        ("fecha", 3, "fecha_hora_texto"),
+        ("cuota", 4, "float_o_cero"),
+        ("semana", 5, "valor")
+    ])
+    fila = (date(2026, 1, 5), Decimal("1"), Decimal("150.50"), datetime(2026, 2, 1, 9, 5, 7), None, "2026-01")
+    resultado = mapper(fila)
+    assert list(resultado) == ["monto", "status", "periodo", "condonado", "fecha", "cuota", "semana"]
+    assert resultado == {
+        "monto": 150.5,
+        "status": None,
+        "periodo": "2026-01-05",
+        "condonado": 1,
+        "fecha": "2026-02-01 09:05:07",
+        "cuota": 0,
+        "semana": "2026-01"
+    }
+    assert type(resultado["condonado"]) is int
+
+
+def test_mapper_respeta_nulos():
+    mapper = compilar_mapper([("monto", 0, "float"), ("condonado", 1, "int"), ("fecha", 2, "fecha_texto")])
+    assert mapper((None, None, None)) == {"monto": None, "condonado": None, "fecha": None}
+
+
+def test_mapper_de_un_solo_campo():
+    assert compilar_mapper([("monto", 0, "float")])((Decimal("1.5"),)) == {"monto": 1.5}
+
+
+def test_mapper_con_conversion_desconocida():
+    with pytest.raises(KeyError):
+        compilar_mapper([("monto", 0, "moneda")])
+
+
+def test_respuesta_json_acepta_bytes_o_contenido():
+    ya_serializado = respuesta_json(b'{"a":1}', status_code=201, headers={"ETag": '"x"'})
+    assert ya_serializado.body == b'{"a":1}'
+    assert ya_serializado.status_code == 201
+    assert ya_serializado.headers["ETag"] == '"x"'
+    assert ya_serializado.media_type == "application/json"
+    assert respuesta_json({"a": 1}).body == b'{"a":1}'
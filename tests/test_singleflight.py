@@ -0,0 +1,94 @@
+"""
+Pruebas de utils/singleflight.py
+"""
+
+import asyncio
+
+import pytest
+
+from utils.singleflight import SingleFlight
+
+
+def test_llamadas_concurrentes_comparten_una_ejecucion():
+    async def escenario():
+        sf = SingleFlight()
+        liberar = asyncio.Event()
+        llamadas = 0
+
+        async def consulta():
+            nonlocal llamadas
+            llamadas += 1
+            await liberar.wait()
+            return {"id_credito": 1}
+
+        esperas = [asyncio.ensure_future(sf.do(("general", 1), consulta)) for _ in range(5)]
+        await asyncio.sleep(0)
+        liberar.set()
+        resultados = await asyncio.gather(*esperas)
+        return sf, llamadas, resultados
+
+    sf, llamadas, resultados = asyncio.run(escenario())
+    assert llamadas == 1
+    assert all(resultado is resultados[0] for resultado in resultados)
+    assert sf.stats() == {"en_vuelo": 0, "ejecuciones": 1, "coalescidas": 4}
+
+
+def test_llaves_distintas_no_se_coalescen():
+    async def escenario():
+        sf = SingleFlight()
+
+        async def consulta(valor):
+            await asyncio.sleep(0)
+            return valor
+
+        return sf, await asyncio.gather(
+            sf.do(("general", 1), lambda: consulta(1)),
+            sf.do(("general", 2), lambda: consulta(2))
+        )
+
+    sf, resultados = asyncio.run(escenario())
+    assert resultados == [1, 2]
+    assert sf.stats()["ejecuciones"] == 2
+
+
+def test_la_excepcion_llega_a_todas_las_esperas_y_libera_la_llave():
+    async def escenario():
+        sf = SingleFlight()
+
+        async def falla():
+            await asyncio.sleep(0)
+            raise ValueError("sin conexión")
+
+        resultados = await asyncio.gather(
+            sf.do("k", falla), sf.do("k", falla), return_exceptions=True
+        )
+        # Terminada la ejecución, una llamada nueva vuelve a ejecutar
+        segunda = await sf.do("k", lambda: asyncio.sleep(0, result="ok"))
+        return sf, resultados, segunda
+
+    sf, resultados, segunda = asyncio.run(escenario())
+    assert all(isinstance(r, ValueError) for r in resultados)
+    assert segunda == "ok"
+    assert sf.stats()["ejecuciones"] == 2
+
+
+def test_cancelar_al_lider_no_cancela_a_los_demas():
+    async def escenario():
+        sf = SingleFlight()
+        liberar = asyncio.Event()
+
+        async def consulta():
+            await liberar.wait()
+            return "resultado"
+
+        lider = asyncio.ensure_future(sf.do("k", consulta))
+        seguidor = asyncio.ensure_future(sf.do("k", consulta))
+        await asyncio.sleep(0)
+        lider.cancel()
+        await asyncio.sleep(0)
+        liberar.set()
+        with pytest.raises(asyncio.CancelledError):
+            await lider
+        return await seguidor
+
+    assert asyncio.run(escenario()) == "resultado"
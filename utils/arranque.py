@@ -0,0 +1,108 @@
+"""
+Calentamiento de arranque
+Registra los pasos del calentamiento de cada worker (conexiones, réplica,
+rollup, diagnóstico de índices, ...) y su duración; /health/ready responde
+503 hasta que el calentamiento termina y mientras un paso requerido falle.
+"""
+
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+
+class ArranqueConfig:
+    """Configuración del calentamiento de arranque"""
+
+    # El lifespan espera al calentamiento antes de aceptar peticiones; si es
+    # False corre en segundo plano y solo /health/ready lo refleja
+    ESPERAR = os.getenv("WARMUP_WAIT", "true").strip().lower() in ("1", "true", "yes", "si", "sí")
+    # Máximo de segundos que el lifespan espera; el resto sigue en segundo plano
+    TIMEOUT = float(os.getenv("WARMUP_TIMEOUT", "30"))
+    # Segundos entre reintentos de los pasos requeridos que fallaron
+    REINTENTO = float(os.getenv("WARMUP_RETRY_INTERVAL", "10"))
+
+
+class EstadoArranque:
+    """Pasos del calentamiento del proceso actual"""
+
+    def __init__(self):
+        self.inicio = time.monotonic()
+        # (nombre, segundos, error); un reintento reemplaza el registro del paso
+        self.pasos: List[tuple] = []
+        # Pasos requeridos cuyo último intento falló: nombre -> error
+        self.fallidos: Dict[str, str] = {}
+        self.reintentos = 0
+        self.listo = False
+        self.listo_en: Optional[float] = None
+
+    @asynccontextmanager
+    async def paso(self, nombre: str, requerido: bool = False) -> AsyncIterator[None]:
+        """
+        Mide un paso del calentamiento. Si el paso falla el error se registra
+        y el calentamiento continúa: la aplicación funciona sin él (ej. sin
+        réplica se consulta MySQL), solo más lenta. Si el paso es requerido
+        queda en `fallidos` hasta que un reintento lo logre, y mientras tanto
+        el worker no se marca como listo.
+
+        Example:
+            async with arranque.paso("segundometro"):
+                await run_db(replica_segundometro.cargar)
+        """
+        inicio = time.perf_counter()
+        error = None
+        try:
+            yield
+        except Exception as e:
+            error = str(e) or type(e).__name__
+            if requerido:
+                logger.error("Falló el paso requerido de calentamiento '%s': %s", nombre, e)
+            else:
+                logger.warning("Falló el paso de calentamiento '%s': %s", nombre, e)
+        registro = (nombre, time.perf_counter() - inicio, error)
+        anteriores = [i for i, (paso, _, _) in enumerate(self.pasos) if paso == nombre]
+        if anteriores:
+            self.pasos[anteriores[0]] = registro
+        else:
+            self.pasos.append(registro)
+        if requerido and error is not None:
+            self.fallidos[nombre] = error
+        else:
+            self.fallidos.pop(nombre, None)
+
+    def marcar_listo(self) -> None:
+        """Marca el worker como listo; no hace nada si falta un paso requerido"""
+        if self.fallidos:
+            return
+        self.listo = True
+        self.listo_en = time.monotonic()
+        logger.info(
+            "Calentamiento terminado en %.2f s (%s)",
+            self.listo_en - self.inicio,
+            ", ".join(f"{nombre}={duracion:.2f}s" for nombre, duracion, _ in self.pasos)
+        )
+
+    def stats(self) -> dict:
+        """Pasos del calentamiento para monitoreo"""
+        return {
+            "listo": self.listo,
+            "pasos_fallidos": sorted(self.fallidos),
+            "reintentos": self.reintentos,
+            "segundos_hasta_listo": round(self.listo_en - self.inicio, 3) if self.listo_en else None,
+            "iniciado_en": datetime.fromtimestamp(time.time() - (time.monotonic() - self.inicio)).isoformat(),
+            "pasos": [
+                {"paso": nombre, "segundos": round(duracion, 3), "error": error}
+                for nombre, duracion, error in self.pasos
+            ]
+        }
+
+
+# Estado compartido por la aplicación
+arranque = EstadoArranque()
@@ -0,0 +1,145 @@
+"""
+Caché en memoria con expiración (TTL) y desalojo LRU
+"""
+
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+
+def estimar_tamano(valor: Any) -> int:
+    """
+    Estima los bytes que ocupa un valor en memoria (recorre dicts, listas y tuplas).
+    
+    Args:
+        valor: Valor a medir
+    
+    Returns:
+        Tamaño aproximado en bytes
+    """
+    tamano = sys.getsizeof(valor)
+    if isinstance(valor, dict):
+        tamano += sum(estimar_tamano(k) + estimar_tamano(v) for k, v in valor.items())
+    elif isinstance(valor, (list, tuple, set)):
+        tamano += sum(estimar_tamano(v) for v in valor)
+    return tamano
+
+
+class TTLCache:
+    """
+    Caché acotada por número de entradas y por memoria.
+    
+    - Cada entrada expira `ttl` segundos después de guardarse.
+    - Al superar `max_entries` o `max_bytes` se desalojan las entradas
+      menos usadas recientemente (LRU).
+    """
+    
+    def __init__(
+        self,
+        max_entries: int,
+        ttl: float,
+        max_bytes: int = 0,
+        sizeof: Callable[[Any], int] = estimar_tamano
+    ):
+        self.max_entries = max(1, max_entries)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof
+        self._datos: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+    
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Retorna el valor vigente de la llave o None"""
+        ahora = time.monotonic()
+        with self._lock:
+            entrada = self._datos.get(key)
+            if entrada is None:
+                self.misses += 1
+                return None
+            valor, expira, tamano = entrada
+            if expira <= ahora:
+                self._eliminar(key, tamano)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._datos.move_to_end(key)
+            self.hits += 1
+            return valor
+    
+    def set(self, key: Hashable, valor: Any) -> None:
+        """Guarda un valor, desalojando entradas LRU si se excede algún límite"""
+        tamano = self._sizeof(valor)
+        if self.max_bytes and tamano > self.max_bytes:
+            # No cabe: se descarta también el valor anterior para no servirlo obsoleto
+            self.invalidate(key)
+            return
+        expira = time.monotonic() + self.ttl
+        with self._lock:
+            anterior = self._datos.pop(key, None)
+            if anterior is not None:
+                self._bytes -= anterior[2]
+            self._datos[key] = (valor, expira, tamano)
+            self._bytes += tamano
+            while len(self._datos) > self.max_entries or (self.max_bytes and self._bytes > self.max_bytes):
+                llave_lru, (_, _, tamano_lru) = self._datos.popitem(last=False)
+                self._bytes -= tamano_lru
+                self.evictions += 1
+    
+    def invalidate(self, key: Hashable) -> bool:
+        """Elimina una llave. Retorna True si existía."""
+        with self._lock:
+            entrada = self._datos.get(key)
+            if entrada is None:
+                return False
+            self._eliminar(key, entrada[2])
+            return True
+    
+    def invalidate_where(self, predicado: Callable[[Hashable], bool]) -> int:
+        """
+        Elimina todas las llaves que cumplan el predicado.
+        
+        Returns:
+            Número de entradas eliminadas
+        """
+        with self._lock:
+            llaves = [key for key in self._datos if predicado(key)]
+            for key in llaves:
+                self._eliminar(key, self._datos[key][2])
+            return len(llaves)
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._datos.clear()
+            self._bytes = 0
+    
+    def _eliminar(self, key: Hashable, tamano: int) -> None:
+        del self._datos[key]
+        self._bytes -= tamano
+    
+    def __len__(self) -> int:
+        return len(self._datos)
+    
+    def stats(self) -> dict:
+        """Estadísticas de la caché para monitoreo"""
+        with self._lock:
+            consultas = self.hits + self.misses
+            return {
+                "entradas": len(self._datos),
+                "max_entradas": self.max_entries,
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "ttl_segundos": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / consultas, 4) if consultas else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations
+            }
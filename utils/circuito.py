@@ -0,0 +1,177 @@
+"""
+Circuit breaker para dependencias externas
+"""
+
+import time
+from collections import deque
+from typing import Optional
+
+CERRADO = "cerrado"
+ABIERTO = "abierto"
+SEMI_ABIERTO = "semi_abierto"
+
+
+class CircuitoAbiertoError(Exception):
+    """El circuito está abierto: la llamada se rechaza sin contactar a la dependencia"""
+
+    def __init__(self, reintentar_en: float):
+        self.reintentar_en = reintentar_en
+        super().__init__(f"Circuito abierto; se reintentará en {reintentar_en:.1f} s")
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker por tasa de fallos y de llamadas lentas sobre una
+    ventana de las últimas `ventana` llamadas.
+
+    - cerrado: las llamadas pasan. Con al menos `min_llamadas` en la ventana,
+      si la fracción de fallos llega a `tasa_fallos` o la de llamadas más
+      lentas que `umbral_lento` llega a `tasa_lentas`, el circuito se abre.
+    - abierto: las llamadas se rechazan de inmediato durante `espera_abierto`
+      segundos.
+    - semi_abierto: pasan hasta `llamadas_prueba` llamadas de prueba
+      simultáneas; si todas salen bien el circuito se cierra, al primer
+      fallo vuelve a abrirse.
+
+    Se usa desde el event loop (sin locks). Además conserva las latencias
+    de las llamadas exitosas recientes para calcular percentiles.
+    """
+
+    def __init__(
+        self,
+        nombre: str,
+        ventana: int = 50,
+        min_llamadas: int = 20,
+        tasa_fallos: float = 0.5,
+        umbral_lento: float = 5.0,
+        tasa_lentas: float = 0.8,
+        espera_abierto: float = 30.0,
+        llamadas_prueba: int = 3
+    ):
+        self.nombre = nombre
+        self.min_llamadas = max(1, min_llamadas)
+        self.tasa_fallos = tasa_fallos
+        self.umbral_lento = umbral_lento
+        self.tasa_lentas = tasa_lentas
+        self.espera_abierto = espera_abierto
+        self.llamadas_prueba = max(1, llamadas_prueba)
+
+        # (falló, fue lenta) de las últimas llamadas
+        self._ventana: deque = deque(maxlen=max(1, ventana))
+        self._latencias: deque = deque(maxlen=max(1, ventana) * 4)
+        self._estado = CERRADO
+        self._abierto_desde = 0.0
+        self._pruebas_en_curso = 0
+        self._pruebas_exitosas = 0
+
+        # Contadores para monitoreo
+        self.aperturas = 0
+        self.rechazadas = 0
+        self.exitos = 0
+        self.fallos = 0
+
+    @property
+    def estado(self) -> str:
+        if self._estado == ABIERTO and time.monotonic() - self._abierto_desde >= self.espera_abierto:
+            self._estado = SEMI_ABIERTO
+            self._pruebas_en_curso = 0
+            self._pruebas_exitosas = 0
+        return self._estado
+
+    def adquirir(self) -> None:
+        """
+        Pide permiso para hacer una llamada. Cada permiso concedido se cierra
+        con exactamente una de `registrar_exito`, `registrar_fallo` o `liberar`.
+
+        Raises:
+            CircuitoAbiertoError: Si el circuito está abierto o ya hay
+                suficientes llamadas de prueba en curso
+        """
+        estado = self.estado
+        if estado == CERRADO:
+            return
+        if estado == SEMI_ABIERTO and self._pruebas_en_curso < self.llamadas_prueba:
+            self._pruebas_en_curso += 1
+            return
+        self.rechazadas += 1
+        restante = self.espera_abierto - (time.monotonic() - self._abierto_desde)
+        raise CircuitoAbiertoError(max(0.0, restante))
+
+    def registrar_exito(self, duracion: float) -> None:
+        """Cierra un permiso con una llamada exitosa que tardó `duracion` segundos"""
+        self.exitos += 1
+        self._latencias.append(duracion)
+        lenta = duracion >= self.umbral_lento
+        if self._estado == SEMI_ABIERTO:
+            self._pruebas_en_curso = max(0, self._pruebas_en_curso - 1)
+            if lenta:
+                self._abrir()
+                return
+            self._pruebas_exitosas += 1
+            if self._pruebas_exitosas >= self.llamadas_prueba:
+                self._cerrar()
+            return
+        self._ventana.append((False, lenta))
+        self._evaluar()
+
+    def registrar_fallo(self, duracion: float) -> None:
+        """Cierra un permiso con una llamada fallida"""
+        self.fallos += 1
+        if self._estado == SEMI_ABIERTO:
+            self._pruebas_en_curso = max(0, self._pruebas_en_curso - 1)
+            self._abrir()
+            return
+        self._ventana.append((True, duracion >= self.umbral_lento))
+        self._evaluar()
+
+    def liberar(self) -> None:
+        """Cierra un permiso sin resultado (llamada cancelada)"""
+        if self._estado == SEMI_ABIERTO:
+            self._pruebas_en_curso = max(0, self._pruebas_en_curso - 1)
+
+    def percentil(self, p: float) -> Optional[float]:
+        """
+        Percentil `p` (0-100) de la latencia de las llamadas exitosas
+        recientes, o None si aún no hay suficientes muestras.
+        """
+        if len(self._latencias) < self.min_llamadas:
+            return None
+        ordenadas = sorted(self._latencias)
+        indice = min(len(ordenadas) - 1, max(0, int(round(p / 100 * len(ordenadas))) - 1))
+        return ordenadas[indice]
+
+    def _evaluar(self) -> None:
+        if self._estado != CERRADO or len(self._ventana) < self.min_llamadas:
+            return
+        total = len(self._ventana)
+        fallidas = sum(1 for fallo, _ in self._ventana if fallo)
+        lentas = sum(1 for _, lenta in self._ventana if lenta)
+        if fallidas / total >= self.tasa_fallos or lentas / total >= self.tasa_lentas:
+            self._abrir()
+
+    def _abrir(self) -> None:
+        self._estado = ABIERTO
+        self._abierto_desde = time.monotonic()
+        self._ventana.clear()
+        self.aperturas += 1
+
+    def _cerrar(self) -> None:
+        self._estado = CERRADO
+        self._ventana.clear()
+        self._pruebas_en_curso = 0
+        self._pruebas_exitosas = 0
+
+    def stats(self) -> dict:
+        """Estadísticas del circuito para monitoreo"""
+        total = len(self._ventana)
+        return {
+            "nombre": self.nombre,
+            "estado": self.estado,
+            "llamadas_en_ventana": total,
+            "tasa_fallos": round(sum(1 for f, _ in self._ventana if f) / total, 4) if total else 0.0,
+            "tasa_lentas": round(sum(1 for _, l in self._ventana if l) / total, 4) if total else 0.0,
+            "aperturas": self.aperturas,
+            "rechazadas": self.rechazadas,
+            "exitos": self.exitos,
+            "fallos": self.fallos
+        }
@@ -0,0 +1,46 @@
+"""
+Traducción de errores a respuestas HTTP
+"""
+
+import functools
+from typing import Awaitable, Callable, TypeVar
+
+import pymysql
+from fastapi import HTTPException
+
+T = TypeVar("T")
+
+
+def traducir_error(error: Exception) -> HTTPException:
+    """
+    Convierte una excepción en el HTTPException que responde el API.
+    
+    Args:
+        error: Excepción capturada
+    
+    Returns:
+        El mismo HTTPException, o un 500 con el detalle del error
+    """
+    if isinstance(error, HTTPException):
+        return error
+    if isinstance(error, pymysql.Error):
+        return HTTPException(status_code=500, detail=f"Error de base de datos: {str(error)}")
+    return HTTPException(status_code=500, detail=f"Error interno del servidor: {str(error)}")
+
+
+def traducir_errores(endpoint: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+    """
+    Decorador para endpoints: los errores de base de datos y los no
+    controlados se responden como 500 con el mensaje estándar; los
+    HTTPException pasan sin cambios. Conserva la firma para FastAPI.
+    """
+    @functools.wraps(endpoint)
+    async def envoltura(*args, **kwargs):
+        try:
+            return await endpoint(*args, **kwargs)
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise traducir_error(e)
+    
+    return envoltura
@@ -0,0 +1,143 @@
+"""
+Utilidades de caché HTTP: ETag fuerte e If-None-Match (304)
+"""
+
+import hashlib
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Iterable, Optional
+import os
+from dotenv import load_dotenv
+
+from fastapi import Response
+
+load_dotenv()
+
+
+class HttpCacheConfig:
+    """Configuración de respuestas condicionales"""
+    
+    ETAG_ENABLED = os.getenv("HTTP_ETAG_ENABLED", "true").strip().lower() in ("1", "true", "yes", "si", "sí")
+    # Por defecto el cliente debe revalidar siempre (If-None-Match) y los
+    # proxies compartidos no guardan la respuesta (depende del API Key)
+    CACHE_CONTROL = os.getenv("HTTP_CACHE_CONTROL", "private, no-cache")
+
+
+def _normalizar(valor):
+    """Representación estable de un valor sin importar si viene de MySQL o de la réplica"""
+    if isinstance(valor, Decimal):
+        return float(valor)
+    if isinstance(valor, (datetime, date)):
+        # Mismo texto que MySQL para DATE/DATETIME ("2024-01-31 10:00:00")
+        return str(valor)
+    return valor
+
+
+def huella_desde_detalles(detalles: Iterable[dict]) -> dict:
+    """
+    Calcula sobre filas ya consultadas los mismos agregados que la consulta
+    de huella de gastos_cobranza (total, condonados, última condonación,
+    último periodo y sumas de monto_valor y cuota).
+    
+    Args:
+        detalles: Filas de detalle con condonado, fecha_condonacion,
+            periodoinicio, monto_valor y cuota
+    
+    Returns:
+        Diccionario de agregados
+    """
+    total = 0
+    condonados = 0
+    ultima_condonacion = None
+    ultimo_periodo = None
+    # Decimal para que la suma sea exacta, igual que SUM sobre DECIMAL en MySQL
+    suma_monto_valor = Decimal(0)
+    suma_cuota = Decimal(0)
+    for row in detalles:
+        total += 1
+        if row["condonado"] == 1:
+            condonados += 1
+        fecha = row["fecha_condonacion"]
+        if fecha is not None and (ultima_condonacion is None or fecha > ultima_condonacion):
+            ultima_condonacion = fecha
+        periodo = row["periodoinicio"]
+        if periodo is not None and (ultimo_periodo is None or periodo > ultimo_periodo):
+            ultimo_periodo = periodo
+        if row["monto_valor"] is not None:
+            suma_monto_valor += Decimal(str(row["monto_valor"]))
+        if row["cuota"] is not None:
+            suma_cuota += Decimal(str(row["cuota"]))
+    return {
+        "total": total,
+        "condonados": condonados,
+        "ultima_condonacion": ultima_condonacion,
+        "ultimo_periodo": ultimo_periodo,
+        "suma_monto_valor": suma_monto_valor,
+        "suma_cuota": suma_cuota
+    }
+
+
+def calcular_etag(variante: str, datos_generales: dict, huella: dict) -> str:
+    """
+    Genera un ETag fuerte para la respuesta de un crédito.
+    
+    Args:
+        variante: Endpoint que genera la representación (ej. "general")
+        datos_generales: Datos generales del crédito
+        huella: Agregados de gastos_cobranza (ver huella_desde_detalles)
+    
+    Returns:
+        ETag entre comillas
+    """
+    partes = (
+        variante,
+        tuple((campo, _normalizar(valor)) for campo, valor in sorted(datos_generales.items())),
+        int(huella["total"]),
+        int(huella["condonados"]),
+        _normalizar(huella["ultima_condonacion"]),
+        _normalizar(huella["ultimo_periodo"]),
+        _normalizar(huella["suma_monto_valor"]),
+        _normalizar(huella["suma_cuota"])
+    )
+    digest = hashlib.sha256(repr(partes).encode("utf-8")).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def etag_coincide(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Compara el header If-None-Match con el ETag actual (comparación débil,
+    como indica RFC 9110 para If-None-Match).
+    
+    Args:
+        if_none_match: Valor del header recibido
+        etag: ETag actual de la representación
+    
+    Returns:
+        True si el cliente ya tiene la representación actual
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for candidato in if_none_match.split(","):
+        candidato = candidato.strip()
+        if candidato.startswith("W/"):
+            candidato = candidato[2:]
+        if candidato == etag:
+            return True
+    return False
+
+
+def agregar_encabezados_cache(response: Response, etag: Optional[str]) -> None:
+    """Agrega ETag y Cache-Control a una respuesta exitosa"""
+    if etag is not None:
+        response.headers["ETag"] = etag
+    if HttpCacheConfig.CACHE_CONTROL:
+        response.headers["Cache-Control"] = HttpCacheConfig.CACHE_CONTROL
+
+
+def respuesta_no_modificada(etag: str) -> Response:
+    """Respuesta 304 sin cuerpo para un ETag que el cliente ya tiene"""
+    response = Response(status_code=304)
+    agregar_encabezados_cache(response, etag)
+    return response
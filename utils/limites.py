@@ -0,0 +1,82 @@
+"""
+Límites de uso: token bucket y cuota diaria
+"""
+
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+
+class TokenBucket:
+    """
+    Token bucket con recarga perezosa: se recargan `tasa` tokens por segundo
+    hasta `capacidad` (la ráfaga máxima). Cada petición consume un token.
+    Se usa desde el event loop (sin locks); cada operación es O(1).
+    """
+
+    __slots__ = ("tasa", "capacidad", "_tokens", "_ultima")
+
+    def __init__(self, tasa: float, capacidad: float):
+        self.tasa = tasa
+        self.capacidad = max(1.0, capacidad)
+        self._tokens = self.capacidad
+        self._ultima = time.monotonic()
+
+    def consumir(self, costo: float = 1.0) -> float:
+        """
+        Intenta consumir `costo` tokens.
+
+        Returns:
+            0 si se concedió, o los segundos que faltan para tener los tokens
+        """
+        ahora = time.monotonic()
+        self._tokens = min(self.capacidad, self._tokens + (ahora - self._ultima) * self.tasa)
+        self._ultima = ahora
+        if self._tokens >= costo:
+            self._tokens -= costo
+            return 0.0
+        return (costo - self._tokens) / self.tasa
+
+    @property
+    def disponibles(self) -> float:
+        transcurrido = time.monotonic() - self._ultima
+        return min(self.capacidad, self._tokens + transcurrido * self.tasa)
+
+
+class CuotaDiaria:
+    """Máximo de peticiones por día calendario (hora local); se reinicia a medianoche"""
+
+    __slots__ = ("limite", "usadas", "_dia")
+
+    def __init__(self, limite: int):
+        self.limite = limite
+        self.usadas = 0
+        self._dia = datetime.now().date()
+
+    def espera(self, ahora: Optional[datetime] = None) -> float:
+        """
+        Revisa la cuota sin contar la petición.
+
+        Returns:
+            0 si hay cuota, o los segundos que faltan para que se reinicie
+        """
+        ahora = ahora or datetime.now()
+        if ahora.date() != self._dia:
+            self._dia = ahora.date()
+            self.usadas = 0
+        if self.usadas >= self.limite:
+            manana = datetime.combine(self._dia + timedelta(days=1), datetime.min.time())
+            return max(1.0, (manana - ahora).total_seconds())
+        return 0.0
+
+    def consumir(self, ahora: Optional[datetime] = None) -> float:
+        """
+        Cuenta una petición contra la cuota.
+
+        Returns:
+            0 si hay cuota, o los segundos que faltan para que se reinicie
+        """
+        espera = self.espera(ahora)
+        if espera == 0:
+            self.usadas += 1
+        return espera
@@ -0,0 +1,296 @@
+"""
+Métricas en formato de exposición de Prometheus
+Registro en memoria de contadores, gauges e histogramas con etiquetas, sin
+dependencias externas. Las observaciones cuestan un bisect y un lock, así que
+se pueden registrar desde el event loop y desde los hilos del executor de BD.
+"""
+
+import bisect
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+class MetricasConfig:
+    """Configuración del endpoint /metrics"""
+
+    ENABLED = os.getenv("METRICS_ENABLED", "true").strip().lower() in ("1", "true", "yes", "si", "sí")
+
+
+# Buckets (segundos) por defecto de los clientes oficiales de Prometheus
+BUCKETS_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+
+# Muestra calculada al momento del scrape: (etiquetas, valor)
+Muestra = Tuple[Dict[str, str], float]
+# Familia calculada por un colector: (nombre, tipo, ayuda, muestras)
+Familia = Tuple[str, str, str, List[Muestra]]
+
+
+def _escapar(valor: str) -> str:
+    return str(valor).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _etiquetas(nombres: Sequence[str], valores: Sequence[str], extra: str = "") -> str:
+    pares = [f'{n}="{_escapar(v)}"' for n, v in zip(nombres, valores)]
+    if extra:
+        pares.append(extra)
+    return "{" + ",".join(pares) + "}" if pares else ""
+
+
+def _numero(valor: float) -> str:
+    if valor == float("inf"):
+        return "+Inf"
+    if float(valor).is_integer():
+        return str(int(valor))
+    return repr(float(valor))
+
+
+class _Metrica:
+    """Base de las métricas con etiquetas"""
+
+    tipo = ""
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: Sequence[str] = ()):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self._lock = threading.Lock()
+
+    def _encabezado(self) -> List[str]:
+        return [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} {self.tipo}"]
+
+
+class Contador(_Metrica):
+    """Contador monótono por combinación de etiquetas"""
+
+    tipo = "counter"
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: Sequence[str] = ()):
+        super().__init__(nombre, ayuda, etiquetas)
+        self._valores: Dict[tuple, float] = {}
+
+    def inc(self, *valores: str, cantidad: float = 1) -> None:
+        with self._lock:
+            self._valores[valores] = self._valores.get(valores, 0) + cantidad
+
+    def render(self) -> List[str]:
+        with self._lock:
+            valores = list(self._valores.items())
+        lineas = self._encabezado()
+        for llave, valor in valores:
+            lineas.append(f"{self.nombre}{_etiquetas(self.etiquetas, llave)} {_numero(valor)}")
+        return lineas
+
+
+class Gauge(_Metrica):
+    """Valor que sube y baja (ej. peticiones en vuelo)"""
+
+    tipo = "gauge"
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: Sequence[str] = ()):
+        super().__init__(nombre, ayuda, etiquetas)
+        self._valores: Dict[tuple, float] = {}
+
+    def inc(self, *valores: str, cantidad: float = 1) -> None:
+        with self._lock:
+            self._valores[valores] = self._valores.get(valores, 0) + cantidad
+
+    def dec(self, *valores: str, cantidad: float = 1) -> None:
+        self.inc(*valores, cantidad=-cantidad)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            valores = list(self._valores.items())
+        lineas = self._encabezado()
+        for llave, valor in valores:
+            lineas.append(f"{self.nombre}{_etiquetas(self.etiquetas, llave)} {_numero(valor)}")
+        return lineas
+
+
+class Histograma(_Metrica):
+    """
+    Histograma acumulativo por combinación de etiquetas. Cada serie guarda
+    los conteos por bucket (no acumulados), la suma y el total; los buckets
+    acumulados se calculan al renderizar.
+    """
+
+    tipo = "histogram"
+
+    def __init__(
+        self,
+        nombre: str,
+        ayuda: str,
+        etiquetas: Sequence[str] = (),
+        buckets: Sequence[float] = BUCKETS_LATENCIA
+    ):
+        super().__init__(nombre, ayuda, etiquetas)
+        self.buckets = tuple(sorted(buckets))
+        # llave -> [conteos por bucket (+Inf al final), suma]
+        self._series: Dict[tuple, list] = {}
+
+    def observe(self, valor: float, *valores: str) -> None:
+        indice = bisect.bisect_left(self.buckets, valor)
+        with self._lock:
+            serie = self._series.get(valores)
+            if serie is None:
+                serie = [[0] * (len(self.buckets) + 1), 0.0]
+                self._series[valores] = serie
+            serie[0][indice] += 1
+            serie[1] += valor
+
+    def render(self) -> List[str]:
+        with self._lock:
+            series = [(llave, list(conteos), suma) for llave, (conteos, suma) in self._series.items()]
+        lineas = self._encabezado()
+        for llave, conteos, suma in series:
+            acumulado = 0
+            for limite, conteo in zip(self.buckets + (float("inf"),), conteos):
+                acumulado += conteo
+                etiquetas = _etiquetas(self.etiquetas, llave, f'le="{_numero(limite)}"')
+                lineas.append(f"{self.nombre}_bucket{etiquetas} {acumulado}")
+            etiquetas = _etiquetas(self.etiquetas, llave)
+            lineas.append(f"{self.nombre}_sum{etiquetas} {_numero(suma)}")
+            lineas.append(f"{self.nombre}_count{etiquetas} {acumulado}")
+        return lineas
+
+
+class RegistroMetricas:
+    """
+    Registro de métricas de la aplicación. Además de las métricas propias
+    admite colectores: funciones que al momento del scrape retornan métricas
+    calculadas a partir de las estadísticas existentes (pools, cachés, ...).
+    """
+
+    def __init__(self):
+        self._metricas: List[_Metrica] = []
+        self._colectores: List[Callable[[], Iterable[Familia]]] = []
+
+    def contador(self, nombre: str, ayuda: str, etiquetas: Sequence[str] = ()) -> Contador:
+        metrica = Contador(nombre, ayuda, etiquetas)
+        self._metricas.append(metrica)
+        return metrica
+
+    def gauge(self, nombre: str, ayuda: str, etiquetas: Sequence[str] = ()) -> Gauge:
+        metrica = Gauge(nombre, ayuda, etiquetas)
+        self._metricas.append(metrica)
+        return metrica
+
+    def histograma(
+        self,
+        nombre: str,
+        ayuda: str,
+        etiquetas: Sequence[str] = (),
+        buckets: Sequence[float] = BUCKETS_LATENCIA
+    ) -> Histograma:
+        metrica = Histograma(nombre, ayuda, etiquetas, buckets)
+        self._metricas.append(metrica)
+        return metrica
+
+    def colector(self, funcion: Callable[[], Iterable[Familia]]) -> None:
+        """
+        Registra una función que retorna tuplas (nombre, tipo, ayuda, muestras);
+        tipo es "gauge" o "counter". Se evalúa en cada scrape.
+        """
+        self._colectores.append(funcion)
+
+    def render(self) -> str:
+        """Texto en formato de exposición de Prometheus (versión 0.0.4)"""
+        lineas: List[str] = []
+        for metrica in self._metricas:
+            lineas.extend(metrica.render())
+        for funcion in self._colectores:
+            for nombre, tipo, ayuda, muestras in funcion():
+                lineas.append(f"# HELP {nombre} {ayuda}")
+                lineas.append(f"# TYPE {nombre} {tipo}")
+                for etiquetas, valor in muestras:
+                    lineas.append(f"{nombre}{_etiquetas(list(etiquetas), list(etiquetas.values()))} {_numero(float(valor))}")
+        return "\n".join(lineas) + "\n"
+
+
+# Registro compartido por la aplicación
+registro = RegistroMetricas()
+
+http_duracion = registro.histograma(
+    "condonaciones_http_request_duration_seconds",
+    "Latencia de las peticiones HTTP por ruta, método y código de estado",
+    ("ruta", "metodo", "status")
+)
+http_en_vuelo = registro.gauge(
+    "condonaciones_http_requests_in_flight",
+    "Peticiones HTTP en proceso"
+)
+db_duracion = registro.histograma(
+    "condonaciones_db_query_duration_seconds",
+    "Duración de cada sentencia del catálogo en MySQL",
+    ("sentencia",)
+)
+db_errores = registro.contador(
+    "condonaciones_db_query_errors_total",
+    "Sentencias del catálogo que terminaron en error",
+    ("sentencia",)
+)
+estadocuenta_duracion = registro.histograma(
+    "condonaciones_estadocuenta_request_duration_seconds",
+    "Latencia de las llamadas a la API externa de estado de cuenta por resultado",
+    ("resultado",)
+)
+estadocuenta_errores = registro.contador(
+    "condonaciones_estadocuenta_errors_total",
+    "Llamadas fallidas a la API externa de estado de cuenta por tipo de error",
+    ("tipo",)
+)
+estadocuenta_en_vuelo = registro.gauge(
+    "condonaciones_estadocuenta_requests_in_flight",
+    "Llamadas a la API externa de estado de cuenta en curso"
+)
+
+
+class MetricasMiddleware:
+    """
+    Middleware ASGI que mide la latencia de cada petición HTTP.
+
+    La ruta se etiqueta con la plantilla de FastAPI (ej.
+    /api/condonaciones/{id_credito}) para no crear una serie por crédito;
+    las peticiones que no coinciden con ninguna ruta se agrupan en "sin_ruta".
+    Para respuestas en streaming la latencia incluye el envío del cuerpo.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = [500]
+
+        async def enviar(mensaje):
+            if mensaje["type"] == "http.response.start":
+                status[0] = mensaje["status"]
+            await send(mensaje)
+
+        inicio = time.perf_counter()
+        http_en_vuelo.inc()
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            http_en_vuelo.dec()
+            ruta = scope.get("route")
+            http_duracion.observe(
+                time.perf_counter() - inicio,
+                getattr(ruta, "path", "sin_ruta"),
+                scope["method"],
+                str(status[0])
+            )
+
+
+def medir_sentencia(nombre: str, duracion: float, error: Optional[BaseException] = None) -> None:
+    """Registra la duración (y el error, si lo hubo) de una sentencia del catálogo"""
+    db_duracion.observe(duracion, nombre)
+    if error is not None:
+        db_errores.inc(nombre)
@@ -0,0 +1,55 @@
+"""
+Utilidades de paginación por llave (keyset)
+"""
+
+import base64
+import json
+from datetime import date
+from typing import Optional, Tuple
+
+from fastapi import HTTPException, status
+
+
+def codificar_cursor(periodo_inicio: Optional[date], id_gasto: int) -> str:
+    """
+    Genera un cursor opaco a partir de la llave de la última fila entregada.
+    
+    Args:
+        periodo_inicio: periodo_inicio de la última fila de la página (puede ser None)
+        id_gasto: id en gastos_cobranza de la última fila (desempata periodos repetidos)
+        
+    Returns:
+        Cursor en base64 url-safe (sin relleno)
+    """
+    llave = {"p": periodo_inicio.isoformat() if periodo_inicio is not None else None, "i": id_gasto}
+    contenido = json.dumps(llave, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(contenido).decode("ascii").rstrip("=")
+
+
+def decodificar_cursor(cursor: str) -> Tuple[Optional[date], int]:
+    """
+    Obtiene la llave (periodo_inicio, id) a partir de un cursor generado por
+    codificar_cursor.
+    
+    Args:
+        cursor: Cursor recibido del cliente
+        
+    Returns:
+        Llave (periodo_inicio o None, id) después de la cual continúa la siguiente página
+        
+    Raises:
+        HTTPException: Si el cursor no es válido
+    """
+    try:
+        relleno = "=" * (-len(cursor) % 4)
+        contenido = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+        periodo = contenido["p"]
+        id_gasto = contenido["i"]
+        if type(id_gasto) is not int:
+            raise TypeError("id inválido")
+        return (date.fromisoformat(periodo) if periodo is not None else None), id_gasto
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="El cursor de paginación es inválido"
+        )
@@ -0,0 +1,153 @@
+"""
+Serialización rápida de respuestas JSON
+
+Las filas de MySQL ya tienen tipos conocidos, así que no pasan por Pydantic:
+un mapper armado una sola vez por formato convierte cada tupla del cursor
+en el diccionario final y orjson lo serializa. El formato de salida es idéntico al de los
+modelos Pydantic + JSONResponse (JSON compacto, UTF-8 sin escapar,
+fechas ISO 8601).
+"""
+
+import json
+from datetime import date, datetime
+from operator import itemgetter
+from typing import Any, Callable, Optional, Sequence, Tuple
+
+from fastapi import Response
+
+from utils.tiempos import medir
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson es opcional
+    orjson = None
+
+
+def _a_float(valor):
+    # Igual que un campo Optional[float] de Pydantic
+    return None if valor is None else float(valor)
+
+
+def _a_int(valor):
+    # Igual que un campo Optional[int] de Pydantic
+    return None if valor is None else int(valor)
+
+
+def _float_o_cero(valor):
+    # Formato del endpoint general: float(x) if x else 0
+    return float(valor) if valor else 0
+
+
+def _fecha_texto(valor):
+    # strftime("%Y-%m-%d")
+    return valor.isoformat() if valor else None
+
+
+def _fecha_hora_texto(valor):
+    # Formato del endpoint general: strftime("%Y-%m-%d %H:%M:%S")
+    return valor.isoformat(" ", "seconds") if valor else None
+
+
+def _nulo(valor):
+    return None
+
+
+# Conversiones disponibles para cada columna del mapper. "valor" no convierte
+# (str, int, date y datetime se serializan tal cual).
+CONVERSIONES = {
+    "valor": None,
+    "float": _a_float,
+    "int": _a_int,
+    "float_o_cero": _float_o_cero,
+    "fecha_texto": _fecha_texto,
+    "fecha_hora_texto": _fecha_hora_texto
+}
+
+
+def compilar_mapper(campos: Sequence[Tuple[str, Optional[int], str]]) -> Callable[[tuple], dict]:
+    """
+    Genera una función que convierte una fila (tupla) en el diccionario de
+    respuesta. Las columnas se toman con un solo itemgetter y solo se llama
+    a las conversiones de los campos que la necesitan.
+    
+    Args:
+        campos: Tuplas (llave de salida, índice en la fila o None para null, conversión)
+    
+    Returns:
+        Función fila -> diccionario
+    
+    Raises:
+        KeyError: Si una conversión no existe
+    
+    Example:
+        mapper = compilar_mapper([("monto", 0, "float"), ("status", None, "valor")])
+        mapper((Decimal("1.5"),))  # {"monto": 1.5, "status": None}
+    """
+    llaves = tuple(llave for llave, _, _ in campos)
+    # Los campos null leen cualquier columna y la conversión la descarta
+    indices = [0 if indice is None else indice for _, indice, _ in campos]
+    conversiones = tuple(
+        (posicion, _nulo if indice is None else CONVERSIONES[conversion])
+        for posicion, (_, indice, conversion) in enumerate(campos)
+        if indice is None or CONVERSIONES[conversion] is not None
+    )
+    if len(indices) == 1:
+        # itemgetter con un solo índice no retorna tupla
+        indice = indices[0]
+        
+        def obtener(fila: tuple) -> tuple:
+            return (fila[indice],)
+    else:
+        obtener = itemgetter(*indices)
+    
+    def mapper(fila: tuple) -> dict:
+        valores = list(obtener(fila))
+        for posicion, convertir in conversiones:
+            valores[posicion] = convertir(valores[posicion])
+        return dict(zip(llaves, valores))
+    
+    return mapper
+
+
+def _por_defecto(valor: Any) -> str:
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    raise TypeError(f"Tipo no serializable: {type(valor).__name__}")
+
+
+def dumps(contenido: Any) -> bytes:
+    """
+    Serializa a JSON compacto en UTF-8 (orjson si está instalado).
+    
+    Args:
+        contenido: Diccionarios/listas con str, int, float, bool, None, date o datetime
+    
+    Returns:
+        JSON en bytes
+    """
+    with medir("serializacion"):
+        if orjson is not None:
+            return orjson.dumps(contenido)
+        return json.dumps(
+            contenido,
+            ensure_ascii=False,
+            allow_nan=False,
+            separators=(",", ":"),
+            default=_por_defecto
+        ).encode("utf-8")
+
+
+def respuesta_json(contenido: Any, status_code: int = 200, headers: Optional[dict] = None) -> Response:
+    """
+    Respuesta JSON sin revalidar con response_model.
+    
+    Args:
+        contenido: Contenido a serializar o JSON ya serializado (bytes)
+        status_code: Código HTTP
+        headers: Headers adicionales (ETag, Cache-Control, ...)
+    
+    Returns:
+        Response con media type application/json
+    """
+    body = contenido if isinstance(contenido, bytes) else dumps(contenido)
+    return Response(content=body, status_code=status_code, headers=headers, media_type="application/json")
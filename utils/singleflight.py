@@ -0,0 +1,67 @@
+"""
+Coalescencia de peticiones concurrentes idénticas (single-flight)
+"""
+
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Agrupa llamadas concurrentes con la misma llave en una sola ejecución.
+    
+    La primera llamada (líder) lanza la corrutina como tarea; las llamadas que
+    llegan mientras sigue en vuelo esperan esa misma tarea y reciben el mismo
+    resultado o la misma excepción.
+    
+    Cada espera se protege con `asyncio.shield`: si el cliente del líder se
+    desconecta y su petición se cancela, la tarea compartida sigue corriendo
+    para el resto de las esperas.
+    """
+    
+    def __init__(self):
+        self._en_vuelo: Dict[Hashable, asyncio.Task] = {}
+        self.ejecuciones = 0
+        self.coalescidas = 0
+    
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        Ejecuta `fn()` una sola vez por llave mientras haya llamadas en vuelo.
+        
+        Args:
+            key: Llave que identifica la operación (ej. ("general", id_credito))
+            fn: Función sin argumentos que retorna la corrutina a ejecutar
+        
+        Returns:
+            El resultado compartido de la ejecución
+        """
+        task = self._en_vuelo.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._en_vuelo[key] = task
+            task.add_done_callback(lambda t, key=key: self._terminar(key, t))
+            self.ejecuciones += 1
+        else:
+            self.coalescidas += 1
+        return await asyncio.shield(task)
+    
+    def _terminar(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._en_vuelo.get(key) is task:
+            del self._en_vuelo[key]
+        # Marca la excepción como recuperada aunque ya nadie espere la tarea
+        if not task.cancelled():
+            task.exception()
+    
+    def stats(self) -> dict:
+        """Estadísticas de coalescencia para monitoreo"""
+        return {
+            "en_vuelo": len(self._en_vuelo),
+            "ejecuciones": self.ejecuciones,
+            "coalescidas": self.coalescidas
+        }
+
+
+# Instancia compartida por la aplicación (las llaves llevan el nombre de la operación)
+coalescedor = SingleFlight()
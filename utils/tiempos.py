@@ -0,0 +1,122 @@
+"""
+Desglose de tiempos por petición (header Server-Timing)
+
+Cada petición del router de condonaciones lleva un contexto de tiempos
+(contextvars) en el que los módulos registran sus fases: autenticación,
+validación, obtención de conexión, cada sentencia SQL, la llamada a
+estadocuenta y la serialización. Al enviar la respuesta el middleware
+escribe el desglose en el header `Server-Timing`.
+
+Sin contexto activo (middleware deshabilitado, tareas en segundo plano)
+registrar una fase no hace nada.
+"""
+
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, Optional, Tuple
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+class TiemposConfig:
+    """Configuración del header Server-Timing"""
+
+    ENABLED = os.getenv("SERVER_TIMING_ENABLED", "false").strip().lower() in ("1", "true", "yes", "si", "sí")
+    # Solo las rutas con este prefijo llevan el header
+    PREFIJO = os.getenv("SERVER_TIMING_PREFIX", "/api/")
+
+
+class Tiempos:
+    """Fases registradas durante una petición"""
+
+    __slots__ = ("inicio", "fases")
+
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        # (nombre, segundos, descripción)
+        self.fases: List[Tuple[str, float, Optional[str]]] = []
+
+    def agregar(self, nombre: str, duracion: float, descripcion: Optional[str] = None) -> None:
+        # list.append es atómico: los hilos del executor de BD registran aquí también
+        self.fases.append((nombre, duracion, descripcion))
+
+    def header(self) -> str:
+        """
+        Valor del header Server-Timing, en el orden en que se registraron las
+        fases, más el total transcurrido hasta ahora.
+
+        Example:
+            auth;dur=0.1, validacion;dur=0.0, db-conexion;dur=0.4, db;desc="credito_con_gastos";dur=3.2, serializacion;dur=0.3, total;dur=5.0
+        """
+        partes = []
+        for nombre, duracion, descripcion in list(self.fases):
+            desc = f';desc="{descripcion}"' if descripcion else ""
+            partes.append(f"{nombre}{desc};dur={duracion * 1000:.1f}")
+        partes.append(f"total;dur={(time.perf_counter() - self.inicio) * 1000:.1f}")
+        return ", ".join(partes)
+
+
+_actual: ContextVar[Optional[Tiempos]] = ContextVar("tiempos", default=None)
+
+
+def registrar(nombre: str, duracion: float, descripcion: Optional[str] = None) -> None:
+    """Registra una fase ya medida (segundos) en la petición actual, si la hay"""
+    tiempos = _actual.get()
+    if tiempos is not None:
+        tiempos.agregar(nombre, duracion, descripcion)
+
+
+@contextmanager
+def medir(nombre: str, descripcion: Optional[str] = None) -> Iterator[None]:
+    """
+    Mide el bloque y lo registra como fase de la petición actual.
+
+    Example:
+        with medir("auth"):
+            ...
+    """
+    tiempos = _actual.get()
+    if tiempos is None:
+        yield
+        return
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        tiempos.agregar(nombre, time.perf_counter() - inicio, descripcion)
+
+
+class ServerTimingMiddleware:
+    """
+    Middleware ASGI que abre el contexto de tiempos de cada petición bajo
+    TiemposConfig.PREFIJO y agrega el header Server-Timing a la respuesta.
+
+    El header sale con el inicio de la respuesta: en los endpoints con
+    streaming solo incluye las fases previas al primer byte.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(TiemposConfig.PREFIJO):
+            await self.app(scope, receive, send)
+            return
+
+        tiempos = Tiempos()
+
+        async def enviar(mensaje):
+            if mensaje["type"] == "http.response.start":
+                encabezados = list(mensaje.get("headers", []))
+                encabezados.append((b"server-timing", tiempos.header().encode("latin-1")))
+                mensaje = {**mensaje, "headers": encabezados}
+            await send(mensaje)
+
+        token = _actual.set(tiempos)
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            _actual.reset(token)